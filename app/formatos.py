@@ -0,0 +1,12 @@
+# app/formatos.py
+"""Formatação de valores para exibição (colunas do admin, relatórios)."""
+
+# 1,234.56 -> 1.234,56: troca os dois separadores em uma única passada
+_SEPARADORES_BR = str.maketrans(",.", ".,")
+
+
+def brl(valor):
+    """Valor monetário no formato brasileiro (R$ 1.234,56); "-" se vazio."""
+    if valor is None:
+        return "-"
+    return f"R$ {valor:,.2f}".translate(_SEPARADORES_BR)
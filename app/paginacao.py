@@ -0,0 +1,177 @@
+# app/paginacao.py
+"""
+Paginação por chave (keyset/seek) para ListViews.
+
+Em vez de COUNT(*) + LIMIT/OFFSET, cada página é buscada a partir da chave
+de ordenação do último (ou primeiro) item da página anterior, então ir para
+a próxima página custa o mesmo na página 1 ou na 10.000. A posição viaja em
+um cursor opaco (?cursor=...). Passar ?page=N continua usando o Paginator
+do Django, para quando é preciso pular para uma página específica.
+
+Limitação: as colunas da chave não podem ser NULL e a última deve ser única
+(normalmente "id"/"-id") para desempatar.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+# ---------
+# Cursor opaco
+# ---------
+def codificar_cursor(valores, direcao="next"):
+    bruto = json.dumps({"v": valores, "d": direcao}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(token):
+    """Retorna (valores, direcao) ou None se o token for inválido."""
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        dados = json.loads(bruto)
+        valores, direcao = dados["v"], dados["d"]
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+        return None
+    if not isinstance(valores, list) or direcao not in ("next", "prev"):
+        return None
+    return valores, direcao
+
+
+# ---------
+# Helpers de ordenação
+# ---------
+def _campo_modelo(model, caminho):
+    """Resolve "paciente__nome" até o Field final para converter valores do cursor."""
+    partes = caminho.split("__")
+    for i, parte in enumerate(partes):
+        field = model._meta.pk if parte == "pk" else model._meta.get_field(parte)
+        if i < len(partes) - 1:
+            model = field.related_model
+    return field
+
+
+def valores_da_chave(obj, ordenacao):
+    valores = []
+    for chave in ordenacao:
+        valor = obj
+        for parte in chave.lstrip("-").split("__"):
+            valor = getattr(valor, parte)
+        valores.append(valor.isoformat() if hasattr(valor, "isoformat") else valor)
+    return valores
+
+
+def converter_valores(model, ordenacao, valores):
+    if len(valores) != len(ordenacao):
+        raise ValueError("Cursor incompatível com a ordenação.")
+    convertidos = []
+    for chave, valor in zip(ordenacao, valores):
+        field = _campo_modelo(model, chave.lstrip("-"))
+        convertidos.append(field.to_python(valor))
+    return convertidos
+
+
+def filtro_apos(ordenacao, valores, inverter=False):
+    """
+    Q para "linhas depois da chave `valores`" na ordenação dada, expandido
+    como (a > x) OR (a = x AND b > y) OR ... respeitando asc/desc por coluna.
+    """
+    condicao = Q()
+    igualdades = {}
+    for chave, valor in zip(ordenacao, valores):
+        campo = chave.lstrip("-")
+        descendente = chave.startswith("-") != inverter
+        lookup = "lt" if descendente else "gt"
+        condicao |= Q(**igualdades, **{f"{campo}__{lookup}": valor})
+        igualdades[campo] = valor
+    return condicao
+
+
+def _inverter(ordenacao):
+    return [c[1:] if c.startswith("-") else f"-{c}" for c in ordenacao]
+
+
+# ---------
+# Página e mixin
+# ---------
+class KeysetPage:
+    """Subconjunto da interface de django.core.paginator.Page usado nos templates."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginar_keyset(queryset, ordenacao, tamanho, cursor=None):
+    """Busca uma página (tamanho + 1 linhas para saber se há mais) a partir do cursor."""
+    posicao = decodificar_cursor(cursor) if cursor else None
+    direcao = "next"
+    if posicao:
+        valores, direcao = posicao
+        try:
+            valores = converter_valores(queryset.model, ordenacao, valores)
+        except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+            posicao = None
+            direcao = "next"
+
+    if direcao == "prev":
+        qs = queryset.filter(filtro_apos(ordenacao, valores, inverter=True)).order_by(*_inverter(ordenacao))
+        linhas = list(qs[: tamanho + 1])
+        tem_antes = len(linhas) > tamanho
+        linhas = list(reversed(linhas[:tamanho]))
+        tem_depois = True
+    else:
+        qs = queryset.order_by(*ordenacao)
+        if posicao:
+            qs = qs.filter(filtro_apos(ordenacao, valores))
+        linhas = list(qs[: tamanho + 1])
+        tem_depois = len(linhas) > tamanho
+        linhas = linhas[:tamanho]
+        tem_antes = posicao is not None
+
+    proximo = anterior = None
+    if linhas and tem_depois:
+        proximo = codificar_cursor(valores_da_chave(linhas[-1], ordenacao), "next")
+    if linhas and tem_antes:
+        anterior = codificar_cursor(valores_da_chave(linhas[0], ordenacao), "prev")
+    return KeysetPage(linhas, proximo, anterior)
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin para ListView: pagina por `keyset_ordering` com ?cursor=...
+    e mantém o modo offset quando a URL traz ?page=N.
+    """
+
+    keyset_ordering = ("id",)
+    cursor_kwarg = "cursor"
+
+    def usar_keyset(self, queryset):
+        return self.page_kwarg not in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.usar_keyset(queryset):
+            return super().paginate_queryset(queryset, page_size)
+        page = paginar_keyset(
+            queryset, list(self.keyset_ordering), page_size, self.request.GET.get(self.cursor_kwarg)
+        )
+        return (None, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,182 @@
+# app/perf.py
+"""
+Instrumentação opcional de requisições (SQL, tempo de view e de template).
+
+Ative com PERF_INSTRUMENTACAO = True no settings. Para cada nome de rota o
+middleware guarda as últimas PERF_AMOSTRAS_POR_ROTA amostras em memória
+(por processo) e aponta consultas repetidas na mesma requisição, que é a
+assinatura de N+1. O relatório fica em /_perf/ (apenas staff).
+
+O tempo de view vai de process_view até a view devolver a resposta
+(process_template_response para TemplateResponse, ou a volta do
+get_response para as demais) e o de template é o render da TemplateResponse.
+Views que chamam render() devolvem o HTML pronto: o render entra no tempo
+de view e o de template fica zerado. O middleware deve ser o último da lista
+para que nenhum outro fique entre ele e a view.
+"""
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.views.generic import TemplateView
+
+_LISTA_PARAMS = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+
+
+def impressao_digital(sql):
+    """Normaliza o SQL (os parâmetros já vêm separados) e colapsa listas IN."""
+    return _LISTA_PARAMS.sub("(%s, ...)", sql)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+class _Registro:
+    """Amostras recentes por rota em um anel limitado (deque com maxlen)."""
+
+    def __init__(self, por_rota):
+        self.por_rota = por_rota
+        self._lock = threading.Lock()
+        self._amostras = defaultdict(lambda: deque(maxlen=self.por_rota))
+        self._suspeitas = defaultdict(Counter)  # rota -> {fingerprint: ocorrências}
+
+    def registrar(self, rota, amostra, repetidas):
+        with self._lock:
+            self._amostras[rota].append(amostra)
+            suspeitas = self._suspeitas[rota]
+            for sql, vezes in repetidas:
+                suspeitas[sql] = max(suspeitas[sql], vezes)
+            # mantém só as piores para não crescer sem limite
+            if len(suspeitas) > 20:
+                self._suspeitas[rota] = Counter(dict(suspeitas.most_common(10)))
+
+    def resumo(self):
+        with self._lock:
+            copia = {rota: list(amostras) for rota, amostras in self._amostras.items()}
+            suspeitas = {rota: c.most_common(3) for rota, c in self._suspeitas.items()}
+        linhas = []
+        for rota, amostras in copia.items():
+            linha = {"rota": rota, "amostras": len(amostras), "suspeitas": suspeitas.get(rota, [])}
+            for metrica in ("queries", "db_ms", "view_ms", "template_ms", "total_ms"):
+                valores = [a[metrica] for a in amostras]
+                linha[metrica] = {
+                    "p50": percentil(valores, 50),
+                    "p95": percentil(valores, 95),
+                    "max": max(valores),
+                }
+            linhas.append(linha)
+        # piores rotas primeiro
+        return sorted(linhas, key=lambda l: l["total_ms"]["p95"], reverse=True)
+
+    def limpar(self):
+        with self._lock:
+            self._amostras.clear()
+            self._suspeitas.clear()
+
+
+registro = _Registro(getattr(settings, "PERF_AMOSTRAS_POR_ROTA", 200))
+
+
+class _ContadorSQL:
+    """execute_wrapper que mede tempo e conta impressões digitais."""
+
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.digitais = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.total += 1
+            self.digitais[impressao_digital(sql)] += 1
+
+
+class PerfMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_INSTRUMENTACAO", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limite_repeticoes = getattr(settings, "PERF_LIMITE_REPETICOES", 5)
+
+    def __call__(self, request):
+        contador = _ContadorSQL()
+        request._perf_template = 0.0
+        request._perf_view = None  # (início, fim) marcados pelos hooks
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(contador))
+            response = self.get_response(request)
+        fim = time.perf_counter()
+        total = fim - inicio
+
+        match = getattr(request, "resolver_match", None)
+        rota = match.view_name if match else None
+        if rota and rota != "perf_report":
+            template = request._perf_template
+            view = 0.0
+            if request._perf_view:
+                # sem TemplateResponse a view termina quando a resposta volta
+                inicio_view, fim_view = request._perf_view
+                view = (fim_view or fim) - inicio_view
+            repetidas = [
+                (sql, vezes) for sql, vezes in contador.digitais.items()
+                if vezes >= self.limite_repeticoes
+            ]
+            registro.registrar(rota, {
+                "queries": contador.total,
+                "db_ms": round(contador.segundos * 1000, 2),
+                "view_ms": round(view * 1000, 2),
+                "template_ms": round(template * 1000, 2),
+                "total_ms": round(total * 1000, 2),
+            }, repetidas)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf_view = (time.perf_counter(), None)
+
+    def process_template_response(self, request, response):
+        # a view acabou de devolver a resposta; o render acontece logo após
+        # este hook e o callback fecha a medição do template
+        inicio = time.perf_counter()
+        if request._perf_view:
+            request._perf_view = (request._perf_view[0], inicio)
+
+        def _fim(resp):
+            request._perf_template += time.perf_counter() - inicio
+
+        response.add_post_render_callback(_fim)
+        return response
+
+
+class PerfReportView(UserPassesTestMixin, TemplateView):
+    template_name = "perf/report.html"
+
+    def test_func(self):
+        return self.request.user.is_active and self.request.user.is_staff
+
+    def post(self, request, *args, **kwargs):
+        registro.limpar()
+        return self.get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["rotas"] = registro.resumo()
+        ctx["ativo"] = getattr(settings, "PERF_INSTRUMENTACAO", False)
+        ctx["limite_repeticoes"] = getattr(settings, "PERF_LIMITE_REPETICOES", 5)
+        return ctx
@@ -0,0 +1,60 @@
+# app/periodos.py
+"""
+Intervalos de datas locais convertidos em limites datetime [inicio, fim).
+
+Filtrar com `campo__gte=inicio, campo__lt=fim` mantém a coluna "nua" na
+cláusula WHERE, então o SQLite consegue usar índices sobre ela (o que
+não acontece com `campo__date=...`, que envolve a coluna em uma função).
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def _meia_noite(dia: date) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time.min), timezone.get_current_timezone())
+
+
+def intervalo_datas(primeiro: date, ultimo: date):
+    """Do início de `primeiro` até o fim de `ultimo` (inclusive), em hora local."""
+    return _meia_noite(primeiro), _meia_noite(ultimo + timedelta(days=1))
+
+
+def intervalo_dia(dia: date):
+    return intervalo_datas(dia, dia)
+
+
+def intervalo_semana(dia: date):
+    """Semana de segunda a domingo que contém `dia`."""
+    segunda = dia - timedelta(days=dia.weekday())
+    return intervalo_datas(segunda, segunda + timedelta(days=6))
+
+
+def intervalo_mes(dia: date):
+    primeiro = dia.replace(day=1)
+    proximo = (primeiro + timedelta(days=32)).replace(day=1)
+    return intervalo_datas(primeiro, proximo - timedelta(days=1))
+
+
+def filtrar_periodo(qs, campo, primeiro=None, ultimo=None):
+    """
+    Aplica `primeiro <= data_local(campo) <= ultimo` como intervalo meio aberto.
+    Aceita `date` ou string ISO; valores vazios ou inválidos são ignorados.
+    """
+    if isinstance(primeiro, str):
+        primeiro = _parse(primeiro)
+    if isinstance(ultimo, str):
+        ultimo = _parse(ultimo)
+    if primeiro:
+        qs = qs.filter(**{f"{campo}__gte": _meia_noite(primeiro)})
+    if ultimo:
+        qs = qs.filter(**{f"{campo}__lt": _meia_noite(ultimo + timedelta(days=1))})
+    return qs
+
+
+def _parse(valor):
+    try:
+        return parse_date(valor.strip())
+    except ValueError:
+        return None
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'tratamentos',
     'financeiro',
     'estoque',
+    'painel',
 ]
 
 MIDDLEWARE = [
@@ -54,8 +55,41 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.perf.PerfMiddleware',
 ]
 
+# Instrumentação de performance (app/perf.py): desligada por padrão.
+# Quando ligada, o relatório por rota fica em /_perf/ (apenas staff).
+PERF_INSTRUMENTACAO = False
+PERF_AMOSTRAS_POR_ROTA = 200
+PERF_LIMITE_REPETICOES = 5
+
+# Agenda (consultas/horarios.py): expediente considerado na busca de horários
+# livres e salas da clínica (vazio = salas que já aparecem nas consultas).
+AGENDA_EXPEDIENTE = ("08:00", "18:00")
+AGENDA_SALAS = []
+
+# Envio de lembretes (consultas/lembretes.py, manage.py dispatch_lembretes):
+# backend por canal e quantos envios simultâneos cada canal aceita.
+LEMBRETES_BACKENDS = {
+    "WA": "consultas.lembretes.LogBackend",
+    "SM": "consultas.lembretes.LogBackend",
+    "EM": "consultas.lembretes.EmailBackend",
+}
+LEMBRETES_CONCORRENCIA = {"WA": 20, "SM": 10, "EM": 10}
+# Lembretes criados por gerar_lembretes: (canal, horas antes da consulta)
+LEMBRETES_REGRAS = [("WA", 24), ("EM", 48)]
+
+# Orçamentos (tratamentos/orcamentos.py): desconto por faixa do valor bruto
+# (valor mínimo, %), teto do desconto somado ao extra e validade padrão.
+ORCAMENTO_FAIXAS_DESCONTO = [(5000, 5), (10000, 10)]
+ORCAMENTO_DESCONTO_MAXIMO = 20
+ORCAMENTO_VALIDADE_DIAS = 30
+
+# Catálogo de procedimentos (tratamentos/catalogo.py): segundos em que cada
+# processo confia na versão lida do cache antes de conferir de novo.
+CATALOGO_VERSAO_TTL = 5
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -86,6 +120,13 @@ DATABASES = {
     }
 }
 
+# Cache: sem CACHES aqui o Django usa o LocMemCache, que é por processo.
+# Em produção, com vários workers, configure um cache compartilhado
+# (Redis/Memcached) nas settings do deploy: os bitmaps da agenda
+# (consultas/horarios.py), os fragmentos do detalhe da consulta
+# (consultas/detalhe.py) e a versão do catálogo (tratamentos/catalogo.py)
+# são invalidados por quem grava e os outros workers precisam ver a troca.
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,15 +1,18 @@
 # app/urls.py
 from django.contrib import admin
 from django.urls import path, include
-from django.views.generic import TemplateView
+from .perf import PerfReportView
+from .views import HomeView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path("_perf/", PerfReportView.as_view(), name="perf_report"),
+    path('', HomeView.as_view(), name='home'),
     path("pacientes/", include("pacientes.urls")),
     path("consultas/", include("consultas.urls")),
     path("prontuario/", include("prontuario.urls")),
     path("tratamentos/", include("tratamentos.urls")),
     path("financeiro/", include("financeiro.urls")),
     path("estoque/", include("estoque.urls")),
+    path("painel/", include("painel.urls")),
 ]
@@ -1,8 +1,40 @@
 # consultas/admin.py
-from django.contrib import admin
+from datetime import timedelta
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from app.periodos import intervalo_dia, intervalo_semana, intervalo_mes
+from . import agenda, horarios, lembretes
 from .models import Consulta, Lembrete
 
 
+class PeriodoInicioFilter(admin.SimpleListFilter):
+    """Filtro de agenda por período local, sempre como intervalo [inicio, fim)."""
+    title = "Período"
+    parameter_name = "periodo"
+
+    def lookups(self, request, model_admin):
+        return (
+            ("hoje", "Hoje"),
+            ("amanha", "Amanhã"),
+            ("semana", "Esta semana"),
+            ("mes", "Este mês"),
+        )
+
+    def queryset(self, request, queryset):
+        hoje = timezone.localdate()
+        intervalos = {
+            "hoje": lambda: intervalo_dia(hoje),
+            "amanha": lambda: intervalo_dia(hoje + timedelta(days=1)),
+            "semana": lambda: intervalo_semana(hoje),
+            "mes": lambda: intervalo_mes(hoje),
+        }
+        if self.value() not in intervalos:
+            return queryset
+        inicio, fim = intervalos[self.value()]()
+        return queryset.filter(inicio__gte=inicio, inicio__lt=fim)
+
+
 class LembreteInline(admin.TabularInline):
     model = Lembrete
     extra = 0
@@ -22,7 +54,7 @@ class ConsultaAdmin(admin.ModelAdmin):
         "qtd_lembretes",
         "criado_em",
     )
-    list_filter = ("status", "sala", "inicio", "fim", "criado_em")
+    list_filter = ("status", "sala", PeriodoInicioFilter, "fim", "criado_em")
     search_fields = ("paciente__nome", "sala", "observacoes")
     ordering = ("-inicio",)
     date_hierarchy = "inicio"
@@ -44,10 +76,25 @@ class ConsultaAdmin(admin.ModelAdmin):
         "marcar_concluida",
         "marcar_cancelada",
         "marcar_faltou",
+        "gerar_lembretes",
     ]
 
     def _set_status(self, request, queryset, status):
-        updated = queryset.update(status=status)
+        try:
+            with transaction.atomic():
+                horarios.invalidar_consultas(queryset)
+                # ids antes do update: o filtro da listagem pode ser o próprio status
+                ids = list(queryset.values_list("pk", flat=True))
+                updated = queryset.update(status=status, atualizado_em=timezone.now())
+                lembretes.acompanhar_status(ids, status)
+        except IntegrityError as e:
+            if not agenda.erro_de_conflito(e):
+                raise
+            self.message_user(
+                request, "Nenhuma alteração: o novo status reativaria consultas em conflito de agenda.",
+                level=messages.ERROR,
+            )
+            return
         self.message_user(request, f"Status atualizado em {updated} consulta(s).")
 
     def marcar_agendada(self, request, queryset):
@@ -74,12 +121,18 @@ class ConsultaAdmin(admin.ModelAdmin):
         self._set_status(request, queryset, Consulta.Status.FALTOU)
     marcar_faltou.short_description = "Marcar como Faltou"
 
+    def gerar_lembretes(self, request, queryset):
+        criados = lembretes.gerar(queryset)
+        self.message_user(request, f"{criados} lembrete(s) criado(s).")
+    gerar_lembretes.short_description = "Gerar lembretes das consultas selecionadas"
+
 
 @admin.register(Lembrete)
 class LembreteAdmin(admin.ModelAdmin):
-    list_display = ("consulta", "canal", "status", "agendado_em", "enviado_em")
+    list_display = ("consulta", "canal", "status", "agendado_em", "enviado_em", "tentativas", "erro")
     list_filter = ("canal", "status", "agendado_em", "enviado_em")
     search_fields = ("consulta__paciente__nome",)
     ordering = ("-agendado_em",)
     autocomplete_fields = ("consulta",)
     list_select_related = ("consulta",)
+    readonly_fields = ("tentativas", "proxima_tentativa_em", "reservado_em", "erro")
@@ -0,0 +1,185 @@
+# consultas/agenda.py
+"""
+Detecção de conflitos de agenda (mesma sala ou mesmo paciente).
+
+Duas consultas conflitam quando os intervalos [inicio, fim) se sobrepõem e
+nenhuma delas está cancelada. Como nenhuma consulta dura mais que
+DURACAO_MAXIMA, a busca por sobreposição vira um intervalo limitado de
+`inicio` nos índices (sala, inicio, fim) e (paciente, inicio): uma única
+consulta ao banco por gravação.
+
+Três camadas usam a mesma regra:
+- `verificar` (Consulta.clean) dá a mensagem amigável no formulário;
+- os triggers (SQLite) barram a gravação mesmo com submissões
+  concorrentes; `instalar_triggers` roda no post_migrate (consultas.signals),
+  porque qualquer migração que reconstrói a tabela os apaga;
+- `conflitos_no_periodo` varre um período inteiro (ordenar e varrer).
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .models import Consulta
+
+DURACAO_MAXIMA = timedelta(hours=12)
+STATUS_LIVRES = (Consulta.Status.CANCELADA,)
+# marcador da mensagem de erro dos triggers (vira IntegrityError no Django)
+ERRO_TRIGGER = "conflito_agenda"
+
+
+# ---------
+# Guarda no banco (SQLite): triggers BEFORE INSERT/UPDATE
+# ---------
+# colunas que decidem conflito: o trigger de UPDATE só confere quando uma delas muda
+COLUNAS_AGENDA = ("inicio", "fim", "sala", "paciente_id", "status")
+
+
+def _sql_trigger(nome, evento, excluir_propria):
+    horas = int(DURACAO_MAXIMA.total_seconds() // 3600)
+    propria = "AND c.id != NEW.id" if excluir_propria else ""
+    quando = f"NEW.status != '{Consulta.Status.CANCELADA}'"
+    if excluir_propria:
+        # o save() do Django regrava todas as colunas, então "UPDATE OF" sempre
+        # dispara; editar só observações de uma consulta antiga sobreposta passa
+        mudou = " OR ".join(f"OLD.{coluna} IS NOT NEW.{coluna}" for coluna in COLUNAS_AGENDA)
+        quando += f" AND ({mudou})"
+    sobrepoe = (
+        f"c.inicio > datetime(NEW.inicio, '-{horas} hours') AND c.inicio < NEW.fim "
+        f"AND c.fim > NEW.inicio AND c.status != '{Consulta.Status.CANCELADA}' {propria}"
+    )
+    return f"""
+CREATE TRIGGER {nome} BEFORE {evento} ON consultas_consulta
+WHEN {quando}
+BEGIN
+    SELECT RAISE(ABORT, '{ERRO_TRIGGER}: sala ocupada no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.sala = NEW.sala AND {sobrepoe});
+    SELECT RAISE(ABORT, '{ERRO_TRIGGER}: paciente já tem consulta no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.paciente_id = NEW.paciente_id AND {sobrepoe});
+END
+"""
+
+
+TRIGGERS = {
+    "consultas_consulta_conflito_ins": _sql_trigger(
+        "consultas_consulta_conflito_ins", "INSERT", excluir_propria=False
+    ),
+    "consultas_consulta_conflito_upd": _sql_trigger(
+        "consultas_consulta_conflito_upd", f"UPDATE OF {', '.join(COLUNAS_AGENDA)}",
+        excluir_propria=True,
+    ),
+}
+
+
+def instalar_triggers(conn):
+    """(Re)cria os triggers: DROP IF EXISTS + CREATE, pode rodar sempre."""
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for nome, sql in TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            cursor.execute(sql)
+
+
+def triggers_instalados(conn):
+    """Nomes dos triggers de conflito presentes em sqlite_master."""
+    if conn.vendor != "sqlite":
+        return set()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'consultas_consulta'"
+        )
+        return {nome for (nome,) in cursor.fetchall()} & set(TRIGGERS)
+
+
+def sobrepostas(inicio, fim, sala=None, paciente_id=None, excluir_pk=None):
+    """Consultas ativas da sala e/ou do paciente que se sobrepõem a [inicio, fim)."""
+    alvo = Q()
+    if sala:
+        alvo |= Q(sala=sala)
+    if paciente_id:
+        alvo |= Q(paciente_id=paciente_id)
+    if not alvo:
+        return Consulta.objects.none()
+    qs = (
+        Consulta.objects.filter(alvo)
+        .filter(inicio__gt=inicio - DURACAO_MAXIMA, inicio__lt=fim, fim__gt=inicio)
+        .exclude(status__in=STATUS_LIVRES)
+    )
+    if excluir_pk:
+        qs = qs.exclude(pk=excluir_pk)
+    return qs
+
+
+def verificar(consulta):
+    """Levanta ValidationError se a consulta conflita com outra (uma consulta ao banco)."""
+    if consulta.status in STATUS_LIVRES or not (consulta.inicio and consulta.fim):
+        return
+    conflitos = list(
+        sobrepostas(
+            consulta.inicio, consulta.fim, sala=consulta.sala,
+            paciente_id=consulta.paciente_id, excluir_pk=consulta.pk,
+        )
+        .select_related("paciente")
+        .order_by("inicio")[:3]
+    )
+    erros = defaultdict(list)
+    for outra in conflitos:
+        horario = f"{outra.inicio:%d/%m/%Y %H:%M}–{outra.fim:%H:%M}"
+        if outra.sala == consulta.sala:
+            erros["sala"].append(f"{outra.sala} já está ocupada em {horario} ({outra.paciente.nome}).")
+        if outra.paciente_id == consulta.paciente_id:
+            erros["paciente"].append(f"O paciente já tem consulta em {horario} ({outra.sala}).")
+    if erros:
+        raise ValidationError(dict(erros))
+
+
+def erro_de_conflito(exc):
+    """True se o IntegrityError veio dos triggers de conflito de agenda."""
+    return ERRO_TRIGGER in str(exc)
+
+
+# ---------
+# Relatório: ordenar e varrer
+# ---------
+def _varrer(intervalos):
+    """
+    Pares sobrepostos em uma lista de (inicio, fim, pk) ordenada por inicio.
+    Mantém um heap dos intervalos ainda abertos, ordenado pelo fim.
+    """
+    abertos = []
+    for inicio, fim, pk in intervalos:
+        while abertos and abertos[0][0] <= inicio:
+            heapq.heappop(abertos)
+        for _, outro in abertos:
+            yield outro, pk
+        heapq.heappush(abertos, (fim, pk))
+
+
+def conflitos_no_periodo(inicio, fim, sala=None):
+    """
+    Todos os conflitos entre consultas ativas que tocam [inicio, fim).
+    Retorna [(tipo, chave, pk_a, pk_b)] com tipo "sala" ou "paciente".
+    """
+    qs = (
+        Consulta.objects.filter(inicio__gt=inicio - DURACAO_MAXIMA, inicio__lt=fim, fim__gt=inicio)
+        .exclude(status__in=STATUS_LIVRES)
+    )
+    if sala:
+        qs = qs.filter(sala=sala)
+    por_sala = defaultdict(list)
+    por_paciente = defaultdict(list)
+    for pk, s, paciente_id, ini, fi in qs.order_by("inicio", "id").values_list(
+        "id", "sala", "paciente_id", "inicio", "fim"
+    ):
+        por_sala[s].append((ini, fi, pk))
+        por_paciente[paciente_id].append((ini, fi, pk))
+
+    conflitos = []
+    for tipo, grupos in (("sala", por_sala), ("paciente", por_paciente)):
+        for chave, intervalos in grupos.items():
+            if len(intervalos) > 1:
+                conflitos.extend((tipo, chave, a, b) for a, b in _varrer(intervalos))
+    return conflitos
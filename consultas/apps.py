@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConsultasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'consultas'
+
+    def ready(self):
+        # invalidação do cache de horários livres por sala-dia e triggers de agenda
+        from . import signals  # noqa: F401
@@ -0,0 +1,76 @@
+# consultas/calendario.py
+"""
+Feed JSON da agenda para widgets de calendário.
+
+O payload é colunar (uma lista por campo) e sai direto de values_list, sem
+instanciar modelos. A ETag resume o período com uma consulta agregada
+(quantidade + maior atualizado_em das consultas e dos pacientes): clientes
+que fazem polling recebem 304 enquanto nada mudou no período.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.periodos import filtrar_periodo
+
+from .models import Consulta
+
+MAX_DIAS = 93
+CAMPOS = ("id", "inicio", "fim", "status", "paciente_id", "paciente__nome")
+
+
+def periodo(params):
+    """(primeiro, ultimo, sala) da querystring; padrão é a semana atual."""
+    primeiro = _data(params.get("start"))
+    ultimo = _data(params.get("end"))
+    if not primeiro:
+        hoje = timezone.localdate()
+        primeiro = hoje - timedelta(days=hoje.weekday())
+        ultimo = ultimo or primeiro + timedelta(days=6)
+    if not ultimo or ultimo < primeiro:
+        ultimo = primeiro
+    ultimo = min(ultimo, primeiro + timedelta(days=MAX_DIAS - 1))
+    return primeiro, ultimo, (params.get("sala") or "").strip()
+
+
+def _data(valor):
+    try:
+        return parse_date((valor or "").strip())
+    except ValueError:
+        return None
+
+
+def consultas(primeiro, ultimo, sala=""):
+    qs = filtrar_periodo(Consulta.objects.all(), "inicio", primeiro, ultimo)
+    if sala:
+        qs = qs.filter(sala=sala)
+    return qs
+
+
+def etag(primeiro, ultimo, sala=""):
+    resumo = consultas(primeiro, ultimo, sala).aggregate(
+        n=Count("id"), consulta=Max("atualizado_em"), paciente=Max("paciente__atualizado_em"),
+    )
+    # a contagem cobre exclusões, que não deixam marcador
+    bruto = f"{primeiro}|{ultimo}|{sala}|{resumo['n']}|{resumo['consulta']}|{resumo['paciente']}"
+    return hashlib.md5(bruto.encode(), usedforsecurity=False).hexdigest()
+
+
+def payload(primeiro, ultimo, sala=""):
+    linhas = consultas(primeiro, ultimo, sala).order_by("inicio", "id").values_list(*CAMPOS)
+    colunas = list(zip(*linhas)) or [()] * len(CAMPOS)
+    ids, inicios, fins, status, pacientes, nomes = colunas
+    return {
+        "start": primeiro.isoformat(),
+        "end": ultimo.isoformat(),
+        "sala": sala,
+        "ids": ids,
+        "inicio": [timezone.localtime(i).isoformat() for i in inicios],
+        "fim": [timezone.localtime(f).isoformat() for f in fins],
+        "status": status,
+        "paciente_id": pacientes,
+        "paciente_nome": nomes,
+    }
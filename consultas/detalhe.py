@@ -0,0 +1,81 @@
+# consultas/detalhe.py
+"""
+Seções da página de detalhe da consulta com cache de fragmentos.
+
+Cada lista (evoluções, anexos, receitas, procedimentos executados e
+lembretes) é renderizada uma vez e guardada no cache com a chave
+(consulta, versao, seção). Qualquer gravação nos filhos incrementa
+Consulta.versao (consultas.signals e as operações em massa de
+consultas.lembretes), então a chave antiga simplesmente deixa de ser lida.
+A seção de procedimentos mostra o nome do catálogo: a chave dela leva
+também a versão do catálogo (tratamentos.catalogo).
+Só as seções que faltam no cache são buscadas, com Prefetch e apenas as
+colunas que o template usa.
+"""
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from prontuario.models import Anexo, EvolucaoClinica, Receita
+from tratamentos import catalogo
+from tratamentos.models import ProcedimentoExecutado
+
+from .models import Lembrete
+
+TIMEOUT_CACHE = 24 * 3600
+
+SECOES = {
+    "evolucoes": Prefetch(
+        "evolucoes", queryset=EvolucaoClinica.objects.only("id", "consulta_id", "anotacao", "criado_em"),
+    ),
+    "anexos": Prefetch(
+        "anexos", queryset=Anexo.objects.only("id", "consulta_id", "caminho_arquivo", "tipo_arquivo", "criado_em"),
+    ),
+    "receitas": Prefetch(
+        "receitas", queryset=Receita.objects.only("id", "consulta_id", "texto", "criado_em"),
+    ),
+    "procedimentos_executados": Prefetch(
+        "procedimentos_executados",
+        queryset=ProcedimentoExecutado.objects.select_related("procedimento").only(
+            "id", "consulta_id", "dente", "superficie", "valor_unitario", "procedimento__nome",
+        ),
+    ),
+    "lembretes": Prefetch(
+        "lembretes", queryset=Lembrete.objects.only("id", "consulta_id", "canal", "agendado_em", "status"),
+    ),
+}
+
+
+# seções que mostram dados do catálogo (nome do procedimento): a chave leva
+# também a versão do catálogo, que não passa por Consulta.versao
+SECOES_COM_CATALOGO = {"procedimentos_executados"}
+
+
+def chave_cache(consulta, secao, versao_catalogo=None):
+    # criado_em distingue uma consulta recriada com o mesmo id (banco refeito)
+    chave = f"consulta:{consulta.pk}:{consulta.criado_em.timestamp():.0f}:v{consulta.versao}:{secao}"
+    if secao in SECOES_COM_CATALOGO:
+        chave += f":c{versao_catalogo or catalogo.versao()}"
+    return chave
+
+
+def secoes(consulta):
+    """{seção: html} lendo do cache e renderizando só o que faltar."""
+    versao_catalogo = catalogo.versao()
+    chaves = {chave_cache(consulta, secao, versao_catalogo): secao for secao in SECOES}
+    html = {chaves[chave]: valor for chave, valor in cache.get_many(list(chaves)).items()}
+    faltam = [secao for secao in SECOES if secao not in html]
+    if faltam:
+        prefetch_related_objects([consulta], *[SECOES[secao] for secao in faltam])
+        novos = {
+            secao: render_to_string(
+                f"consultas/detalhe/_{secao}.html", {"itens": getattr(consulta, secao).all()}
+            )
+            for secao in faltam
+        }
+        cache.set_many(
+            {chave_cache(consulta, secao, versao_catalogo): valor for secao, valor in novos.items()}, TIMEOUT_CACHE
+        )
+        html.update(novos)
+    return {secao: mark_safe(valor) for secao, valor in html.items()}
@@ -1,5 +1,10 @@
 # consultas/forms.py
+from datetime import timedelta
+
 from django import forms
+from pacientes.widgets import PacienteAutocomplete
+from tratamentos.forms import ProcedimentoCatalogoField
+from . import horarios
 from .models import Consulta, Lembrete
 
 class ConsultaForm(forms.ModelForm):
@@ -7,6 +12,7 @@ class ConsultaForm(forms.ModelForm):
         model = Consulta
         fields = ["paciente", "status", "inicio", "fim", "sala", "observacoes"]
         widgets = {
+            "paciente": PacienteAutocomplete(),
             "inicio": forms.DateTimeInput(attrs={"type": "datetime-local"}),
             "fim": forms.DateTimeInput(attrs={"type": "datetime-local"}),
         }
@@ -16,3 +22,24 @@ class LembreteForm(forms.ModelForm):
         model = Lembrete
         fields = ["consulta", "canal", "agendado_em", "status"]
         widgets = {"agendado_em": forms.DateTimeInput(attrs={"type": "datetime-local"})}
+
+class HorariosLivresForm(forms.Form):
+    """Parâmetros da busca de horários livres (GET)."""
+    start = forms.DateField()
+    end = forms.DateField(required=False)
+    sala = forms.CharField(max_length=30, required=False)
+    procedimento = ProcedimentoCatalogoField()
+    passo = forms.IntegerField(min_value=5, max_value=120, required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        start = cleaned.get("start")
+        if start:
+            end = cleaned.get("end") or start + timedelta(days=6)
+            if end < start:
+                raise forms.ValidationError("O fim do período deve ser igual ou posterior ao início.")
+            if (end - start).days >= horarios.MAX_DIAS:
+                raise forms.ValidationError(f"O período pode ter no máximo {horarios.MAX_DIAS} dias.")
+            cleaned["end"] = end
+        cleaned["passo"] = cleaned.get("passo") or horarios.PASSO_PADRAO
+        return cleaned
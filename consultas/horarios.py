@@ -0,0 +1,195 @@
+# consultas/horarios.py
+"""
+Busca de horários livres por sala.
+
+Cada (sala, dia local) vira um bitmap de minutos: um int de 1440 bits em que
+o bit m indica que o minuto m do dia está ocupado por uma consulta ativa.
+Os bitmaps ficam no cache do Django por sala-dia e são apagados pelos sinais
+de Consulta (consultas.signals) quando uma consulta daquela sala/dia muda,
+então um mês inteiro costuma sair do cache com um único get_many; os que
+faltam são montados com uma consulta ao índice (sala, inicio, fim).
+
+Achar os inícios em que cabe um procedimento de D minutos é aritmética de
+bits: dos minutos livres dentro do expediente, fica só quem tem D minutos
+livres seguidos (AND com o próprio bitmap deslocado, dobrando a janela).
+
+Com vários workers, o CACHES do deploy precisa ser compartilhado
+(Redis/Memcached) para que a invalidação feita por um valha para todos;
+o LocMemCache padrão é por processo (ver app/settings.py).
+"""
+from datetime import datetime, time, timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from app.periodos import intervalo_datas
+
+from .agenda import DURACAO_MAXIMA, STATUS_LIVRES
+from .models import Consulta
+
+MINUTOS_DIA = 24 * 60
+PASSO_PADRAO = 15
+MAX_DIAS = 62
+TIMEOUT_CACHE = 6 * 3600
+PREFIXO_CACHE = "agenda:ocupacao"
+CHAVE_SALAS = "agenda:salas"
+
+
+def chave_cache(sala, dia):
+    # quote: chaves de cache não podem ter espaços ("Sala 1")
+    return f"{PREFIXO_CACHE}:{dia.isoformat()}:{quote(sala)}"
+
+
+def _faixa(inicio, fim):
+    """Bits [inicio, fim) ligados."""
+    if fim <= inicio:
+        return 0
+    return ((1 << (fim - inicio)) - 1) << inicio
+
+
+def _minuto(hhmm):
+    h, m = (int(p) for p in hhmm.split(":"))
+    return h * 60 + m
+
+
+def expediente():
+    """(abertura, fechamento) em minutos do dia, de settings.AGENDA_EXPEDIENTE."""
+    abertura, fechamento = getattr(settings, "AGENDA_EXPEDIENTE", ("08:00", "18:00"))
+    return _minuto(abertura), _minuto(fechamento)
+
+
+def salas():
+    """Salas de settings.AGENDA_SALAS ou, se vazio, as que já aparecem nas consultas."""
+    configuradas = getattr(settings, "AGENDA_SALAS", None)
+    if configuradas:
+        return list(configuradas)
+    encontradas = cache.get(CHAVE_SALAS)
+    if encontradas is None:
+        encontradas = list(
+            Consulta.objects.order_by("sala").values_list("sala", flat=True).distinct()
+        )
+        cache.set(CHAVE_SALAS, encontradas, TIMEOUT_CACHE)
+    return encontradas
+
+
+# ---------
+# Bitmaps de ocupação (cache por sala-dia)
+# ---------
+def _montar(pares):
+    """Bitmaps dos pares (sala, dia) pedidos com uma consulta só."""
+    bitmaps = dict.fromkeys(pares, 0)
+    dias = [dia for _, dia in pares]
+    inicio, fim = intervalo_datas(min(dias), max(dias))
+    qs = (
+        Consulta.objects.filter(
+            sala__in={sala for sala, _ in pares},
+            inicio__gt=inicio - DURACAO_MAXIMA, inicio__lt=fim, fim__gt=inicio,
+        )
+        .exclude(status__in=STATUS_LIVRES)
+        .order_by()
+        .values_list("sala", "inicio", "fim")
+    )
+    for sala, ini, fi in qs:
+        ini, fi = timezone.localtime(ini), timezone.localtime(fi)
+        # arredonda o fim para cima: 10:00:30 ainda ocupa o minuto 10:00
+        final = fi.hour * 60 + fi.minute + (1 if fi.second or fi.microsecond else 0)
+        dia = ini.date()
+        while dia <= fi.date():
+            # consultas que passam da meia-noite marcam os dois dias
+            comeco = ini.hour * 60 + ini.minute if dia == ini.date() else 0
+            termino = final if dia == fi.date() else MINUTOS_DIA
+            if (sala, dia) in bitmaps:
+                bitmaps[(sala, dia)] |= _faixa(comeco, termino)
+            dia += timedelta(days=1)
+    return bitmaps
+
+
+def ocupacao(salas_, dias):
+    """{(sala, dia): bitmap} lendo do cache e montando só o que faltar."""
+    chaves = {chave_cache(sala, dia): (sala, dia) for sala in salas_ for dia in dias}
+    if not chaves:
+        return {}
+    achados = cache.get_many(list(chaves))
+    bitmaps = {chaves[chave]: valor for chave, valor in achados.items()}
+    faltam = [par for chave, par in chaves.items() if chave not in achados]
+    if faltam:
+        novos = _montar(faltam)
+        cache.set_many({chave_cache(*par): bitmap for par, bitmap in novos.items()}, TIMEOUT_CACHE)
+        bitmaps.update(novos)
+    return bitmaps
+
+
+def pares_afetados(sala, inicio, fim):
+    """Pares (sala, dia local) tocados pelo intervalo [inicio, fim)."""
+    if not (sala and inicio and fim):
+        return set()
+    primeiro = timezone.localtime(inicio).date()
+    ultimo = timezone.localtime(max(inicio, fim - timedelta(microseconds=1))).date()
+    return {(sala, primeiro + timedelta(days=n)) for n in range((ultimo - primeiro).days + 1)}
+
+
+def invalidar(pares, salas_mudaram=False):
+    """Apaga os bitmaps dos pares depois do commit (antes disso outro processo os remontaria velhos)."""
+    chaves = [chave_cache(*par) for par in pares]
+    if salas_mudaram:
+        chaves.append(CHAVE_SALAS)
+    if chaves:
+        transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def invalidar_consultas(queryset):
+    """Para updates em massa (que não disparam sinais): invalida as consultas do queryset."""
+    pares = set()
+    for sala, inicio, fim in queryset.order_by().values_list("sala", "inicio", "fim"):
+        pares |= pares_afetados(sala, inicio, fim)
+    invalidar(pares)
+
+
+# ---------
+# Busca
+# ---------
+def inicios_possiveis(ocupado, duracao, abertura, fechamento, desde=0):
+    """
+    Bitmap dos minutos em que começa um bloco de `duracao` minutos livres
+    dentro de [abertura, fechamento), a partir do minuto `desde`.
+    """
+    livres = _faixa(max(abertura, desde), fechamento) & ~ocupado
+    # bit t fica ligado se t, t+1, ..., t+janela-1 estão livres
+    janela = 1
+    while janela < duracao and livres:
+        passo = min(janela, duracao - janela)
+        livres &= livres >> passo
+        janela += passo
+    return livres
+
+
+def horarios_livres(primeiro, ultimo, duracao, sala=None, passo=PASSO_PADRAO, agora=None):
+    """
+    Inícios livres para um procedimento de `duracao` minutos em cada sala e
+    dia de [primeiro, ultimo], alinhados a `passo` minutos.
+    Retorna [(dia, sala, [datetime, ...])] só com os dias que têm vaga.
+    """
+    agora = timezone.localtime(agora or timezone.now())
+    abertura, fechamento = expediente()
+    alvo = [sala] if sala else salas()
+    dias = [primeiro + timedelta(days=n) for n in range((ultimo - primeiro).days + 1)]
+    dias = [dia for dia in dias if dia >= agora.date()]
+    bitmaps = ocupacao(alvo, dias)
+    fuso = timezone.get_current_timezone()
+
+    resultado = []
+    for dia in dias:
+        desde = agora.hour * 60 + agora.minute + 1 if dia == agora.date() else 0
+        meia_noite = timezone.make_aware(datetime.combine(dia, time.min), fuso)
+        for s in alvo:
+            possiveis = inicios_possiveis(bitmaps[(s, dia)], duracao, abertura, fechamento, desde)
+            if not possiveis:
+                continue
+            grade = range(-(-abertura // passo) * passo, fechamento, passo)
+            inicios = [meia_noite + timedelta(minutes=m) for m in grade if possiveis >> m & 1]
+            if inicios:
+                resultado.append((dia, s, inicios))
+    return resultado
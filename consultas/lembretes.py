@@ -0,0 +1,337 @@
+# consultas/lembretes.py
+"""
+Envio de lembretes (usado pelo comando dispatch_lembretes).
+
+Fila: lembretes AGENDADO vencidos, lidos pelo índice (status, agendado_em).
+Cada worker reserva um lote com uma transição atômica AGENDADO -> ENVIANDO
+(UPDATE condicional; em bancos com SELECT ... FOR UPDATE SKIP LOCKED os
+workers nem disputam as mesmas linhas), envia em paralelo respeitando o
+limite de concorrência de cada canal e grava o resultado do lote de uma vez:
+ENVIADO, ou de volta para AGENDADO com `proxima_tentativa_em` (backoff
+exponencial) até esgotar MAX_TENTATIVAS e virar FALHA. Reservas de um worker
+que morreu no meio voltam para a fila depois de TEMPO_RESERVA.
+
+Geração em massa (`gerar`, comando gerar_lembretes e ação do admin): um
+lembrete por regra de settings.LEMBRETES_REGRAS (canal, horas antes) para
+as consultas agendadas/confirmadas dos próximos dias, num único
+bulk_create; a restrição única (consulta, canal, agendado_em) faz uma nova
+execução não criar nada. Quando o início de uma consulta muda, os
+lembretes pendentes andam junto (`reagendar`, chamado pelos sinais).
+Consulta que deixa de estar agendada/confirmada tem os pendentes
+cancelados (`acompanhar_status`, pelos sinais e pela ação do admin); a
+fila também ignora lembretes de consultas nessa situação.
+
+Backends por canal em settings.LEMBRETES_BACKENDS (caminho de classe); cada
+um implementa `async def enviar(self, lembrete, mensagem)` e levanta
+FalhaEnvio (ou qualquer exceção) quando não consegue entregar.
+"""
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Consulta, Lembrete
+
+logger = logging.getLogger(__name__)
+
+MAX_TENTATIVAS = 5
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAXIMO = timedelta(hours=1)
+TEMPO_RESERVA = timedelta(minutes=10)
+CONCORRENCIA_PADRAO = 10
+REGRAS_PADRAO = (("WA", 24),)
+STATUS_COM_LEMBRETE = (Consulta.Status.AGENDADA, Consulta.Status.CONFIRMADA)
+
+
+class FalhaEnvio(Exception):
+    """O backend não conseguiu entregar o lembrete."""
+
+
+# ---------
+# Backends
+# ---------
+class LogBackend:
+    """Só registra a mensagem no log (desenvolvimento; canais sem provedor configurado)."""
+
+    async def enviar(self, lembrete, mensagem):
+        logger.info("Lembrete %s (%s) para %s: %s", lembrete.pk, lembrete.canal, destino(lembrete), mensagem)
+
+
+class EmailBackend:
+    """E-mail pelo backend de e-mail do Django (settings.EMAIL_*)."""
+
+    async def enviar(self, lembrete, mensagem):
+        email = lembrete.consulta.paciente.email
+        if not email:
+            raise FalhaEnvio("Paciente sem e-mail cadastrado.")
+        await sync_to_async(send_mail, thread_sensitive=False)(
+            "Lembrete de consulta", mensagem, None, [email],
+        )
+
+
+class FakeBackend:
+    """Backend local para teste de carga: latência e taxa de falha configuráveis."""
+
+    def __init__(self, latencia_ms=50, taxa_falha=0.0, seed=None):
+        self.latencia = latencia_ms / 1000
+        self.taxa_falha = taxa_falha
+        self.rng = random.Random(seed)
+        self.enviados = 0
+
+    async def enviar(self, lembrete, mensagem):
+        await asyncio.sleep(self.latencia * self.rng.uniform(0.5, 1.5))
+        if self.rng.random() < self.taxa_falha:
+            raise FalhaEnvio("falha simulada")
+        self.enviados += 1
+
+
+def carregar_backends():
+    """{canal: instância} a partir de settings.LEMBRETES_BACKENDS."""
+    configurados = getattr(settings, "LEMBRETES_BACKENDS", {})
+    return {
+        canal: import_string(configurados.get(canal, "consultas.lembretes.LogBackend"))()
+        for canal in Lembrete.Canal.values
+    }
+
+
+def limites_concorrencia():
+    configurados = getattr(settings, "LEMBRETES_CONCORRENCIA", {})
+    return {canal: configurados.get(canal, CONCORRENCIA_PADRAO) for canal in Lembrete.Canal.values}
+
+
+# ---------
+# Mensagem
+# ---------
+def destino(lembrete):
+    paciente = lembrete.consulta.paciente
+    return paciente.email if lembrete.canal == Lembrete.Canal.EMAIL else paciente.telefone
+
+
+def mensagem(lembrete):
+    consulta = lembrete.consulta
+    inicio = timezone.localtime(consulta.inicio)
+    primeiro_nome = consulta.paciente.nome.split()[0] if consulta.paciente.nome else ""
+    return (
+        f"Olá, {primeiro_nome}! Lembrete da sua consulta em {inicio:%d/%m/%Y} "
+        f"às {inicio:%H:%M} ({consulta.sala})."
+    )
+
+
+# ---------
+# Geração e reagendamento
+# ---------
+def regras():
+    """[(canal, antecedência)] de settings.LEMBRETES_REGRAS (horas antes da consulta)."""
+    return [
+        (canal, timedelta(hours=horas))
+        for canal, horas in getattr(settings, "LEMBRETES_REGRAS", REGRAS_PADRAO)
+    ]
+
+
+def gerar(consultas=None, dias=7, agora=None):
+    """
+    Cria os lembretes que faltam para as consultas agendadas/confirmadas que
+    começam nos próximos `dias` (ou no queryset `consultas`, se informado).
+    Lembretes cujo horário já passou não são criados. Retorna quantos criou.
+    """
+    agora = agora or timezone.now()
+    if consultas is None:
+        consultas = Consulta.objects.filter(inicio__gte=agora, inicio__lt=agora + timedelta(days=dias))
+    alvo = consultas.filter(status__in=STATUS_COM_LEMBRETE).order_by()
+    existentes = set(
+        Lembrete.objects.filter(consulta__in=alvo.values("id"))
+        .values_list("consulta_id", "canal", "agendado_em")
+    )
+    novos = [
+        Lembrete(consulta_id=pk, canal=canal, agendado_em=inicio - antecedencia)
+        for pk, inicio in alvo.values_list("id", "inicio").iterator()
+        for canal, antecedencia in regras()
+        if inicio - antecedencia > agora and (pk, canal, inicio - antecedencia) not in existentes
+    ]
+    # ignore_conflicts cobre outra execução em paralelo (restrição única)
+    with transaction.atomic():
+        Lembrete.objects.bulk_create(novos, batch_size=500, ignore_conflicts=True)
+        Consulta.incrementar_versao({lembrete.consulta_id for lembrete in novos})
+    return len(novos)
+
+
+def reagendar(consulta_id, deslocamento):
+    """Move os lembretes ainda pendentes da consulta pelo mesmo deslocamento do início."""
+    pendentes_ = Lembrete.objects.filter(consulta_id=consulta_id, status=Lembrete.Status.AGENDADO)
+    Consulta.incrementar_versao([consulta_id])
+    try:
+        with transaction.atomic():
+            return pendentes_.update(agendado_em=F("agendado_em") + deslocamento, proxima_tentativa_em=None)
+    except IntegrityError:
+        # a restrição única é checada linha a linha: se um lembrete cai no
+        # horário antigo de outro do mesmo canal, move na ordem que não colide
+        ordem = "-agendado_em" if deslocamento > timedelta(0) else "agendado_em"
+        with transaction.atomic():
+            linhas = list(pendentes_.order_by(ordem))
+            for lembrete in linhas:
+                lembrete.agendado_em += deslocamento
+                lembrete.proxima_tentativa_em = None
+                lembrete.save(update_fields=["agendado_em", "proxima_tentativa_em"])
+        return len(linhas)
+
+
+def acompanhar_status(consultas, status, agora=None):
+    """
+    Cancela os lembretes pendentes das consultas (ids ou queryset) quando o
+    novo status não tem lembrete (cancelada, faltou...); se voltarem a
+    agendada/confirmada, reativa os cancelados que ainda não venceram.
+    """
+    agora = agora or timezone.now()
+    if status in STATUS_COM_LEMBRETE:
+        alvo = Lembrete.objects.filter(
+            consulta_id__in=consultas, status=Lembrete.Status.CANCELADO, agendado_em__gt=agora,
+        )
+        novo = Lembrete.Status.AGENDADO
+    else:
+        alvo = Lembrete.objects.filter(consulta_id__in=consultas, status=Lembrete.Status.AGENDADO)
+        novo = Lembrete.Status.CANCELADO
+    with transaction.atomic():
+        afetadas = set(alvo.values_list("consulta_id", flat=True))
+        if not afetadas:
+            return 0
+        Consulta.incrementar_versao(afetadas)
+        return alvo.update(status=novo, proxima_tentativa_em=None)
+
+
+# ---------
+# Fila (síncrono; o worker chama via sync_to_async)
+# ---------
+def pendentes(agora):
+    # a consulta pode ter sido cancelada por um caminho que não passou pelos
+    # sinais (update em massa): o status dela é conferido na própria fila
+    return Lembrete.objects.filter(
+        status=Lembrete.Status.AGENDADO, agendado_em__lte=agora, consulta__status__in=STATUS_COM_LEMBRETE,
+    ).filter(
+        Q(proxima_tentativa_em__isnull=True) | Q(proxima_tentativa_em__lte=agora)
+    )
+
+
+def liberar_expirados(agora=None):
+    """Devolve à fila reservas antigas (worker interrompido no meio do envio)."""
+    agora = agora or timezone.now()
+    expirados = Lembrete.objects.filter(status=Lembrete.Status.ENVIANDO, reservado_em__lt=agora - TEMPO_RESERVA)
+    with transaction.atomic():
+        consultas = set(expirados.values_list("consulta_id", flat=True))
+        if not consultas:
+            return 0
+        Consulta.incrementar_versao(consultas)
+        return expirados.update(status=Lembrete.Status.AGENDADO, reservado_em=None)
+
+
+def reservar(tamanho, agora=None):
+    """Reserva até `tamanho` lembretes vencidos (AGENDADO -> ENVIANDO) e os retorna."""
+    agora = agora or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            pendentes(agora).select_for_update(skip_locked=True)
+            .order_by("agendado_em").values_list("id", flat=True)[:tamanho]
+        )
+        if not ids:
+            return []
+        # condicional no status: só fica com o lote quem fez a transição
+        Lembrete.objects.filter(id__in=ids, status=Lembrete.Status.AGENDADO).update(
+            status=Lembrete.Status.ENVIANDO, reservado_em=agora,
+        )
+        # o status aparece no detalhe da consulta (consultas.detalhe)
+        Consulta.incrementar_versao(Lembrete.objects.filter(id__in=ids).values("consulta_id"))
+    return list(
+        Lembrete.objects.filter(id__in=ids, status=Lembrete.Status.ENVIANDO, reservado_em=agora)
+        .select_related("consulta__paciente")
+        .only(
+            "id", "canal", "tentativas", "consulta_id", "consulta__inicio", "consulta__sala",
+            "consulta__paciente__nome", "consulta__paciente__telefone", "consulta__paciente__email",
+        )
+    )
+
+
+def backoff(tentativas):
+    """Espera antes da tentativa seguinte: base * 2^(n-1), com teto e jitter."""
+    espera = min(BACKOFF_BASE * 2 ** (tentativas - 1), BACKOFF_MAXIMO)
+    return espera * random.uniform(0.8, 1.2)
+
+
+def registrar(resultados, agora=None):
+    """
+    Grava o resultado de um lote: [(lembrete, erro_ou_None)].
+    Um UPDATE para os enviados e um por (tentativas, erro) para as falhas.
+    """
+    agora = agora or timezone.now()
+    enviados = [lembrete.pk for lembrete, erro in resultados if erro is None]
+    falhas = defaultdict(list)
+    for lembrete, erro in resultados:
+        if erro is not None:
+            falhas[(lembrete.tentativas + 1, erro[:255])].append(lembrete.pk)
+
+    with transaction.atomic():
+        Consulta.incrementar_versao({lembrete.consulta_id for lembrete, _ in resultados})
+        if enviados:
+            Lembrete.objects.filter(id__in=enviados, status=Lembrete.Status.ENVIANDO).update(
+                status=Lembrete.Status.ENVIADO, enviado_em=agora, tentativas=F("tentativas") + 1,
+                reservado_em=None, proxima_tentativa_em=None, erro="",
+            )
+        for (tentativas, erro), ids in falhas.items():
+            esgotou = tentativas >= MAX_TENTATIVAS
+            Lembrete.objects.filter(id__in=ids, status=Lembrete.Status.ENVIANDO).update(
+                status=Lembrete.Status.FALHA if esgotou else Lembrete.Status.AGENDADO,
+                tentativas=tentativas, reservado_em=None, erro=erro,
+                proxima_tentativa_em=None if esgotou else agora + backoff(tentativas),
+            )
+    return len(enviados), sum(len(ids) for ids in falhas.values())
+
+
+# ---------
+# Worker assíncrono
+# ---------
+class Dispatcher:
+    """Reserva lotes e envia em paralelo, com um semáforo por canal."""
+
+    def __init__(self, backends, limites, tamanho_lote=200, intervalo=5.0):
+        self.backends = backends
+        self.semaforos = {canal: asyncio.Semaphore(limite) for canal, limite in limites.items()}
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.enviados = self.falhas = 0
+
+    async def _enviar(self, lembrete):
+        async with self.semaforos[lembrete.canal]:
+            try:
+                await self.backends[lembrete.canal].enviar(lembrete, mensagem(lembrete))
+            except Exception as e:  # qualquer erro do backend conta como tentativa falha
+                return lembrete, str(e) or e.__class__.__name__
+        return lembrete, None
+
+    async def processar_lote(self):
+        """Reserva, envia e registra um lote; retorna quantos lembretes havia nele."""
+        lote = await sync_to_async(reservar)(self.tamanho_lote)
+        if not lote:
+            return 0
+        resultados = await asyncio.gather(*(self._enviar(lembrete) for lembrete in lote))
+        enviados, falhas = await sync_to_async(registrar)(resultados)
+        self.enviados += enviados
+        self.falhas += falhas
+        return len(lote)
+
+    async def executar(self, ate_esvaziar=False):
+        await sync_to_async(liberar_expirados)()
+        while True:
+            processados = await self.processar_lote()
+            if processados:
+                continue
+            if ate_esvaziar:
+                return
+            await asyncio.sleep(self.intervalo)
+            await sync_to_async(liberar_expirados)()
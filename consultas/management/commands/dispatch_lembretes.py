@@ -0,0 +1,45 @@
+# consultas/management/commands/dispatch_lembretes.py
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from consultas import lembretes
+
+
+class Command(BaseCommand):
+    help = "Worker que envia os lembretes vencidos (WhatsApp, SMS e e-mail) em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=200, help="Lembretes reservados por lote (padrão: 200).")
+        parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos de espera com a fila vazia (padrão: 5).")
+        parser.add_argument("--once", action="store_true", help="Esvazia a fila atual e termina.")
+        parser.add_argument(
+            "--fake", action="store_true",
+            help="Usa o backend falso em todos os canais (teste de carga; nada é enviado de verdade).",
+        )
+        parser.add_argument("--latencia-ms", type=int, default=50, help="Latência do backend falso (padrão: 50 ms).")
+        parser.add_argument("--taxa-falha", type=float, default=0.0, help="Fração de falhas do backend falso (0 a 1).")
+
+    def handle(self, *args, **options):
+        if options["fake"]:
+            fake = lembretes.FakeBackend(options["latencia_ms"], options["taxa_falha"])
+            backends = {canal: fake for canal in lembretes.Lembrete.Canal.values}
+        else:
+            backends = lembretes.carregar_backends()
+        dispatcher = lembretes.Dispatcher(
+            backends, lembretes.limites_concorrencia(),
+            tamanho_lote=options["lote"], intervalo=options["intervalo"],
+        )
+
+        inicio = time.perf_counter()
+        try:
+            asyncio.run(dispatcher.executar(ate_esvaziar=options["once"]))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Interrompido."))
+        decorrido = time.perf_counter() - inicio
+        por_minuto = (dispatcher.enviados + dispatcher.falhas) / decorrido * 60 if decorrido else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{dispatcher.enviados} enviado(s), {dispatcher.falhas} falha(s) em {decorrido:.1f}s "
+            f"({por_minuto:.0f}/min)."
+        ))
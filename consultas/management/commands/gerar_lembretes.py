@@ -0,0 +1,18 @@
+# consultas/management/commands/gerar_lembretes.py
+from django.core.management.base import BaseCommand
+
+from consultas import lembretes
+
+
+class Command(BaseCommand):
+    help = "Cria os lembretes (LEMBRETES_REGRAS) das consultas agendadas/confirmadas dos próximos dias."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=7, help="Janela de consultas a partir de agora (padrão: 7).")
+
+    def handle(self, *args, **options):
+        criados = lembretes.gerar(dias=options["dias"])
+        if criados:
+            self.stdout.write(self.style.SUCCESS(f"{criados} lembrete(s) criado(s)."))
+        else:
+            self.stdout.write("Nenhum lembrete novo: todos já existem.")
@@ -0,0 +1,40 @@
+# consultas/management/commands/report_conflitos_agenda.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.periodos import intervalo_datas
+from consultas import agenda
+
+
+class Command(BaseCommand):
+    help = "Lista consultas sobrepostas (mesma sala ou mesmo paciente) em um período."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="Primeiro dia (AAAA-MM-DD; padrão: hoje).")
+        parser.add_argument("--end", help="Último dia (AAAA-MM-DD; padrão: start + 30 dias).")
+        parser.add_argument("--sala", help="Restringe a uma sala.")
+
+    def handle(self, *args, **options):
+        primeiro = self._data(options["start"]) or timezone.localdate()
+        ultimo = self._data(options["end"]) or primeiro + timedelta(days=30)
+        if ultimo < primeiro:
+            raise CommandError("--end deve ser igual ou posterior a --start.")
+        inicio, fim = intervalo_datas(primeiro, ultimo)
+        conflitos = agenda.conflitos_no_periodo(inicio, fim, sala=options["sala"])
+        for tipo, chave, a, b in conflitos:
+            self.stdout.write(f"{tipo} {chave}: consultas #{a} e #{b}")
+        estilo = self.style.WARNING if conflitos else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f"{len(conflitos)} conflito(s) entre {primeiro:%d/%m/%Y} e {ultimo:%d/%m/%Y}."
+        ))
+
+    def _data(self, valor):
+        if not valor:
+            return None
+        dia = parse_date(valor)
+        if not dia:
+            raise CommandError(f"Data inválida: {valor} (use AAAA-MM-DD).")
+        return dia
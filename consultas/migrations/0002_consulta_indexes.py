@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0001_initial'),
+        ('pacientes', '0002_paciente_deleted_at_paciente_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['inicio', 'status'], name='consulta_inicio_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['paciente', 'inicio'], name='consulta_paciente_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Índice (sala, inicio, fim) e triggers que barram conflitos de agenda
+# (apenas SQLite; em outros bancos os triggers são um no-op)
+#
+# O SQL fica copiado aqui (e não importado de consultas.agenda) para que a
+# migração continue criando exatamente estes triggers mesmo que a regra mude.
+# Migrações que reconstroem consultas_consulta no SQLite (AddField etc.)
+# derrubam os triggers e chamam `instalar` de novo; o post_migrate de
+# consultas.signals reinstala a versão atual de consultas.agenda.
+
+from django.db import migrations, models
+
+_SOBREPOE = (
+    "c.inicio > datetime(NEW.inicio, '-12 hours') AND c.inicio < NEW.fim "
+    "AND c.fim > NEW.inicio AND c.status != 'CA'"
+)
+
+TRIGGERS = {
+    "consultas_consulta_conflito_ins": f"""
+CREATE TRIGGER consultas_consulta_conflito_ins BEFORE INSERT ON consultas_consulta
+WHEN NEW.status != 'CA'
+BEGIN
+    SELECT RAISE(ABORT, 'conflito_agenda: sala ocupada no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.sala = NEW.sala AND {_SOBREPOE} );
+    SELECT RAISE(ABORT, 'conflito_agenda: paciente já tem consulta no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.paciente_id = NEW.paciente_id AND {_SOBREPOE} );
+END
+""",
+    "consultas_consulta_conflito_upd": f"""
+CREATE TRIGGER consultas_consulta_conflito_upd BEFORE UPDATE OF inicio, fim, sala, paciente_id, status ON consultas_consulta
+WHEN NEW.status != 'CA'
+BEGIN
+    SELECT RAISE(ABORT, 'conflito_agenda: sala ocupada no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.sala = NEW.sala AND {_SOBREPOE} AND c.id != NEW.id);
+    SELECT RAISE(ABORT, 'conflito_agenda: paciente já tem consulta no horário')
+    WHERE EXISTS (SELECT 1 FROM consultas_consulta c WHERE c.paciente_id = NEW.paciente_id AND {_SOBREPOE} AND c.id != NEW.id);
+END
+""",
+}
+
+
+def instalar(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for nome, sql in TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            cursor.execute(sql)
+
+
+def remover(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for nome in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0002_consulta_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['sala', 'inicio', 'fim'], name='consulta_sala_inicio_fim_idx'),
+        ),
+        migrations.RunPython(instalar, remover),
+    ]
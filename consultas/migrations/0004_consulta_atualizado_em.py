@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:22
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_atualizado_em(apps, schema_editor):
+    # sem histórico de alterações: a criação é o melhor marcador disponível
+    Consulta = apps.get_model("consultas", "Consulta")
+    Consulta.objects.update(atualizado_em=F("criado_em"))
+
+
+# o AddField reconstrói consultas_consulta no SQLite e apaga os triggers
+# de conflito de agenda criados na 0003
+_conflitos = import_module("consultas.migrations.0003_consulta_sala_conflitos")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0003_consulta_sala_conflitos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consulta',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(preencher_atualizado_em, migrations.RunPython.noop),
+        migrations.RunPython(_conflitos.instalar, migrations.RunPython.noop),
+    ]
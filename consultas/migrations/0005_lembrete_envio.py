@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0004_consulta_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lembrete',
+            name='erro',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lembrete',
+            name='proxima_tentativa_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lembrete',
+            name='reservado_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lembrete',
+            name='tentativas',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='lembrete',
+            name='status',
+            field=models.CharField(choices=[('AG', 'Agendado'), ('EV', 'Enviando'), ('EN', 'Enviado'), ('FA', 'Falha')], default='AG', max_length=2),
+        ),
+        migrations.AddIndex(
+            model_name='lembrete',
+            index=models.Index(fields=['status', 'agendado_em'], name='lembrete_status_agendado_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remover_duplicados(apps, schema_editor):
+    # mantém o lembrete mais antigo de cada (consulta, canal, agendado_em)
+    Lembrete = apps.get_model("consultas", "Lembrete")
+    grupos = (
+        Lembrete.objects.values("consulta", "canal", "agendado_em")
+        .annotate(primeiro=Min("id"))
+        .values("primeiro")
+    )
+    Lembrete.objects.exclude(id__in=grupos).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0005_lembrete_envio'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lembrete',
+            constraint=models.UniqueConstraint(fields=('consulta', 'canal', 'agendado_em'), name='lembrete_consulta_canal_horario_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+# o AddField reconstrói consultas_consulta no SQLite e apaga os triggers
+# de conflito de agenda criados na 0003
+_conflitos = import_module("consultas.migrations.0003_consulta_sala_conflitos")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0006_lembrete_unico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consulta',
+            name='versao',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(_conflitos.instalar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+def cancelar_pendentes(apps, schema_editor):
+    # lembretes ainda na fila de consultas que já não estão agendadas/confirmadas
+    Lembrete = apps.get_model("consultas", "Lembrete")
+    Lembrete.objects.filter(status="AG").exclude(consulta__status__in=["AG", "CF"]).update(status="CA")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0007_consulta_versao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lembrete',
+            name='status',
+            field=models.CharField(choices=[('AG', 'Agendado'), ('EV', 'Enviando'), ('EN', 'Enviado'), ('FA', 'Falha'), ('CA', 'Cancelado')], default='AG', max_length=2),
+        ),
+        migrations.RunPython(cancelar_pendentes, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
 from pacientes.models import Paciente
 
 class Consulta(models.Model):
@@ -22,15 +24,54 @@ class Consulta(models.Model):
     sala = models.CharField(max_length=30)
     observacoes = models.TextField(blank=True)
     criado_em = models.DateTimeField(auto_now_add=True)
+    # marcador de modificação (ETag do feed da agenda em consultas.calendario)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    # incrementada a cada gravação nos filhos (evoluções, anexos, receitas,
+    # procedimentos, lembretes): chave do cache de fragmentos do detalhe
+    versao = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['inicio']
         verbose_name = "Consulta"
         verbose_name_plural = "Consultas"
+        indexes = [
+            # agenda por dia/período (com ou sem filtro de status)
+            models.Index(fields=["inicio", "status"], name="consulta_inicio_status_idx"),
+            # histórico de um paciente em ordem cronológica
+            models.Index(fields=["paciente", "inicio"], name="consulta_paciente_inicio_idx"),
+            # conflitos de agenda por sala (consultas.agenda)
+            models.Index(fields=["sala", "inicio", "fim"], name="consulta_sala_inicio_fim_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_status_display()} - {self.paciente.nome} ({self.inicio:%d/%m/%Y %H:%M})"
 
+    def clean(self):
+        from . import agenda
+
+        if self.inicio and self.fim:
+            if self.fim <= self.inicio:
+                raise ValidationError({"fim": "O fim deve ser posterior ao início."})
+            if self.fim - self.inicio > agenda.DURACAO_MAXIMA:
+                horas = int(agenda.DURACAO_MAXIMA.total_seconds() // 3600)
+                raise ValidationError({"fim": f"A consulta não pode durar mais de {horas} horas."})
+        agenda.verificar(self)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # versao só muda por incrementar_versao: nunca regravar o valor
+            # carregado em memória; auto_now só é gravado se estiver na lista
+            campos = kwargs.get("update_fields")
+            if campos is None:
+                campos = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs["update_fields"] = {*campos, "atualizado_em"} - {"versao"}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def incrementar_versao(ids):
+        """Invalida os fragmentos em cache do detalhe (consultas.detalhe) dessas consultas."""
+        Consulta.objects.filter(pk__in=ids).update(versao=F("versao") + 1)
+
 class Lembrete(models.Model):
     class Canal(models.TextChoices):
         WHATSAPP = "WA", "WhatsApp"
@@ -39,19 +80,34 @@ class Lembrete(models.Model):
 
     class Status(models.TextChoices):
         AGENDADO = "AG", "Agendado"
+        ENVIANDO = "EV", "Enviando"
         ENVIADO = "EN", "Enviado"
         FALHA = "FA", "Falha"
+        CANCELADO = "CA", "Cancelado"
 
     consulta = models.ForeignKey(Consulta, on_delete=models.CASCADE, related_name="lembretes")
     canal = models.CharField(max_length=2, choices=Canal.choices)
     agendado_em = models.DateTimeField()
     enviado_em = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=2, choices=Status.choices, default=Status.AGENDADO)
+    # controle do envio (consultas.lembretes / dispatch_lembretes)
+    tentativas = models.PositiveSmallIntegerField(default=0, editable=False)
+    proxima_tentativa_em = models.DateTimeField(null=True, blank=True, editable=False)
+    reservado_em = models.DateTimeField(null=True, blank=True, editable=False)
+    erro = models.CharField(max_length=255, blank=True, editable=False)
 
     class Meta:
         ordering = ["-agendado_em"]
         verbose_name = "Lembrete"
         verbose_name_plural = "Lembretes"
+        constraints = [
+            # geração em massa idempotente (consultas.lembretes.gerar)
+            models.UniqueConstraint(fields=["consulta", "canal", "agendado_em"], name="lembrete_consulta_canal_horario_uniq"),
+        ]
+        indexes = [
+            # fila do dispatcher: pendentes em ordem de vencimento
+            models.Index(fields=["status", "agendado_em"], name="lembrete_status_agendado_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.get_canal_display()} - {self.get_status_display()} ({self.agendado_em:%d/%m/%Y %H:%M})"
\ No newline at end of file
+        return f"{self.get_canal_display()} - {self.get_status_display()} ({self.agendado_em:%d/%m/%Y %H:%M})"
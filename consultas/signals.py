@@ -0,0 +1,87 @@
+# consultas/signals.py
+"""
+Efeitos de gravar/excluir uma consulta: invalida os bitmaps de ocupação
+(consultas.horarios), move os lembretes pendentes quando o início muda e
+os cancela/reativa quando o status muda.
+Gravações nos filhos incrementam Consulta.versao (cache do detalhe).
+Depois de cada migrate, os triggers de conflito de agenda são reinstalados.
+"""
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+
+from prontuario.models import Anexo, EvolucaoClinica, Receita
+from tratamentos.models import ProcedimentoExecutado
+
+from . import agenda, horarios, lembretes
+from .models import Consulta, Lembrete
+
+
+def _capturar_anterior(sender, instance, **kwargs):
+    instance._agenda_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._agenda_anterior = (
+            Consulta.objects.filter(pk=instance.pk).values_list("sala", "inicio", "fim", "status").first()
+        )
+
+
+def _apos_salvar(sender, instance, created, **kwargs):
+    pares = horarios.pares_afetados(instance.sala, instance.inicio, instance.fim)
+    anterior = getattr(instance, "_agenda_anterior", None)
+    if anterior:
+        pares |= horarios.pares_afetados(*anterior[:3])
+    horarios.invalidar(pares, salas_mudaram=created or (anterior and anterior[0] != instance.sala))
+    if anterior and anterior[1] != instance.inicio:
+        lembretes.reagendar(instance.pk, instance.inicio - anterior[1])
+    if anterior and anterior[3] != instance.status:
+        lembretes.acompanhar_status([instance.pk], instance.status)
+
+
+def _apos_excluir(sender, instance, **kwargs):
+    horarios.invalidar(horarios.pares_afetados(instance.sala, instance.inicio, instance.fim), salas_mudaram=True)
+
+
+pre_save.connect(_capturar_anterior, sender=Consulta, dispatch_uid="consultas_agenda_pre")
+post_save.connect(_apos_salvar, sender=Consulta, dispatch_uid="consultas_agenda_post")
+post_delete.connect(_apos_excluir, sender=Consulta, dispatch_uid="consultas_agenda_del")
+
+
+# ---------
+# Versão do detalhe: qualquer gravação em um filho da consulta
+# ---------
+FILHOS = (EvolucaoClinica, Anexo, Receita, ProcedimentoExecutado, Lembrete)
+
+
+def _capturar_consulta_anterior(sender, instance, **kwargs):
+    instance._consulta_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._consulta_anterior = (
+            sender.objects.filter(pk=instance.pk).values_list("consulta_id", flat=True).first()
+        )
+
+
+def _incrementar_versao(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ids = {instance.consulta_id, getattr(instance, "_consulta_anterior", None)} - {None}
+    Consulta.incrementar_versao(ids)
+
+
+for _model in FILHOS:
+    pre_save.connect(_capturar_consulta_anterior, sender=_model, dispatch_uid=f"consultas_versao_pre_{_model.__name__}")
+    post_save.connect(_incrementar_versao, sender=_model, dispatch_uid=f"consultas_versao_post_{_model.__name__}")
+    post_delete.connect(_incrementar_versao, sender=_model, dispatch_uid=f"consultas_versao_del_{_model.__name__}")
+
+
+# ---------
+# Triggers de conflito de agenda: migrações que reconstroem
+# consultas_consulta no SQLite (AddField, AlterField...) os apagam
+# ---------
+def _instalar_triggers(sender, using, **kwargs):
+    if sender.name != "consultas":
+        return
+    conn = connections[using]
+    if "consultas_consulta" in conn.introspection.table_names():
+        agenda.instalar_triggers(conn)
+
+
+post_migrate.connect(_instalar_triggers, dispatch_uid="consultas_agenda_triggers")
@@ -0,0 +1,202 @@
+# consultas/tests.py
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from pacientes.models import Paciente
+from tratamentos.models import CatalogoProcedimento, ProcedimentoExecutado
+
+from app.periodos import intervalo_dia
+
+from . import agenda, detalhe, lembretes
+from .models import Consulta, Lembrete
+
+
+def criar_paciente(nome="Ana Souza", cpf="111.222.333-44"):
+    return Paciente.objects.create(
+        nome=nome, cpf=cpf, data_nascimento=date(1990, 1, 1), telefone="(11) 91234-5678",
+    )
+
+
+def criar_consulta(paciente, inicio, minutos=30, sala="1", **kwargs):
+    return Consulta.objects.create(
+        paciente=paciente, inicio=inicio, fim=inicio + timedelta(minutes=minutos), sala=sala, **kwargs
+    )
+
+
+class MigracoesTriggersTests(TransactionTestCase):
+    """Sem o post_migrate: as próprias migrações que reconstroem a tabela recriam os triggers."""
+
+    def migrar(self, alvo):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("consultas", alvo)])
+
+    def test_reconstrucao_da_tabela_mantem_triggers(self):
+        ultima = MigrationExecutor(connection).loader.graph.leaf_nodes("consultas")[0][1]
+        try:
+            self.migrar("0003_consulta_sala_conflitos")
+            self.migrar(ultima)
+            self.assertEqual(agenda.triggers_instalados(connection), set(agenda.TRIGGERS))
+        finally:
+            self.migrar(ultima)
+
+
+class TriggersConflitoTests(TestCase):
+    inicio = datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc)
+
+    def test_triggers_existem_depois_das_migracoes(self):
+        # 0004 e 0007 reconstroem a tabela no SQLite; os triggers precisam sobreviver
+        self.assertEqual(agenda.triggers_instalados(connection), set(agenda.TRIGGERS))
+
+    def test_post_migrate_reinstala_triggers(self):
+        with connection.cursor() as cursor:
+            for nome in agenda.TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        call_command("migrate", verbosity=0)
+        self.assertEqual(agenda.triggers_instalados(connection), set(agenda.TRIGGERS))
+
+    def test_sobreposicao_na_mesma_sala_e_barrada(self):
+        criar_consulta(criar_paciente(), self.inicio)
+        outro = criar_paciente("Bruno Lima", "555.666.777-88")
+        with self.assertRaises(IntegrityError) as erro, transaction.atomic():
+            criar_consulta(outro, self.inicio + timedelta(minutes=15))
+        self.assertTrue(agenda.erro_de_conflito(erro.exception))
+
+    def test_consulta_cancelada_nao_conflita(self):
+        paciente = criar_paciente()
+        criar_consulta(paciente, self.inicio, status=Consulta.Status.CANCELADA)
+        criar_consulta(paciente, self.inicio)
+        self.assertEqual(Consulta.objects.count(), 2)
+
+    def test_editar_consulta_antiga_sobreposta_sem_mudar_horario(self):
+        criar_consulta(criar_paciente(), self.inicio)
+        # sobreposição gravada antes dos triggers existirem
+        with connection.cursor() as cursor:
+            for nome in agenda.TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {nome}")
+        antiga = criar_consulta(criar_paciente("Bruno Lima", "555.666.777-88"), self.inicio + timedelta(minutes=15))
+        agenda.instalar_triggers(connection)
+        antiga.observacoes = "Paciente pediu retorno"
+        antiga.save()
+        antiga.inicio += timedelta(minutes=5)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            antiga.save()
+
+
+class ConflitoAgendaViewTests(TestCase):
+    inicio = datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        self.paciente = criar_paciente()
+        criar_consulta(self.paciente, self.inicio)
+
+    def dados(self, inicio):
+        return {
+            "paciente": self.paciente.pk, "status": Consulta.Status.AGENDADA, "sala": "1",
+            "inicio": inicio.strftime("%Y-%m-%dT%H:%M"),
+            "fim": (inicio + timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M"),
+        }
+
+    def test_conflito_do_trigger_nao_enfileira_sucesso(self):
+        # simula a corrida: a verificação do formulário passa, o trigger barra
+        with mock.patch.object(agenda, "verificar"):
+            resposta = self.client.post("/consultas/nova/", self.dados(self.inicio))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.context["form"].non_field_errors())
+        self.assertEqual([m.level_tag for m in get_messages(resposta.wsgi_request)], [])
+
+    def test_gravacao_enfileira_sucesso(self):
+        resposta = self.client.post("/consultas/nova/", self.dados(self.inicio + timedelta(hours=2)))
+        self.assertEqual(resposta.status_code, 302)
+        self.assertEqual([m.message for m in get_messages(resposta.wsgi_request)], ["Consulta criada com sucesso."])
+
+
+class LembretesConsultaCanceladaTests(TestCase):
+    def setUp(self):
+        self.agora = timezone.now()
+        self.consulta = criar_consulta(criar_paciente(), self.agora + timedelta(hours=1))
+        self.vencido = Lembrete.objects.create(
+            consulta=self.consulta, canal=Lembrete.Canal.WHATSAPP, agendado_em=self.agora - timedelta(minutes=5),
+        )
+        self.futuro = Lembrete.objects.create(
+            consulta=self.consulta, canal=Lembrete.Canal.EMAIL, agendado_em=self.agora + timedelta(minutes=30),
+        )
+
+    def test_cancelar_consulta_cancela_pendentes(self):
+        self.consulta.status = Consulta.Status.CANCELADA
+        self.consulta.save(update_fields=["status"])
+        self.assertEqual(
+            set(self.consulta.lembretes.values_list("status", flat=True)), {Lembrete.Status.CANCELADO}
+        )
+        self.assertEqual(lembretes.reservar(10, agora=self.agora), [])
+
+    def test_reativar_consulta_reativa_lembretes_futuros(self):
+        self.consulta.status = Consulta.Status.CANCELADA
+        self.consulta.save(update_fields=["status"])
+        self.consulta.status = Consulta.Status.CONFIRMADA
+        self.consulta.save(update_fields=["status"])
+        self.vencido.refresh_from_db()
+        self.futuro.refresh_from_db()
+        self.assertEqual(self.vencido.status, Lembrete.Status.CANCELADO)
+        self.assertEqual(self.futuro.status, Lembrete.Status.AGENDADO)
+
+    def test_fila_ignora_consulta_cancelada_por_update_em_massa(self):
+        Consulta.objects.filter(pk=self.consulta.pk).update(status=Consulta.Status.CANCELADA)
+        self.assertEqual(lembretes.reservar(10, agora=self.agora), [])
+
+    def test_acao_do_admin_cancela_pendentes(self):
+        request = RequestFactory().post("/")
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        site._registry[Consulta].marcar_cancelada(request, Consulta.objects.filter(pk=self.consulta.pk))
+        self.futuro.refresh_from_db()
+        self.assertEqual(self.futuro.status, Lembrete.Status.CANCELADO)
+
+
+@skipUnless(connection.vendor == "sqlite", "texto do plano específico do SQLite")
+class PlanoConsultaIndicesTests(TestCase):
+    """EXPLAIN QUERY PLAN (SQLite): as consultas por período e por paciente usam os índices compostos."""
+
+    def test_agenda_do_dia_usa_indice_inicio_status(self):
+        inicio, fim = intervalo_dia(date(2026, 3, 2))
+        plano = Consulta.objects.filter(inicio__gte=inicio, inicio__lt=fim).order_by("inicio").explain()
+        self.assertIn("USING INDEX consulta_inicio_status_idx", plano)
+        plano = Consulta.objects.filter(
+            inicio__gte=inicio, inicio__lt=fim, status=Consulta.Status.CONFIRMADA,
+        ).explain()
+        self.assertIn("USING INDEX consulta_inicio_status_idx", plano)
+
+    def test_historico_do_paciente_usa_indice_paciente_inicio(self):
+        plano = Consulta.objects.filter(paciente_id=1).order_by("-inicio").explain()
+        self.assertIn("USING INDEX consulta_paciente_inicio_idx", plano)
+        self.assertNotIn("TEMP B-TREE", plano)
+
+
+class DetalheCacheCatalogoTests(TestCase):
+    def test_renomear_procedimento_invalida_fragmento(self):
+        consulta = criar_consulta(criar_paciente(), datetime(2026, 3, 2, 12, 0, tzinfo=dt_timezone.utc))
+        with self.captureOnCommitCallbacks(execute=True):
+            procedimento = CatalogoProcedimento.objects.create(codigo="RES", nome="Restauração", preco_base=100)
+        ProcedimentoExecutado.objects.create(
+            consulta=consulta, procedimento=procedimento, dente="36", valor_unitario=100,
+        )
+        # instância nova a cada leitura, como em cada requisição
+        self.assertIn("Restauração", detalhe.secoes(Consulta.objects.get(pk=consulta.pk))["procedimentos_executados"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            procedimento.nome = "Restauração em resina"
+            procedimento.save()
+        html = detalhe.secoes(Consulta.objects.get(pk=consulta.pk))["procedimentos_executados"]
+        self.assertIn("Restauração em resina", html)
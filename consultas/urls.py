@@ -11,5 +11,7 @@ urlpatterns = [
     path("<int:pk>/editar/", views.ConsultaUpdateView.as_view(), name="update"),
     path("<int:pk>/excluir/", views.ConsultaDeleteView.as_view(), name="delete"),
     path("<int:pk>/status/<str:status_code>/", views.ConsultaSetStatusView.as_view(), name="set_status"),
+    path("calendar.json", views.CalendarioJsonView.as_view(), name="calendar"),
+    path("horarios-livres.json", views.HorariosLivresView.as_view(), name="horarios_livres"),
     path("lembrete/novo/", views.LembreteCreateView.as_view(), name="lembrete_create"),
 ]
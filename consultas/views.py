@@ -4,8 +4,15 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
 from django.shortcuts import redirect, get_object_or_404
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.db import IntegrityError, transaction
+from app.paginacao import KeysetPaginationMixin
+from app.periodos import filtrar_periodo
+from . import agenda, calendario, detalhe, horarios
 from .models import Consulta, Lembrete
-from .forms import ConsultaForm, LembreteForm
+from .forms import ConsultaForm, HorariosLivresForm, LembreteForm
 
 class SearchMixin:
     search_param = "q"
@@ -21,12 +28,13 @@ class SearchMixin:
             qs = qs.filter(query)
         return qs
 
-class ConsultaListView(LoginRequiredMixin, PermissionRequiredMixin, SearchMixin, ListView):
+class ConsultaListView(LoginRequiredMixin, PermissionRequiredMixin, SearchMixin, KeysetPaginationMixin, ListView):
     model = Consulta
     template_name = "consultas/consulta_list.html"
     context_object_name = "consultas"
     paginate_by = 20
     permission_required = "consultas.view_consulta"
+    keyset_ordering = ("inicio", "id")
     search_fields = ["paciente__nome", "sala", "observacoes", "status"]
 
     def get_queryset(self):
@@ -46,14 +54,12 @@ class ConsultaListView(LoginRequiredMixin, PermissionRequiredMixin, SearchMixin,
         if status:
             qs = qs.filter(status=status)
 
-        start = self.request.GET.get("start")
-        end = self.request.GET.get("end")
-        if start:
-            qs = qs.filter(inicio__date__gte=start)
-        if end:
-            qs = qs.filter(inicio__date__lte=end)
+        # datas locais -> intervalo [inicio, fim) sobre a coluna indexada
+        qs = filtrar_periodo(
+            qs, "inicio", self.request.GET.get("start"), self.request.GET.get("end")
+        )
 
-        return qs.order_by("inicio")
+        return qs.order_by("inicio", "id")
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -71,27 +77,53 @@ class ConsultaDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView
     context_object_name = "consulta"
     permission_required = "consultas.view_consulta"
 
-class ConsultaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+    def get_queryset(self):
+        return Consulta.objects.select_related("paciente").only(
+            "id", "status", "inicio", "fim", "sala", "observacoes", "criado_em", "versao", "paciente__nome",
+        )
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # listas dos filhos: fragmentos em cache por versão da consulta
+        ctx["secoes"] = detalhe.secoes(self.object)
+        return ctx
+
+class ConflitoAgendaMixin:
+    """
+    Converte o erro dos triggers de conflito (gravação concorrente) em erro de
+    formulário; a mensagem de sucesso só é enfileirada depois da gravação.
+    """
+    mensagem_sucesso = ""
+
+    def form_valid(self, form):
+        try:
+            # savepoint: o formulário ainda é renderizado depois do erro
+            with transaction.atomic():
+                resposta = super().form_valid(form)
+        except IntegrityError as e:
+            if not agenda.erro_de_conflito(e):
+                raise
+            form.add_error(None, "Outra consulta foi marcada neste horário agora há pouco; escolha outro.")
+            return self.form_invalid(form)
+        if self.mensagem_sucesso:
+            messages.success(self.request, self.mensagem_sucesso)
+        return resposta
+
+class ConsultaCreateView(LoginRequiredMixin, PermissionRequiredMixin, ConflitoAgendaMixin, CreateView):
     model = Consulta
     form_class = ConsultaForm
     template_name = "consultas/consulta_form.html"
     permission_required = "consultas.add_consulta"
     success_url = reverse_lazy("consultas:list")
+    mensagem_sucesso = "Consulta criada com sucesso."
 
-    def form_valid(self, form):
-        messages.success(self.request, "Consulta criada com sucesso.")
-        return super().form_valid(form)
-
-class ConsultaUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
+class ConsultaUpdateView(LoginRequiredMixin, PermissionRequiredMixin, ConflitoAgendaMixin, UpdateView):
     model = Consulta
     form_class = ConsultaForm
     template_name = "consultas/consulta_form.html"
     permission_required = "consultas.change_consulta"
     success_url = reverse_lazy("consultas:list")
-
-    def form_valid(self, form):
-        messages.success(self.request, "Consulta atualizada.")
-        return super().form_valid(form)
+    mensagem_sucesso = "Consulta atualizada."
 
 class ConsultaDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Consulta
@@ -119,10 +151,59 @@ class ConsultaSetStatusView(LoginRequiredMixin, PermissionRequiredMixin, View):
             messages.error(request, "Status inválido.")
             return redirect(self.success_url)
         consulta.status = status_code
-        consulta.save(update_fields=["status"])
+        try:
+            consulta.save(update_fields=["status"])
+        except IntegrityError as e:
+            if not agenda.erro_de_conflito(e):
+                raise
+            messages.error(request, "Não é possível reativar: o horário conflita com outra consulta.")
+            return redirect(self.success_url)
         messages.success(request, "Status da consulta atualizado.")
         return redirect(self.success_url)
 
+class HorariosLivresView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Inícios livres por sala e dia para a duração de um procedimento do catálogo."""
+
+    permission_required = "consultas.view_consulta"
+
+    def get(self, request):
+        form = HorariosLivresForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"erros": form.errors}, status=400)
+        dados = form.cleaned_data
+        procedimento = dados["procedimento"]
+        livres = horarios.horarios_livres(
+            dados["start"], dados["end"], procedimento.duracao_min,
+            sala=dados["sala"] or None, passo=dados["passo"],
+        )
+        return JsonResponse({
+            "procedimento": {"id": procedimento.pk, "nome": procedimento.nome},
+            "duracao_min": procedimento.duracao_min,
+            "passo_min": dados["passo"],
+            "start": dados["start"].isoformat(),
+            "end": dados["end"].isoformat(),
+            "horarios": [
+                {"dia": dia.isoformat(), "sala": sala, "inicios": [f"{i:%H:%M}" for i in inicios]}
+                for dia, sala, inicios in livres
+            ],
+        })
+
+def _etag_calendario(request):
+    return calendario.etag(*calendario.periodo(request.GET))
+
+
+class CalendarioJsonView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Feed colunar da agenda (?start&end&sala); responde 304 se a ETag não mudou."""
+
+    permission_required = "consultas.view_consulta"
+
+    @method_decorator(condition(etag_func=_etag_calendario))
+    def get(self, request):
+        resposta = JsonResponse(calendario.payload(*calendario.periodo(request.GET)))
+        # sempre revalidar: o polling custa só a consulta da ETag
+        resposta["Cache-Control"] = "private, no-cache"
+        return resposta
+
 # LEMBRETES
 class LembreteCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = Lembrete
@@ -1,7 +1,8 @@
 # estoque/admin.py
 from django.contrib import admin
-from django.db.models import Sum
-from .models import ItemEstoque, MovimentoEstoque
+from django.db import transaction
+from . import consumo
+from .models import ConsumoDiario, ItemEstoque, MovimentoEstoque, SaldoEstoque
 
 
 # =========================
@@ -31,41 +32,63 @@ class ItemEstoqueAdmin(admin.ModelAdmin):
         "qtd_minima",
         "abaixo_minimo",
         "consumo_total",
+        "consumo_30d",
+        "consumo_90d",
     )
-    list_filter = ("marca", "validade")
+    list_filter = ("abaixo_minimo", "marca", "validade")
     search_fields = ("descricao", "marca", "lote")
     ordering = ("descricao",)
     list_per_page = 25
     inlines = [MovimentoEstoqueInline]
 
-    @admin.display(boolean=True, description="Abaixo do mínimo")
-    def abaixo_minimo(self, obj: ItemEstoque):
-        return obj.qtd_atual < obj.qtd_minima
+    # consumo vem do rollup ConsumoDiario (subconsultas anotadas, sem SUM por linha)
+    def get_queryset(self, request):
+        return consumo.anotar_consumo(super().get_queryset(request))
 
-    @admin.display(description="Consumo total")
+    @admin.display(description="Consumo total", ordering="consumo_total")
     def consumo_total(self, obj: ItemEstoque):
-        # Soma de saídas (OUT) em movimentos
-        agg = obj.movimentos.filter(tipo_movimento=MovimentoEstoque.Tipo.SAIDA).aggregate(
-            total=Sum("quantidade")
-        )
-        total = agg["total"] or 0
-        return total
+        return obj.consumo_total
+
+    @admin.display(description="Consumo 30d", ordering="consumo_30d")
+    def consumo_30d(self, obj: ItemEstoque):
+        return obj.consumo_30d
+
+    @admin.display(description="Consumo 90d", ordering="consumo_90d")
+    def consumo_90d(self, obj: ItemEstoque):
+        return obj.consumo_90d
+
+    def get_readonly_fields(self, request, obj=None):
+        # depois do cadastro o saldo só muda por movimentos
+        if obj is not None:
+            return ("qtd_atual",)
+        return ()
 
     # ---- AÇÕES EM MASSA ----
+    # as ações geram movimentos, então o saldo e o KPI seguem o mesmo caminho
     actions = ["zerar_estoque", "ajustar_para_minimo"]
 
+    @transaction.atomic
+    def _movimentar(self, queryset, quantidade, tipo, motivo):
+        count = 0
+        for item in queryset.select_for_update().order_by("pk"):
+            qtd = quantidade(item)
+            if qtd > 0:
+                MovimentoEstoque(item=item, tipo_movimento=tipo, quantidade=qtd, motivo=motivo).save()
+                count += 1
+        return count
+
     def zerar_estoque(self, request, queryset):
-        updated = queryset.update(qtd_atual=0)
+        updated = self._movimentar(
+            queryset, lambda item: item.qtd_atual, MovimentoEstoque.Tipo.SAIDA, "Estoque zerado (admin)"
+        )
         self.message_user(request, f"Estoque zerado para {updated} item(ns).")
     zerar_estoque.short_description = "Zerar estoque selecionado"
 
     def ajustar_para_minimo(self, request, queryset):
-        count = 0
-        for item in queryset:
-            if item.qtd_atual < item.qtd_minima:
-                item.qtd_atual = item.qtd_minima
-                item.save(update_fields=["qtd_atual"])
-                count += 1
+        count = self._movimentar(
+            queryset, lambda item: item.qtd_minima - item.qtd_atual,
+            MovimentoEstoque.Tipo.ENTRADA, "Ajuste para o mínimo (admin)",
+        )
         self.message_user(request, f"Ajustado para o mínimo em {count} item(ns).")
     ajustar_para_minimo.short_description = "Ajustar itens abaixo do mínimo para o mínimo"
 
@@ -91,3 +114,33 @@ class MovimentoEstoqueAdmin(admin.ModelAdmin):
     autocomplete_fields = ("item", "consulta")
     list_select_related = ("item", "consulta")
     readonly_fields = ("criado_em",)
+
+
+# =========================
+# Saldo de Estoque (snapshots)
+# =========================
+@admin.register(SaldoEstoque)
+class SaldoEstoqueAdmin(admin.ModelAdmin):
+    list_display = ("item", "dia", "qtd", "criado_em")
+    list_filter = ("dia",)
+    search_fields = ("item__descricao", "item__lote")
+    ordering = ("-dia", "item__descricao")
+    date_hierarchy = "dia"
+    list_per_page = 50
+    list_select_related = ("item",)
+    readonly_fields = ("item", "dia", "qtd", "criado_em")
+
+
+# =========================
+# Consumo Diário (rollup)
+# =========================
+@admin.register(ConsumoDiario)
+class ConsumoDiarioAdmin(admin.ModelAdmin):
+    list_display = ("item", "dia", "entradas", "saidas")
+    list_filter = ("dia",)
+    search_fields = ("item__descricao", "item__lote")
+    ordering = ("-dia", "item__descricao")
+    date_hierarchy = "dia"
+    list_per_page = 50
+    list_select_related = ("item",)
+    readonly_fields = ("item", "dia", "entradas", "saidas")
@@ -0,0 +1,42 @@
+# estoque/alertas.py
+"""
+Alertas de estoque lidos direto dos índices, sem varrer a tabela inteira.
+
+Abaixo do mínimo: o flag ItemEstoque.abaixo_minimo é mantido por save() e
+pelos movimentos e tem um índice parcial (descricao, id) só com os itens em
+alerta. Validade: índice parcial em `validade` restrito a lotes com saldo,
+então a consulta precisa repetir qtd_atual > 0.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ItemEstoque
+
+DIAS_VALIDADE = 30
+
+
+def abaixo_minimo():
+    return ItemEstoque.objects.filter(abaixo_minimo=True).order_by("descricao", "id")
+
+
+def vencendo(dias=DIAS_VALIDADE, hoje=None):
+    """Lotes com saldo vencidos ou que vencem nos próximos `dias` dias."""
+    hoje = hoje or timezone.localdate()
+    return (
+        ItemEstoque.objects.filter(qtd_atual__gt=0, validade__lte=hoje + timedelta(days=dias))
+        .order_by("validade", "pk")
+    )
+
+
+def serializar(item, hoje=None):
+    hoje = hoje or timezone.localdate()
+    return {
+        "id": item.pk,
+        "descricao": item.descricao,
+        "lote": item.lote,
+        "validade": item.validade.isoformat() if item.validade else None,
+        "dias_para_vencer": (item.validade - hoje).days if item.validade else None,
+        "qtd_atual": item.qtd_atual,
+        "qtd_minima": item.qtd_minima,
+    }
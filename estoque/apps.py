@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EstoqueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'estoque'
+
+    def ready(self):
+        # estorno de movimentos excluídos no saldo do item
+        from . import signals  # noqa: F401
@@ -0,0 +1,71 @@
+# estoque/consumo.py
+"""
+Consumo de estoque a partir do rollup ConsumoDiario (uma linha por item/dia).
+
+Os movimentos atualizam o rollup incrementalmente (MovimentoEstoque.aplicar);
+totais, janelas de 30/90 dias e séries para gráficos somam algumas centenas
+de linhas pré-agregadas em vez do histórico de movimentos. `reconstruir`
+refaz a tabela inteira a partir dos movimentos (backfill_consumo).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import ConsumoDiario, MovimentoEstoque
+
+JANELAS = (30, 90)
+
+
+def _saidas(item_ref, desde=None):
+    qs = ConsumoDiario.objects.filter(item=item_ref)
+    if desde is not None:
+        qs = qs.filter(dia__gte=desde)
+    soma = qs.values("item").annotate(total=Sum("saidas")).values("total")
+    return Coalesce(Subquery(soma, output_field=IntegerField()), Value(0))
+
+
+def anotar_consumo(queryset, hoje=None):
+    """Anota consumo_total e consumo_<N>d (saídas) em um queryset de ItemEstoque."""
+    hoje = hoje or timezone.localdate()
+    anotacoes = {"consumo_total": _saidas(OuterRef("pk"))}
+    for dias in JANELAS:
+        anotacoes[f"consumo_{dias}d"] = _saidas(OuterRef("pk"), hoje - timedelta(days=dias - 1))
+    return queryset.annotate(**anotacoes)
+
+
+def serie(item_id, dias=90, hoje=None):
+    """[(dia, entradas, saidas)] dos últimos `dias` dias, só os dias com movimento."""
+    hoje = hoje or timezone.localdate()
+    return list(
+        ConsumoDiario.objects.filter(item_id=item_id, dia__gte=hoje - timedelta(days=dias - 1))
+        .order_by("dia").values_list("dia", "entradas", "saidas")
+    )
+
+
+@transaction.atomic
+def reconstruir(batch_size=2000):
+    """Recria ConsumoDiario agregando todos os movimentos; retorna o total de linhas."""
+    por_dia = (
+        MovimentoEstoque.objects
+        .annotate(dia=TruncDate("criado_em", tzinfo=timezone.get_current_timezone()))
+        .values("item_id", "dia")
+        .annotate(
+            entradas=Coalesce(Sum("quantidade", filter=Q(tipo_movimento=MovimentoEstoque.Tipo.ENTRADA)), 0),
+            saidas=Coalesce(Sum("quantidade", filter=Q(tipo_movimento=MovimentoEstoque.Tipo.SAIDA)), 0),
+        )
+        .order_by()
+    )
+    ConsumoDiario.objects.all().delete()
+    total = 0
+    lote = []
+    for row in por_dia.iterator(chunk_size=batch_size):
+        lote.append(ConsumoDiario(**row))
+        if len(lote) >= batch_size:
+            ConsumoDiario.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+    ConsumoDiario.objects.bulk_create(lote)
+    return total + len(lote)
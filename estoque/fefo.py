@@ -0,0 +1,96 @@
+# estoque/fefo.py
+"""
+Retirada por material com alocação FEFO (first-expire, first-out).
+
+Cada lote de um material é um ItemEstoque com a mesma `descricao`. A
+retirada percorre os lotes com saldo pelo índice (descricao, validade),
+do que vence primeiro ao que vence por último (sem validade por último),
+ignorando lotes vencidos, e lê só os lotes necessários para cobrir a
+quantidade. Grava tudo em uma transação: um UPDATE para os saldos de
+todos os lotes, um bulk_create para os movimentos e um lote de
+incrementos no consumo diário.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .models import ConsumoDiario, EstoqueInsuficiente, ItemEstoque, MovimentoEstoque
+
+
+def lotes_disponiveis(descricao, hoje=None):
+    hoje = hoje or timezone.localdate()
+    return (
+        ItemEstoque.objects.filter(descricao=descricao, qtd_atual__gt=0)
+        .filter(Q(validade__gte=hoje) | Q(validade__isnull=True))
+        .order_by(F("validade").asc(nulls_last=True), "id")
+    )
+
+
+def alocar(lotes, quantidade):
+    """[(item_id, qtd)] cobrindo `quantidade` na ordem dos lotes; levanta se faltar."""
+    alocacao = []
+    restante = quantidade
+    for pk, disponivel in lotes:
+        if restante <= 0:
+            break
+        qtd = min(disponivel, restante)
+        alocacao.append((pk, qtd))
+        restante -= qtd
+    if restante > 0:
+        raise EstoqueInsuficiente(
+            "Estoque insuficiente: faltam %(qtd)s unidade(s) do material.",
+            code="estoque_insuficiente", params={"qtd": restante},
+        )
+    return alocacao
+
+
+@transaction.atomic
+def retirar(descricao, quantidade, motivo="", consulta=None, hoje=None):
+    """Retira `quantidade` do material `descricao` em ordem FEFO; retorna os movimentos criados."""
+    from painel import snapshot
+
+    # lê (e trava) os lotes na ordem do índice só até cobrir a quantidade
+    minimas = {}
+
+    def _lotes():
+        linhas = (
+            lotes_disponiveis(descricao, hoje).select_for_update()
+            .values_list("id", "qtd_atual", "qtd_minima").iterator(chunk_size=100)
+        )
+        for pk, atual, minima in linhas:
+            minimas[pk] = (atual, minima)
+            yield pk, atual
+
+    alocacao = alocar(_lotes(), quantidade)
+    ids = [pk for pk, _ in alocacao]
+
+    # um UPDATE para todos os lotes; se algum saldo mudou desde a leitura e
+    # ficaria negativo, o CHECK (qtd_atual >= 0) do campo desfaz a transação
+    retirada = Case(
+        *[When(pk=pk, then=Value(qtd)) for pk, qtd in alocacao], output_field=IntegerField()
+    )
+    try:
+        with transaction.atomic():
+            ItemEstoque.objects.filter(pk__in=ids).update(qtd_atual=F("qtd_atual") - retirada)
+    except IntegrityError:
+        raise EstoqueInsuficiente(
+            "O saldo dos lotes mudou durante a retirada; tente novamente.", code="estoque_insuficiente"
+        )
+    ItemEstoque.objects.filter(pk__in=ids).update(abaixo_minimo=LessThan(F("qtd_atual"), F("qtd_minima")))
+
+    movimentos = MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(
+            item_id=pk, tipo_movimento=MovimentoEstoque.Tipo.SAIDA, quantidade=qtd,
+            motivo=motivo, consulta=consulta,
+        )
+        for pk, qtd in alocacao
+    ])
+
+    novos_alertas = 0
+    for pk, qtd in alocacao:
+        atual, minima = minimas[pk]
+        novos_alertas += (atual - qtd < minima) - (atual < minima)
+    ConsumoDiario.registrar_saidas(timezone.localdate(), dict(alocacao))
+    snapshot.aplicar(snapshot.ITENS_ALERTA, novos_alertas)
+    return movimentos
@@ -1,5 +1,6 @@
 # estoque/forms.py
 from django import forms
+from consultas.models import Consulta
 from .models import ItemEstoque, MovimentoEstoque
 
 class ItemEstoqueForm(forms.ModelForm):
@@ -8,7 +9,31 @@ class ItemEstoqueForm(forms.ModelForm):
         fields = ["descricao", "marca", "lote", "validade", "qtd_minima", "qtd_atual"]
         widgets = {"validade": forms.DateInput(attrs={"type": "date"})}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            # depois do cadastro o saldo só muda por movimentos
+            self.fields["qtd_atual"].disabled = True
+            self.fields["qtd_atual"].help_text = "Use um movimento de estoque para alterar o saldo."
+
 class MovimentoEstoqueForm(forms.ModelForm):
     class Meta:
         model = MovimentoEstoque
         fields = ["item", "tipo_movimento", "quantidade", "motivo", "consulta"]
+
+class RetiradaFefoForm(forms.Form):
+    """Retirada por material: `descricao` ou o id de qualquer lote (`item`) identificam o material."""
+    descricao = forms.CharField(max_length=120, required=False)
+    item = forms.ModelChoiceField(queryset=ItemEstoque.objects.all(), required=False)
+    quantidade = forms.IntegerField(min_value=1)
+    motivo = forms.CharField(max_length=120, required=False)
+    consulta = forms.ModelChoiceField(queryset=Consulta.objects.all(), required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("descricao"):
+            item = cleaned.get("item")
+            if item is None:
+                raise forms.ValidationError("Informe a descrição do material ou um lote.")
+            cleaned["descricao"] = item.descricao
+        return cleaned
@@ -0,0 +1,15 @@
+# estoque/management/commands/backfill_consumo.py
+from django.core.management.base import BaseCommand
+
+from estoque import consumo
+
+
+class Command(BaseCommand):
+    help = "Recria o consumo diário por item (ConsumoDiario) a partir dos movimentos de estoque."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=2000, help="Linhas por bulk_create (padrão: 2000).")
+
+    def handle(self, *args, **options):
+        total = consumo.reconstruir(batch_size=options["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Consumo diário reconstruído: {total} linha(s)."))
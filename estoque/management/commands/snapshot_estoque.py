@@ -0,0 +1,25 @@
+# estoque/management/commands/snapshot_estoque.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from estoque import saldos
+
+
+class Command(BaseCommand):
+    help = "Grava o saldo de todos os itens de estoque ao fim de um dia (padrão: ontem)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dia", help="Data no formato AAAA-MM-DD (padrão: ontem).")
+
+    def handle(self, *args, **options):
+        if options["dia"]:
+            dia = parse_date(options["dia"])
+            if not dia:
+                raise CommandError("Data inválida; use AAAA-MM-DD.")
+        else:
+            dia = timezone.localdate() - timedelta(days=1)
+        total = saldos.gerar_snapshot(dia)
+        self.stdout.write(self.style.SUCCESS(f"Saldo de {dia:%d/%m/%Y} gravado para {total} item(ns)."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultas', '0002_consulta_indexes'),
+        ('estoque', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('qtd', models.IntegerField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Estoque',
+                'verbose_name_plural': 'Saldos de Estoque',
+                'ordering': ['-dia'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movimentoestoque',
+            index=models.Index(fields=['item', 'criado_em'], name='movimento_item_data_idx'),
+        ),
+        migrations.AddField(
+            model_name='saldoestoque',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='estoque.itemestoque'),
+        ),
+        migrations.AddConstraint(
+            model_name='saldoestoque',
+            constraint=models.UniqueConstraint(fields=('item', 'dia'), name='saldo_estoque_item_dia_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_flag(apps, schema_editor):
+    ItemEstoque = apps.get_model("estoque", "ItemEstoque")
+    ItemEstoque.objects.filter(qtd_atual__lt=F("qtd_minima")).update(abaixo_minimo=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0002_movimentos_saldos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemestoque',
+            name='abaixo_minimo',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(preencher_flag, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='itemestoque',
+            index=models.Index(condition=models.Q(('abaixo_minimo', True)), fields=['descricao', 'id'], name='item_abaixo_minimo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemestoque',
+            index=models.Index(condition=models.Q(('qtd_atual__gt', 0)), fields=['validade'], name='item_validade_com_saldo_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0003_item_abaixo_minimo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('entradas', models.IntegerField(default=0)),
+                ('saidas', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumo_diario', to='estoque.itemestoque')),
+            ],
+            options={
+                'verbose_name': 'Consumo Diário',
+                'verbose_name_plural': 'Consumo Diário',
+                'ordering': ['-dia'],
+                'indexes': [models.Index(fields=['dia', 'item'], name='consumo_dia_item_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'dia'), name='consumo_item_dia_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0004_consumo_diario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemestoque',
+            index=models.Index(fields=['descricao', 'validade'], name='item_descricao_validade_idx'),
+        ),
+    ]
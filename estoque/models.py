@@ -1,7 +1,15 @@
 # estoque/models.py
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.lookups import LessThan
+from django.utils import timezone
 from consultas.models import Consulta
 
+
+class EstoqueInsuficiente(ValidationError):
+    """Saída maior que o saldo do item no momento da gravação."""
+
 class ItemEstoque(models.Model):
     descricao = models.CharField(max_length=120)
     marca = models.CharField(max_length=60, blank=True)
@@ -9,15 +17,76 @@ class ItemEstoque(models.Model):
     validade = models.DateField(null=True, blank=True)
     qtd_minima = models.PositiveIntegerField(default=0)
     qtd_atual = models.PositiveIntegerField(default=0)
+    # qtd_atual < qtd_minima, mantido por save() e pelos movimentos; o índice
+    # parcial lista os alertas sem comparar duas colunas em toda a tabela
+    abaixo_minimo = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ["descricao"]
         verbose_name = "Item de Estoque"
         verbose_name_plural = "Itens de Estoque"
+        indexes = [
+            # lotes de um material em ordem de validade (retirada FEFO)
+            models.Index(fields=["descricao", "validade"], name="item_descricao_validade_idx"),
+            models.Index(
+                fields=["descricao", "id"], condition=models.Q(abaixo_minimo=True), name="item_abaixo_minimo_idx"
+            ),
+            # alertas de validade: só lotes com saldo interessam
+            models.Index(
+                fields=["validade"], condition=models.Q(qtd_atual__gt=0), name="item_validade_com_saldo_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.descricao} ({self.qtd_atual})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.abaixo_minimo = self.qtd_atual < self.qtd_minima
+            return super().save(*args, **kwargs)
+        # depois de criado, qtd_atual só muda por movimentos: relê o saldo
+        # travando a linha em vez de regravar o valor carregado em memória
+        with transaction.atomic():
+            atual = (
+                ItemEstoque.objects.select_for_update().filter(pk=self.pk)
+                .values_list("qtd_atual", flat=True).first()
+            )
+            if atual is not None:
+                self.qtd_atual = atual
+            self.abaixo_minimo = self.qtd_atual < self.qtd_minima
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "abaixo_minimo"}
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def movimentar(item_id, delta):
+        """
+        Soma `delta` a qtd_atual com um UPDATE condicional (sem ler antes):
+        uma saída só passa se houver saldo, senão levanta EstoqueInsuficiente.
+        O mesmo UPDATE recalcula abaixo_minimo; o KPI de itens em alerta só
+        muda quando o item cruza o mínimo.
+        """
+        from painel import snapshot
+
+        filtro = {"pk": item_id}
+        if delta < 0:
+            filtro["qtd_atual__gte"] = -delta
+        with transaction.atomic():
+            atualizados = ItemEstoque.objects.filter(**filtro).update(
+                qtd_atual=F("qtd_atual") + delta,
+                abaixo_minimo=LessThan(F("qtd_atual") + delta, F("qtd_minima")),
+            )
+            if not atualizados:
+                raise EstoqueInsuficiente(
+                    "Estoque insuficiente para a saída de %(qtd)s unidade(s).",
+                    code="estoque_insuficiente", params={"qtd": -delta},
+                )
+            # a linha já está travada pelo UPDATE: a releitura é consistente
+            depois, minima, abaixo = (
+                ItemEstoque.objects.filter(pk=item_id).values_list("qtd_atual", "qtd_minima", "abaixo_minimo")[0]
+            )
+            snapshot.aplicar(snapshot.ITENS_ALERTA, abaixo - (depois - delta < minima))
+
 
 class MovimentoEstoque(models.Model):
     class Tipo(models.TextChoices):
@@ -35,6 +104,134 @@ class MovimentoEstoque(models.Model):
         ordering = ["-criado_em"]
         verbose_name = "Movimento de Estoque"
         verbose_name_plural = "Movimentos de Estoque"
+        indexes = [
+            # saldo em uma data = snapshot + movimentos do item desde então
+            models.Index(fields=["item", "criado_em"], name="movimento_item_data_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_movimento_display()} - {self.item.descricao} ({self.quantidade})"
+
+    @property
+    def delta(self):
+        """Efeito do movimento em qtd_atual (positivo na entrada)."""
+        if self.tipo_movimento == self.Tipo.SAIDA:
+            return -(self.quantidade or 0)
+        return self.quantidade or 0
+
+    def clean(self):
+        # checagem amigável para o formulário; a garantia real é o UPDATE
+        # condicional em ItemEstoque.movimentar
+        if self.item_id and self.tipo_movimento == self.Tipo.SAIDA and self.quantidade:
+            disponivel = ItemEstoque.objects.filter(pk=self.item_id).values_list("qtd_atual", flat=True).first() or 0
+            if not self._state.adding:
+                anterior = MovimentoEstoque.objects.filter(pk=self.pk).first()
+                if anterior and anterior.item_id == self.item_id:
+                    disponivel -= anterior.delta
+            if self.quantidade > disponivel:
+                raise ValidationError(
+                    {"quantidade": f"Estoque insuficiente: há {disponivel} unidade(s) disponível(is)."}
+                )
+
+    def save(self, *args, **kwargs):
+        # o movimento, o saldo do item e o consumo do dia na mesma transação
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = MovimentoEstoque.objects.filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if anterior:
+                anterior.aplicar(-1)
+            self.aplicar(+1)
+
+    def aplicar(self, sinal):
+        """Aplica (sinal=+1) ou desfaz (sinal=-1) o movimento no item e no consumo diário."""
+        ItemEstoque.movimentar(self.item_id, sinal * self.delta)
+        entrada = self.tipo_movimento == self.Tipo.ENTRADA
+        ConsumoDiario.registrar(
+            self.item_id, timezone.localtime(self.criado_em).date(),
+            entradas=sinal * self.quantidade if entrada else 0,
+            saidas=0 if entrada else sinal * self.quantidade,
+        )
+
+
+class ConsumoDiario(models.Model):
+    """Entradas e saídas de um item por dia (hora local), mantido pelos movimentos."""
+
+    item = models.ForeignKey(ItemEstoque, on_delete=models.CASCADE, related_name="consumo_diario")
+    dia = models.DateField()
+    entradas = models.IntegerField(default=0)
+    saidas = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-dia"]
+        verbose_name = "Consumo Diário"
+        verbose_name_plural = "Consumo Diário"
+        constraints = [
+            models.UniqueConstraint(fields=["item", "dia"], name="consumo_item_dia_uniq"),
+        ]
+        indexes = [
+            # janelas "últimos N dias" de todos os itens
+            models.Index(fields=["dia", "item"], name="consumo_dia_item_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item.descricao} em {self.dia:%d/%m/%Y}: +{self.entradas} / -{self.saidas}"
+
+    @classmethod
+    def registrar(cls, item_id, dia, entradas=0, saidas=0):
+        """Soma ao contador do dia com F(); cria a linha se ainda não existir."""
+        if not entradas and not saidas:
+            return
+        incremento = {"entradas": F("entradas") + entradas, "saidas": F("saidas") + saidas}
+        if cls.objects.filter(item_id=item_id, dia=dia).update(**incremento):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(item_id=item_id, dia=dia, entradas=entradas, saidas=saidas)
+        except IntegrityError:
+            # outro processo criou a linha entre o UPDATE e o INSERT
+            cls.objects.filter(item_id=item_id, dia=dia).update(**incremento)
+
+    @classmethod
+    def registrar_saidas(cls, dia, saidas_por_item):
+        """
+        Versão em lote de registrar() para várias saídas no mesmo dia: um
+        UPDATE para as linhas existentes e um bulk_create para as novas.
+        Quem chama deve ter travado os itens (como em fefo.retirar).
+        """
+        if not saidas_por_item:
+            return
+        existentes = set(
+            cls.objects.filter(dia=dia, item_id__in=saidas_por_item).values_list("item_id", flat=True)
+        )
+        if existentes:
+            incremento = models.Case(
+                *[models.When(item_id=pk, then=models.Value(saidas_por_item[pk])) for pk in existentes],
+                output_field=models.IntegerField(),
+            )
+            cls.objects.filter(dia=dia, item_id__in=existentes).update(saidas=F("saidas") + incremento)
+        cls.objects.bulk_create([
+            cls(item_id=pk, dia=dia, saidas=qtd)
+            for pk, qtd in saidas_por_item.items() if pk not in existentes
+        ])
+
+
+class SaldoEstoque(models.Model):
+    """Saldo de um item ao fim de um dia (hora local), gerado por snapshot_estoque."""
+
+    item = models.ForeignKey(ItemEstoque, on_delete=models.CASCADE, related_name="saldos")
+    dia = models.DateField()
+    qtd = models.IntegerField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-dia"]
+        verbose_name = "Saldo de Estoque"
+        verbose_name_plural = "Saldos de Estoque"
+        constraints = [
+            models.UniqueConstraint(fields=["item", "dia"], name="saldo_estoque_item_dia_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.item.descricao} em {self.dia:%d/%m/%Y}: {self.qtd}"
@@ -0,0 +1,76 @@
+# estoque/saldos.py
+"""
+Saldo de estoque em uma data sem reprocessar todo o histórico.
+
+ItemEstoque.qtd_atual é o saldo corrente (mantido pelos movimentos). Para
+uma data passada parte-se do SaldoEstoque mais recente até aquele dia e
+somam-se apenas os movimentos posteriores a ele; sem snapshot, desconta-se
+de qtd_atual o que entrou/saiu depois da data. Os dois caminhos usam o
+índice (item, criado_em) de MovimentoEstoque.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, When
+from django.db.models.functions import Coalesce
+
+from app.periodos import intervalo_dia
+
+from .models import ItemEstoque, MovimentoEstoque, SaldoEstoque
+
+# efeito de um movimento em qtd_atual, como expressão SQL
+DELTA = Case(
+    When(tipo_movimento=MovimentoEstoque.Tipo.SAIDA, then=-F("quantidade")),
+    default=F("quantidade"),
+    output_field=IntegerField(),
+)
+
+# mesma regra de DELTA vista a partir de ItemEstoque (join em movimentos)
+DELTA_RELACIONADO = Case(
+    When(movimentos__tipo_movimento=MovimentoEstoque.Tipo.SAIDA, then=-F("movimentos__quantidade")),
+    default=F("movimentos__quantidade"),
+    output_field=IntegerField(),
+)
+
+
+def _soma_deltas(item_id, inicio, fim=None):
+    qs = MovimentoEstoque.objects.filter(item_id=item_id, criado_em__gte=inicio)
+    if fim is not None:
+        qs = qs.filter(criado_em__lt=fim)
+    return qs.aggregate(total=Coalesce(Sum(DELTA), 0))["total"]
+
+
+def saldo_em(item_id, dia):
+    """Saldo do item ao fim de `dia` (hora local)."""
+    _, fim = intervalo_dia(dia)
+    snap = (
+        SaldoEstoque.objects.filter(item_id=item_id, dia__lte=dia)
+        .order_by("-dia").values_list("dia", "qtd").first()
+    )
+    if snap:
+        dia_snap, qtd = snap
+        if dia_snap == dia:
+            return qtd
+        return qtd + _soma_deltas(item_id, intervalo_dia(dia_snap)[1], fim)
+    atual = ItemEstoque.objects.filter(pk=item_id).values_list("qtd_atual", flat=True).first()
+    if atual is None:
+        return None
+    return atual - _soma_deltas(item_id, fim)
+
+
+@transaction.atomic
+def gerar_snapshot(dia):
+    """
+    Grava (ou regrava) o saldo de todos os itens ao fim de `dia`: qtd_atual
+    menos os movimentos posteriores, calculado em uma única consulta.
+    """
+    _, fim = intervalo_dia(dia)
+    posteriores = Coalesce(Sum(DELTA_RELACIONADO, filter=Q(movimentos__criado_em__gte=fim)), 0)
+    linhas = [
+        SaldoEstoque(item_id=pk, dia=dia, qtd=qtd)
+        for pk, qtd in ItemEstoque.objects.annotate(qtd_dia=F("qtd_atual") - posteriores)
+        .order_by().values_list("pk", "qtd_dia")
+    ]
+    SaldoEstoque.objects.bulk_create(
+        linhas, batch_size=1000,
+        update_conflicts=True, unique_fields=["item", "dia"], update_fields=["qtd"],
+    )
+    return len(linhas)
@@ -0,0 +1,13 @@
+# estoque/signals.py
+"""Desfaz o efeito de um movimento excluído no saldo e no consumo do item."""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import MovimentoEstoque
+
+
+@receiver(post_delete, sender=MovimentoEstoque, dispatch_uid="estoque_estornar_movimento")
+def _estornar(sender, instance, **kwargs):
+    # roda dentro da transação do delete; excluir uma entrada já consumida
+    # levanta EstoqueInsuficiente e desfaz a exclusão
+    instance.aplicar(-1)
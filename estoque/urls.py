@@ -7,5 +7,9 @@ urlpatterns = [
     path("itens/", views.ItemEstoqueListView.as_view(), name="item_list"),
     path("itens/novo/", views.ItemEstoqueCreateView.as_view(), name="item_create"),
     path("itens/<int:pk>/editar/", views.ItemEstoqueUpdateView.as_view(), name="item_update"),
+    path("itens/<int:pk>/consumo.json", views.ConsumoItemJsonView.as_view(), name="item_consumo"),
+    path("alertas/", views.AlertaEstoqueView.as_view(), name="alertas"),
+    path("alertas.json", views.AlertaEstoqueJsonView.as_view(), name="alertas_json"),
+    path("retirada/", views.RetiradaFefoView.as_view(), name="retirada_fefo"),
     path("movimento/novo/", views.MovimentoEstoqueCreateView.as_view(), name="movimento_create"),
 ]
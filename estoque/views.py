@@ -1,10 +1,15 @@
 # estoque/views.py
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.views.generic import ListView, CreateView, UpdateView
+from django.views.generic import ListView, CreateView, UpdateView, TemplateView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from .models import ItemEstoque, MovimentoEstoque
-from .forms import ItemEstoqueForm, MovimentoEstoqueForm
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import View
+from django.shortcuts import get_object_or_404
+from . import alertas, consumo, fefo
+from .models import EstoqueInsuficiente, ItemEstoque, MovimentoEstoque
+from .forms import ItemEstoqueForm, MovimentoEstoqueForm, RetiradaFefoForm
 
 class ItemEstoqueListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = ItemEstoque
@@ -35,5 +40,92 @@ class MovimentoEstoqueCreateView(LoginRequiredMixin, PermissionRequiredMixin, Cr
     success_url = reverse_lazy("estoque:item_list")
 
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except EstoqueInsuficiente as e:
+            # outra saída consumiu o saldo entre a validação e a gravação
+            form.add_error("quantidade", e)
+            return self.form_invalid(form)
         messages.success(self.request, "Movimento registrado.")
-        return super().form_valid(form)
+        return response
+
+
+def _dias_validade(request):
+    try:
+        return max(0, min(int(request.GET.get("dias", alertas.DIAS_VALIDADE)), 365))
+    except (TypeError, ValueError):
+        return alertas.DIAS_VALIDADE
+
+
+class AlertaEstoqueView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    template_name = "estoque/alertas.html"
+    permission_required = "estoque.view_itemestoque"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["dias"] = _dias_validade(self.request)
+        ctx["hoje"] = timezone.localdate()
+        ctx["abaixo_minimo"] = alertas.abaixo_minimo()
+        ctx["vencendo"] = alertas.vencendo(ctx["dias"], ctx["hoje"])
+        return ctx
+
+
+class AlertaEstoqueJsonView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = "estoque.view_itemestoque"
+
+    def get(self, request):
+        hoje = timezone.localdate()
+        dias = _dias_validade(request)
+        return JsonResponse({
+            "abaixo_minimo": [alertas.serializar(i, hoje) for i in alertas.abaixo_minimo()],
+            "vencendo": [alertas.serializar(i, hoje) for i in alertas.vencendo(dias, hoje)],
+            "dias": dias,
+        })
+
+
+class ConsumoItemJsonView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Série diária de entradas/saídas de um item (para gráficos de tendência)."""
+
+    permission_required = "estoque.view_itemestoque"
+
+    def get(self, request, pk):
+        item = get_object_or_404(ItemEstoque, pk=pk)
+        try:
+            dias = max(1, min(int(request.GET.get("dias", 90)), 730))
+        except (TypeError, ValueError):
+            dias = 90
+        linhas = consumo.serie(item.pk, dias)
+        return JsonResponse({
+            "item": item.pk,
+            "dias": dias,
+            "datas": [d.isoformat() for d, _, _ in linhas],
+            "entradas": [e for _, e, _ in linhas],
+            "saidas": [s for _, _, s in linhas],
+            "total_saidas": sum(s for _, _, s in linhas),
+        })
+
+
+class RetiradaFefoView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """POST: retira uma quantidade de um material distribuindo entre os lotes (FEFO)."""
+
+    permission_required = "estoque.add_movimentoestoque"
+
+    def post(self, request):
+        form = RetiradaFefoForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"erros": form.errors}, status=400)
+        dados = form.cleaned_data
+        try:
+            movimentos = fefo.retirar(
+                dados["descricao"], dados["quantidade"],
+                motivo=dados["motivo"], consulta=dados["consulta"],
+            )
+        except EstoqueInsuficiente as e:
+            return JsonResponse({"erros": {"quantidade": e.messages}}, status=409)
+        return JsonResponse({
+            "descricao": dados["descricao"],
+            "quantidade": dados["quantidade"],
+            "movimentos": [
+                {"id": m.pk, "item": m.item_id, "quantidade": m.quantidade} for m in movimentos
+            ],
+        }, status=201)
@@ -1,7 +1,8 @@
 # financeiro/admin.py
 from django.contrib import admin
-from django.db.models import Sum
+from app.formatos import brl
 from .models import Fatura, Pagamento
+from painel import snapshot
 
 
 # ==========
@@ -16,6 +17,24 @@ class PagamentoInline(admin.TabularInline):
     show_change_link = True
 
 
+# ==========
+# Filtros
+# ==========
+class SaldoFilter(admin.SimpleListFilter):
+    title = "saldo"
+    parameter_name = "saldo"
+
+    def lookups(self, request, model_admin):
+        return (("aberto", "Em aberto (> 0)"), ("quitado", "Quitado (<= 0)"))
+
+    def queryset(self, request, queryset):
+        if self.value() == "aberto":
+            return queryset.filter(saldo__gt=0)
+        if self.value() == "quitado":
+            return queryset.filter(saldo__lte=0)
+        return queryset
+
+
 # ==========
 # Fatura
 # ==========
@@ -31,62 +50,60 @@ class FaturaAdmin(admin.ModelAdmin):
         "status",
         "criado_em",
     )
-    list_filter = ("status", "origem", "criado_em")
+    list_filter = ("status", SaldoFilter, "origem", "criado_em")
     search_fields = ("paciente__nome", "numero_nfse", "origem")
     ordering = ("-criado_em",)
     date_hierarchy = "criado_em"
     list_per_page = 25
     autocomplete_fields = ("paciente",)
     list_select_related = ("paciente",)
-    readonly_fields = ("criado_em",)
+    readonly_fields = ("status", "criado_em")
     inlines = [PagamentoInline]
 
     # ---------
-    # Helpers de total/saldo
+    # Total/saldo (campos desnormalizados, mantidos pelos pagamentos)
     # ---------
-    def _total_pago(self, obj: Fatura):
-        agg = obj.pagamentos.aggregate(total=Sum("valor"))
-        return agg["total"] or 0
-
-    @admin.display(description="Total pago")
+    @admin.display(description="Total pago", ordering="total_pago")
     def total_pago_formatado(self, obj: Fatura):
-        total = self._total_pago(obj)
-        return f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.total_pago)
 
-    @admin.display(description="Saldo")
+    @admin.display(description="Saldo", ordering="saldo")
     def saldo_formatado(self, obj: Fatura):
-        saldo = (obj.valor or 0) - self._total_pago(obj)
-        return f"R$ {saldo:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.saldo)
 
-    @admin.display(description="Valor")
+    @admin.display(description="Valor", ordering="valor")
     def valor_formatado(self, obj: Fatura):
-        return f"R$ {obj.valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.valor)
 
     # ---------
-    # Ações em massa de status
+    # Ações em massa de status (o status vem dos pagamentos; só o
+    # cancelamento é manual)
     # ---------
-    actions = ["marcar_aberta", "marcar_parcial", "marcar_paga", "marcar_cancelada"]
+    actions = ["marcar_cancelada", "reabrir", "recalcular_status"]
 
     def _set_status(self, request, queryset, status):
         updated = queryset.update(status=status)
+        # update() não dispara signals: recalcula o KPI de pendentes
+        snapshot.recontar(snapshot.FATURAS_PENDENTES)
         self.message_user(request, f"Status atualizado em {updated} fatura(s).")
 
-    def marcar_aberta(self, request, queryset):
-        self._set_status(request, queryset, Fatura.Status.ABERTA)
-    marcar_aberta.short_description = "Marcar como Aberta"
-
-    def marcar_parcial(self, request, queryset):
-        self._set_status(request, queryset, Fatura.Status.PARCIAL)
-    marcar_parcial.short_description = "Marcar como Parcial"
-
-    def marcar_paga(self, request, queryset):
-        self._set_status(request, queryset, Fatura.Status.PAGA)
-    marcar_paga.short_description = "Marcar como Paga"
-
     def marcar_cancelada(self, request, queryset):
         self._set_status(request, queryset, Fatura.Status.CANCELADA)
     marcar_cancelada.short_description = "Marcar como Cancelada"
 
+    def reabrir(self, request, queryset):
+        # volta ao status derivado dos pagamentos
+        self._set_status(
+            request,
+            queryset.filter(status=Fatura.Status.CANCELADA),
+            Fatura.expressao_status(manter_cancelada=False),
+        )
+    reabrir.short_description = "Reabrir canceladas"
+
+    def recalcular_status(self, request, queryset):
+        self._set_status(request, queryset.exclude(status=Fatura.Status.CANCELADA), Fatura.expressao_status())
+    recalcular_status.short_description = "Recalcular status pelos pagamentos"
+
 
 # ==========
 # Pagamento
@@ -109,4 +126,4 @@ class PagamentoAdmin(admin.ModelAdmin):
 
     @admin.display(description="Valor")
     def valor_formatado(self, obj: Pagamento):
-        return f"R$ {obj.valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.valor)
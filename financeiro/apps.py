@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FinanceiroConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'financeiro'
+
+    def ready(self):
+        # estorno de pagamentos excluídos no total da fatura
+        from . import signals  # noqa: F401
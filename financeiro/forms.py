@@ -1,11 +1,29 @@
 # financeiro/forms.py
 from django import forms
+from pacientes.widgets import PacienteAutocomplete
 from .models import Fatura, Pagamento
 
 class FaturaForm(forms.ModelForm):
+    # o status é derivado dos pagamentos; só o cancelamento é manual
+    cancelada = forms.BooleanField(required=False, label="Cancelada")
+
     class Meta:
         model = Fatura
-        fields = ["paciente", "origem", "valor", "status", "numero_nfse"]
+        fields = ["paciente", "origem", "valor", "numero_nfse"]
+        widgets = {"paciente": PacienteAutocomplete()}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["cancelada"].initial = self.instance.status == Fatura.Status.CANCELADA
+
+    def save(self, commit=True):
+        fatura = self.instance
+        if self.cleaned_data.get("cancelada"):
+            fatura.status = Fatura.Status.CANCELADA
+        elif fatura.status == Fatura.Status.CANCELADA:
+            # reabrir: Fatura.save deriva o status a partir dos pagamentos
+            fatura.status = Fatura.Status.ABERTA
+        return super().save(commit)
 
 class PagamentoForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,20 @@
+# financeiro/management/commands/recompute_faturas.py
+from django.core.management.base import BaseCommand
+
+from financeiro import saldos
+
+
+class Command(BaseCommand):
+    help = "Recalcula total pago, saldo e status de todas as faturas com UPDATEs em massa."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sem-totais", action="store_true",
+            help="Mantém total_pago e recalcula apenas saldo e status.",
+        )
+
+    def handle(self, *args, **options):
+        r = saldos.recalcular(totais=not options["sem_totais"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Totais: {r['totais']} · saldos corrigidos: {r['saldos']} · status corrigidos: {r['status']}."
+        ))
@@ -0,0 +1,26 @@
+# financeiro/management/commands/reconcile_faturas.py
+from django.core.management.base import BaseCommand
+
+from financeiro import saldos
+
+
+class Command(BaseCommand):
+    help = "Confere total pago/saldo das faturas contra a soma dos pagamentos e corrige divergências."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=1000, help="Faturas por bloco (padrão: 1000).")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas lista as divergências, sem gravar.")
+
+    def handle(self, *args, **options):
+        corrigir = not options["dry_run"]
+        total = 0
+        for pk, gravado, real in saldos.conferir(chunk=options["chunk"], corrigir=corrigir):
+            total += 1
+            if options["verbosity"] > 1 or not corrigir:
+                self.stdout.write(f"Fatura #{pk}: total pago {gravado} → {real}")
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Nenhuma divergência encontrada."))
+        elif corrigir:
+            self.stdout.write(self.style.SUCCESS(f"{total} fatura(s) corrigida(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{total} fatura(s) divergente(s) (dry-run, nada gravado)."))
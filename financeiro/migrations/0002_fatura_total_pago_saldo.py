@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_totais(apps, schema_editor):
+    # um único UPDATE com subconsulta correlacionada por fatura
+    Fatura = apps.get_model("financeiro", "Fatura")
+    Pagamento = apps.get_model("financeiro", "Pagamento")
+    soma = (
+        Pagamento.objects.filter(fatura=OuterRef("pk"))
+        .values("fatura")
+        .annotate(total=Sum("valor"))
+        .values("total")
+    )
+    zero = Value(Decimal("0"), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+    Fatura.objects.update(total_pago=Coalesce(Subquery(soma), zero))
+    Fatura.objects.update(saldo=F("valor") - F("total_pago"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fatura',
+            name='saldo',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='fatura',
+            name='total_pago',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,16 @@
 # financeiro/models.py
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
 from pacientes.models import Paciente
 
+# Campos mantidos pelos pagamentos (ver Pagamento.save e financeiro.signals);
+# o status também é derivado deles, exceto CANCELADA
+CAMPOS_PAGAMENTO = ("total_pago", "saldo")
+CENTAVO = Decimal("0.01")
+
 class Fatura(models.Model):
     class Status(models.TextChoices):
         ABERTA = "AB", "Aberta"
@@ -16,6 +25,10 @@ class Fatura(models.Model):
     numero_nfse = models.CharField(max_length=60, blank=True)
     criado_em = models.DateTimeField(auto_now_add=True)
 
+    # Desnormalizados: soma dos pagamentos e valor - total_pago
+    total_pago = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    saldo = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, db_index=True)
+
     class Meta:
         ordering = ["-criado_em"]
         verbose_name = "Fatura"
@@ -24,6 +37,82 @@ class Fatura(models.Model):
     def __str__(self):
         return f"Fatura #{self.id} - {self.paciente.nome} ({self.get_status_display()})"
 
+    # ---------
+    # Status derivado dos pagamentos (CANCELADA é a única escolha manual)
+    # ---------
+    @classmethod
+    def derivar_status(cls, status, valor, total_pago):
+        if status == cls.Status.CANCELADA:
+            return status
+        if total_pago >= valor:
+            return cls.Status.PAGA
+        if total_pago <= 0:
+            return cls.Status.ABERTA
+        return cls.Status.PARCIAL
+
+    @classmethod
+    def expressao_status(cls, total_pago=F("total_pago"), valor=F("valor"), manter_cancelada=True):
+        """Mesma regra de derivar_status como expressão SQL (para UPDATEs em massa)."""
+        casos = [models.When(status=cls.Status.CANCELADA, then=F("status"))] if manter_cancelada else []
+        return models.Case(
+            *casos,
+            models.When(GreaterThanOrEqual(total_pago, valor), then=models.Value(cls.Status.PAGA)),
+            models.When(LessThanOrEqual(total_pago, 0), then=models.Value(cls.Status.ABERTA)),
+            default=models.Value(cls.Status.PARCIAL),
+            output_field=models.CharField(),
+        )
+
+    def _aplicar_totais(self, total_pago):
+        self.total_pago = total_pago or 0
+        self.saldo = (self.valor or 0) - self.total_pago
+        self.status = self.derivar_status(self.status, self.valor or 0, self.total_pago)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self._aplicar_totais(self.total_pago)
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # relê o total travando a linha: um pagamento concorrente pode ter
+            # mudado o valor depois que esta instância foi carregada
+            total = (
+                Fatura.objects.select_for_update().filter(pk=self.pk)
+                .values_list("total_pago", flat=True).first()
+            )
+            self._aplicar_totais(total if total is not None else self.total_pago)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], *CAMPOS_PAGAMENTO, "status"}
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def aplicar_pagamento(fatura_id, delta):
+        """
+        Soma `delta` ao total pago, ajusta saldo e status com um UPDATE na
+        linha travada e atualiza o KPI de faturas pendentes se o status mudou.
+
+        Os novos valores são calculados em Decimal e gravados como literais:
+        F("total_pago") + delta no SQLite vira REAL e acumula erro de centavos.
+        """
+        if not fatura_id or not delta:
+            return
+        from painel import snapshot
+
+        with transaction.atomic():
+            antes = (
+                Fatura.objects.select_for_update().filter(pk=fatura_id)
+                .values("status", "valor", "total_pago").first()
+            )
+            if antes is None:
+                return
+            total_pago = (antes["total_pago"] + Decimal(delta)).quantize(CENTAVO)
+            depois = Fatura.derivar_status(antes["status"], antes["valor"], total_pago)
+            Fatura.objects.filter(pk=fatura_id).update(
+                total_pago=total_pago, saldo=antes["valor"] - total_pago, status=depois
+            )
+            pendentes = snapshot.status_pendentes()
+            snapshot.aplicar(
+                snapshot.FATURAS_PENDENTES, (depois in pendentes) - (antes["status"] in pendentes)
+            )
+
 
 class Pagamento(models.Model):
     class Metodo(models.TextChoices):
@@ -45,3 +134,17 @@ class Pagamento(models.Model):
 
     def __str__(self):
         return f"{self.get_metodo_pagamento_display()} - {self.valor} em {self.pago_em:%d/%m/%Y}"
+
+    def save(self, *args, **kwargs):
+        # o pagamento e o ajuste do total da fatura entram na mesma transação
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = (
+                    Pagamento.objects.filter(pk=self.pk).values_list("fatura_id", "valor").first()
+                )
+            super().save(*args, **kwargs)
+            if anterior:
+                Fatura.aplicar_pagamento(anterior[0], -anterior[1])
+            Fatura.aplicar_pagamento(self.fatura_id, self.valor)
+
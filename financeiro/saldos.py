@@ -0,0 +1,97 @@
+# financeiro/saldos.py
+"""
+Conferência dos campos desnormalizados Fatura.total_pago / Fatura.saldo.
+
+Em operação normal eles são mantidos por Pagamento.save e pelo signal de
+exclusão (UPDATE com F() na mesma transação). Escritas que contornam o ORM
+(SQL direto, bulk_create de pagamentos, fixtures) podem deixá-los
+divergentes; `conferir` percorre as faturas em blocos por pk, compara com
+a soma real dos pagamentos e, se pedido, corrige o bloco com bulk_update.
+`recalcular` faz o mesmo para a base inteira com três UPDATEs (totais,
+saldo e status), sem trazer linhas para o Python.
+
+No SQLite a aritmética com decimais no SQL é feita em REAL (150.30 - 100.10
+dá 50.199999...); por isso `recalcular` arredonda os dois lados a centavos
+antes de comparar e grava o valor arredondado, concordando com `conferir`.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import Fatura, Pagamento
+
+ZERO = Value(Decimal("0"), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def _centavos(expressao):
+    return Cast(Round(expressao, 2), DecimalField(max_digits=10, decimal_places=2))
+
+
+def _bloco(ultimo, chunk):
+    return list(
+        Fatura.objects.filter(pk__gt=ultimo)
+        .order_by("pk")
+        .annotate(soma_pagamentos=Coalesce(Sum("pagamentos__valor"), ZERO))
+        .only("pk", "valor", "total_pago", "saldo")[:chunk]
+    )
+
+
+def conferir(chunk=1000, corrigir=False):
+    """
+    Gera (fatura_id, total_pago_gravado, total_pago_real) para cada fatura divergente.
+    Com `corrigir=True` grava os valores reais, um bloco por transação.
+    """
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            bloco = _bloco(ultimo, chunk)
+            if not bloco:
+                return
+            divergentes = []
+            for f in bloco:
+                real = f.soma_pagamentos
+                if f.total_pago != real or f.saldo != f.valor - real:
+                    divergentes.append((f.pk, f.total_pago, real))
+                    f.total_pago, f.saldo = real, f.valor - real
+            if corrigir and divergentes:
+                ids = {pk for pk, _, _ in divergentes}
+                Fatura.objects.bulk_update([f for f in bloco if f.pk in ids], ["total_pago", "saldo"])
+        yield from divergentes
+        ultimo = bloco[-1].pk
+
+
+@transaction.atomic
+def recalcular(totais=True):
+    """
+    Recalcula total_pago (opcional), saldo e status de todas as faturas em
+    UPDATEs set-based. Retorna {"totais": n, "saldos": n, "status": n}.
+    """
+    from painel import snapshot
+
+    resultado = {"totais": 0}
+    if totais:
+        soma = (
+            Pagamento.objects.filter(fatura=OuterRef("pk"))
+            .values("fatura")
+            .annotate(total=Sum("valor"))
+            .values("total")
+        )
+        resultado["totais"] = Fatura.objects.update(total_pago=_centavos(Coalesce(Subquery(soma), ZERO)))
+    saldo = _centavos(F("valor") - F("total_pago"))
+    resultado["saldos"] = (
+        Fatura.objects.annotate(saldo_gravado=_centavos(F("saldo")), saldo_certo=saldo)
+        .filter(~Q(saldo_gravado=F("saldo_certo")))
+        .update(saldo=saldo)
+    )
+    # só toca as linhas cujo status derivado difere do gravado
+    derivado = Fatura.expressao_status()
+    resultado["status"] = (
+        Fatura.objects.exclude(status=Fatura.Status.CANCELADA)
+        .annotate(status_derivado=derivado)
+        .filter(~Q(status=F("status_derivado")))
+        .update(status=derivado)
+    )
+    snapshot.recontar(snapshot.FATURAS_PENDENTES)
+    return resultado
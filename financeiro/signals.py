@@ -0,0 +1,17 @@
+# financeiro/signals.py
+"""Estorna o pagamento do total da fatura quando ele é excluído."""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Fatura, Pagamento
+
+
+@receiver(post_delete, sender=Pagamento, dispatch_uid="financeiro_estornar_pagamento")
+def _estornar(sender, instance, origin=None, **kwargs):
+    # exclusão da própria fatura (cascata): não há status a recalcular e o
+    # KPI de pendentes sai no post_delete da fatura (painel.signals); estornar
+    # aqui deixaria a fatura "aberta" por um instante e somaria +1 ao KPI
+    if isinstance(origin, Fatura) or getattr(origin, "model", None) is Fatura:
+        return
+    # roda dentro da transação do delete (inclusive queryset.delete())
+    Fatura.aplicar_pagamento(instance.fatura_id, -instance.valor)
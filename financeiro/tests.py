@@ -0,0 +1,132 @@
+# financeiro/tests.py
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from painel import snapshot
+from pacientes.models import Paciente
+
+from . import saldos
+from .models import Fatura, Pagamento
+
+
+class ExclusaoFaturaSnapshotTests(TestCase):
+    def setUp(self):
+        self.paciente = Paciente.objects.create(
+            nome="Ana Souza", cpf="111.222.333-44", data_nascimento=date(1990, 1, 1), telefone="11912345678",
+        )
+        Fatura.objects.create(paciente=self.paciente, valor=Decimal("50"))
+        snapshot.recontar(snapshot.FATURAS_PENDENTES)
+
+    def fatura_paga(self):
+        fatura = Fatura.objects.create(paciente=self.paciente, valor=Decimal("100"))
+        Pagamento.objects.create(fatura=fatura, metodo_pagamento=Pagamento.Metodo.PIX, valor=Decimal("100"))
+        fatura.refresh_from_db()
+        self.assertEqual(fatura.status, Fatura.Status.PAGA)
+        return fatura
+
+    def assertSnapshotConfere(self):
+        self.assertEqual(
+            snapshot.ler(snapshot.FATURAS_PENDENTES)[snapshot.FATURAS_PENDENTES],
+            snapshot.contar(snapshot.FATURAS_PENDENTES),
+        )
+
+    def test_excluir_fatura_paga_com_pagamentos(self):
+        self.fatura_paga().delete()
+        self.assertSnapshotConfere()
+
+    def test_excluir_faturas_pagas_em_massa(self):
+        self.fatura_paga()
+        Fatura.objects.filter(status=Fatura.Status.PAGA).delete()
+        self.assertSnapshotConfere()
+
+    def test_excluir_pagamento_reabre_fatura(self):
+        fatura = self.fatura_paga()
+        fatura.pagamentos.get().delete()
+        fatura.refresh_from_db()
+        self.assertEqual(fatura.status, Fatura.Status.ABERTA)
+        self.assertSnapshotConfere()
+
+
+class PagamentoTotaisTests(TestCase):
+    def setUp(self):
+        paciente = Paciente.objects.create(
+            nome="Bruno Lima", cpf="555.666.777-88", data_nascimento=date(1985, 5, 5), telefone="11987654321",
+        )
+        self.fatura = Fatura.objects.create(paciente=paciente, valor=Decimal("0.30"))
+
+    def pagar(self, valor, fatura=None):
+        return Pagamento.objects.create(
+            fatura=fatura or self.fatura, metodo_pagamento=Pagamento.Metodo.PIX, valor=Decimal(valor)
+        )
+
+    def assertTotais(self, total_pago, saldo, status):
+        self.fatura.refresh_from_db()
+        self.assertEqual(
+            (self.fatura.total_pago, self.fatura.saldo, self.fatura.status),
+            (Decimal(total_pago), Decimal(saldo), status),
+        )
+
+    def test_pagamentos_mudam_status(self):
+        self.pagar("0.10")
+        self.assertTotais("0.10", "0.20", Fatura.Status.PARCIAL)
+        self.pagar("0.20")
+        self.assertTotais("0.30", "0", Fatura.Status.PAGA)
+
+    def test_saldo_zerado_exato_no_banco(self):
+        # 0.10 + 0.20 somados como REAL no SQLite deixariam saldo = -5.5e-17
+        self.pagar("0.10")
+        self.pagar("0.20")
+        self.assertTrue(Fatura.objects.filter(pk=self.fatura.pk, saldo=0).exists())
+        self.assertFalse(Fatura.objects.filter(pk=self.fatura.pk, saldo__lt=0).exists())
+
+    def test_estorno_reabre_fatura(self):
+        primeiro = self.pagar("0.10")
+        segundo = self.pagar("0.20")
+        segundo.delete()
+        self.assertTotais("0.10", "0.20", Fatura.Status.PARCIAL)
+        primeiro.delete()
+        self.assertTotais("0", "0.30", Fatura.Status.ABERTA)
+        self.assertTrue(Fatura.objects.filter(pk=self.fatura.pk, total_pago=0, saldo=Decimal("0.30")).exists())
+
+    def test_alterar_valor_do_pagamento(self):
+        pagamento = self.pagar("0.30")
+        pagamento.valor = Decimal("0.05")
+        pagamento.save()
+        self.assertTotais("0.05", "0.25", Fatura.Status.PARCIAL)
+
+    def test_mover_pagamento_para_outra_fatura(self):
+        outra = Fatura.objects.create(paciente=self.fatura.paciente, valor=Decimal("0.10"))
+        pagamento = self.pagar("0.10")
+        pagamento.fatura = outra
+        pagamento.save()
+        self.assertTotais("0", "0.30", Fatura.Status.ABERTA)
+        outra.refresh_from_db()
+        self.assertEqual((outra.total_pago, outra.saldo, outra.status), (Decimal("0.10"), Decimal("0"), Fatura.Status.PAGA))
+
+    def test_fatura_cancelada_continua_cancelada(self):
+        self.fatura.status = Fatura.Status.CANCELADA
+        self.fatura.save()
+        self.pagar("0.30")
+        self.assertTotais("0.30", "0", Fatura.Status.CANCELADA)
+
+
+class RecalcularSaldosTests(TestCase):
+    def setUp(self):
+        paciente = Paciente.objects.create(
+            nome="Carla Dias", cpf="999.888.777-66", data_nascimento=date(1970, 7, 7), telefone="11955554444",
+        )
+        self.fatura = Fatura.objects.create(paciente=paciente, valor=Decimal("150.30"))
+        Pagamento.objects.create(fatura=self.fatura, metodo_pagamento=Pagamento.Metodo.PIX, valor=Decimal("100.10"))
+
+    def test_saldo_correto_nao_e_regravado(self):
+        # 150.30 - 100.10 em REAL dá 50.199999...; o saldo gravado (50.20) está certo
+        self.assertEqual(list(saldos.conferir()), [])
+        self.assertEqual(saldos.recalcular(), {"totais": 1, "saldos": 0, "status": 0})
+
+    def test_corrige_saldo_divergente(self):
+        Fatura.objects.filter(pk=self.fatura.pk).update(saldo=Decimal("150.30"))
+        self.assertEqual(saldos.recalcular(totais=False)["saldos"], 1)
+        self.assertTrue(Fatura.objects.filter(pk=self.fatura.pk, saldo=Decimal("50.20")).exists())
+        self.assertEqual(list(saldos.conferir()), [])
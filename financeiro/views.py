@@ -3,6 +3,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.urls import reverse_lazy
 from django.contrib import messages
+from app.paginacao import KeysetPaginationMixin
 from .models import Fatura, Pagamento
 from .forms import FaturaForm, PagamentoForm
 
@@ -10,12 +11,13 @@ from .forms import FaturaForm, PagamentoForm
 from pacientes.models import Paciente
 from django.db.models import Q
 
-class FaturaListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class FaturaListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     model = Fatura
     template_name = "financeiro/fatura_list.html"
     context_object_name = "faturas"
     paginate_by = 20
     permission_required = "financeiro.view_fatura"
+    keyset_ordering = ("-criado_em", "-id")
 
     def get_queryset(self):
         qs = super().get_queryset().select_related("paciente")
@@ -33,6 +35,13 @@ class FaturaListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
         if status:
             qs = qs.filter(status=status)
 
+        # saldo desnormalizado: filtra sem agregar pagamentos
+        saldo = self.request.GET.get("saldo")
+        if saldo == "aberto":
+            qs = qs.filter(saldo__gt=0)
+        elif saldo == "quitado":
+            qs = qs.filter(saldo__lte=0)
+
         # (Opcional) busca simples do search_filter (q)
         q = self.request.GET.get("q")
         if q:
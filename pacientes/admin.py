@@ -1,6 +1,7 @@
 # pacientes/admin.py
 from django.contrib import admin
 from datetime import date
+from . import busca
 from .models import Paciente
 
 
@@ -21,8 +22,8 @@ class PacienteAdmin(admin.ModelAdmin):
     ordering = ("nome",)
     date_hierarchy = "criado_em"
 
-    # busca e filtros
-    search_fields = ("nome", "cpf", "email", "telefone")
+    # busca e filtros (CPF/telefone digitados, com ou sem DDD, vão para as colunas normalizadas)
+    search_fields = ("nome", "email")
     list_filter = ("criado_em", "atualizado_em", "data_nascimento")
 
     # edição
@@ -40,6 +41,12 @@ class PacienteAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if busca.parece_documento(termo):
+            return queryset.filter(busca.filtro_documento(termo)), False
+        return super().get_search_results(request, queryset, search_term)
+
     @admin.display(description="Idade", ordering="data_nascimento")
     def idade(self, obj: Paciente):
         """Calcula idade aproximada a partir da data de nascimento."""
@@ -0,0 +1,183 @@
+# pacientes/busca.py
+"""
+Índice de busca textual de pacientes (tabela FTS5 "sombra" no SQLite).
+
+A tabela pacientes_paciente_fts usa rowid = Paciente.id e é mantida pelos
+signals de pacientes.signals (save, arquivamento e exclusão). A busca faz
+match por prefixo em cada termo digitado e ordena por relevância (bm25),
+então o custo depende do número de resultados, não do tamanho da base.
+Buscas que parecem CPF/telefone vão direto às colunas normalizadas
+(cpf_digitos/telefone_digitos, e telefone_local para o número sem DDD)
+por igualdade ou prefixo indexado.
+Em bancos sem FTS5 cai no filtro icontains original.
+
+`autocompletar` atende o campo de paciente dos formulários: no máximo
+LIMITE_AUTOCOMPLETE linhas (id, nome, cpf) de pacientes ativos.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Paciente, so_digitos
+
+TABELA = "pacientes_paciente_fts"
+LIMITE_RESULTADOS = 200
+LIMITE_AUTOCOMPLETE = 20
+MINIMO_AUTOCOMPLETE = 2
+_TERMO = re.compile(r"\w+", re.UNICODE)
+_DOCUMENTO = re.compile(r"^[\d\s.\-()/+]+$")
+
+SQL_CRIAR = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5(
+    nome, cpf, email, ativo UNINDEXED,
+    tokenize = "unicode61 remove_diacritics 2"
+)
+"""
+SQL_REMOVER = f"DROP TABLE IF EXISTS {TABELA}"
+
+
+def disponivel(conn=None):
+    return (conn or connection).vendor == "sqlite"
+
+
+def _linha(paciente):
+    # CPF entra com e sem pontuação para casar "123.456" e "123456"
+    return (
+        paciente.pk,
+        paciente.nome,
+        f"{paciente.cpf} {so_digitos(paciente.cpf)}",
+        paciente.email or "",
+        1 if paciente.is_active else 0,
+    )
+
+
+def indexar(paciente):
+    if not disponivel():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA} WHERE rowid = %s", [paciente.pk])
+        cursor.execute(
+            f"INSERT INTO {TABELA} (rowid, nome, cpf, email, ativo) VALUES (%s, %s, %s, %s, %s)",
+            _linha(paciente),
+        )
+
+
+def remover(pk):
+    if not disponivel():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA} WHERE rowid = %s", [pk])
+
+
+def reconstruir(pacientes, chunk=2000, conn=None):
+    """Recria o índice a partir de um iterável de pacientes; retorna o total."""
+    conn = conn or connection
+    if not disponivel(conn):
+        return 0
+    total = 0
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA}")
+        lote = []
+        for paciente in pacientes:
+            lote.append(_linha(paciente))
+            if len(lote) >= chunk:
+                _inserir(cursor, lote)
+                total += len(lote)
+                lote = []
+        _inserir(cursor, lote)
+        total += len(lote)
+    return total
+
+
+def _inserir(cursor, linhas):
+    if linhas:
+        cursor.executemany(
+            f"INSERT INTO {TABELA} (rowid, nome, cpf, email, ativo) VALUES (%s, %s, %s, %s, %s)",
+            linhas,
+        )
+
+
+def expressao(q):
+    """Converte o texto digitado em uma consulta FTS5: todos os termos, por prefixo."""
+    termos = _TERMO.findall(q)
+    return " ".join(f'"{t}"*' for t in termos)
+
+
+def ids_ranqueados(q, ativo=True, limite=LIMITE_RESULTADOS):
+    expr = expressao(q)
+    if not expr:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {TABELA} WHERE {TABELA} MATCH %s AND ativo = %s "
+            f"ORDER BY bm25({TABELA}, 10.0, 5.0, 1.0, 0.0) LIMIT %s",
+            [expr, 1 if ativo else 0, limite],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def parece_documento(q):
+    """CPF ou telefone digitado (só dígitos e pontuação, ao menos 3 dígitos)."""
+    return bool(_DOCUMENTO.match(q)) and len(so_digitos(q)) >= 3
+
+
+def _prefixo(campo, prefixo):
+    # intervalo [prefixo, prefixo+1) usa o índice em qualquer banco (LIKE nem sempre)
+    proximo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return Q(**{f"{campo}__gte": prefixo, f"{campo}__lt": proximo})
+
+
+def filtro_documento(q):
+    """
+    Igualdade no CPF completo; prefixo no CPF ou telefone normalizados e no
+    telefone sem DDD (número digitado sem o código de área).
+    """
+    digitos = so_digitos(q)
+    telefone = _prefixo("telefone_digitos", digitos) | _prefixo("telefone_local", digitos)
+    if len(digitos) == 11:
+        return Q(cpf_digitos=digitos) | telefone
+    return _prefixo("cpf_digitos", digitos) | telefone
+
+
+def buscar(qs, q, ativo=True):
+    """
+    Filtra `qs` pelos pacientes que casam com `q`, ordenados por relevância.
+    Devolve (queryset, ja_ordenado, limitada); `limitada` indica que a busca
+    textual tinha mais que LIMITE_RESULTADOS resultados e só os mais
+    relevantes vieram.
+    """
+    if parece_documento(q):
+        return qs.filter(filtro_documento(q)).order_by("nome", "pk"), True, False
+    if not disponivel():
+        return qs.filter(Q(nome__icontains=q) | Q(cpf__icontains=q) | Q(email__icontains=q)), False, False
+    # um a mais só para saber se o limite cortou resultados
+    ids = ids_ranqueados(q, ativo=ativo, limite=LIMITE_RESULTADOS + 1)
+    limitada = len(ids) > LIMITE_RESULTADOS
+    ids = ids[:LIMITE_RESULTADOS]
+    if not ids:
+        return qs.none(), True, False
+    posicao = Case(
+        *[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return qs.filter(pk__in=ids).annotate(relevancia=posicao).order_by("relevancia"), True, limitada
+
+
+def autocompletar(q, limite=LIMITE_AUTOCOMPLETE):
+    """[(id, nome, cpf)] dos pacientes ativos que casam com `q` por prefixo."""
+    q = q.strip()
+    if len(q) < MINIMO_AUTOCOMPLETE:
+        return []
+    qs = Paciente.objects.filter(is_active=True)
+    if parece_documento(q):
+        qs = qs.filter(filtro_documento(q)).order_by("nome", "pk")
+    elif disponivel():
+        ids = ids_ranqueados(q, ativo=True, limite=limite)
+        if not ids:
+            return []
+        por_id = {linha[0]: linha for linha in qs.filter(pk__in=ids).values_list("id", "nome", "cpf")}
+        return [por_id[pk] for pk in ids if pk in por_id]
+    else:
+        qs = qs.filter(nome__istartswith=q).order_by("nome", "pk")
+    return list(qs.values_list("id", "nome", "cpf")[:limite])
@@ -0,0 +1,22 @@
+# pacientes/management/commands/rebuild_busca_pacientes.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pacientes import busca
+from pacientes.models import Paciente
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de busca textual (FTS5) de pacientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=2000, help="Linhas por lote (padrão: 2000).")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if not busca.disponivel():
+            self.stdout.write(self.style.WARNING("Banco sem FTS5: nada a fazer."))
+            return
+        pacientes = Paciente.objects.order_by("pk").iterator(chunk_size=options["chunk"])
+        total = busca.reconstruir(pacientes, chunk=options["chunk"])
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruído: {total} paciente(s)."))
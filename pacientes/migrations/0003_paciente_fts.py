@@ -0,0 +1,35 @@
+# Índice FTS5 de pacientes (apenas SQLite; em outros bancos é um no-op)
+
+from django.db import migrations
+
+
+def criar_indice(apps, schema_editor):
+    from pacientes import busca
+
+    conn = schema_editor.connection
+    if not busca.disponivel(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(busca.SQL_CRIAR)
+    Paciente = apps.get_model("pacientes", "Paciente")
+    busca.reconstruir(Paciente.objects.using(conn.alias).order_by("pk").iterator(), conn=conn)
+
+
+def remover_indice(apps, schema_editor):
+    from pacientes import busca
+
+    conn = schema_editor.connection
+    if busca.disponivel(conn):
+        with conn.cursor() as cursor:
+            cursor.execute(busca.SQL_REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0002_paciente_deleted_at_paciente_is_active'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
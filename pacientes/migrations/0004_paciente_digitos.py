@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+import re
+
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def preencher_digitos(apps, schema_editor):
+    # backfill em lotes por pk para não carregar a tabela inteira
+    Paciente = apps.get_model("pacientes", "Paciente")
+    ultimo = 0
+    while True:
+        lote = list(
+            Paciente.objects.filter(pk__gt=ultimo).order_by("pk").only("pk", "cpf", "telefone")[:LOTE]
+        )
+        if not lote:
+            break
+        for p in lote:
+            p.cpf_digitos = re.sub(r"\D", "", p.cpf or "")
+            p.telefone_digitos = re.sub(r"\D", "", p.telefone or "")
+        Paciente.objects.bulk_update(lote, ["cpf_digitos", "telefone_digitos"])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0003_paciente_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='cpf_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='telefone_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(preencher_digitos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+import re
+
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def numero_local(digitos):
+    # cópia de pacientes.models.numero_local na data desta migração
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    if len(digitos) in (10, 11):
+        digitos = digitos[2:]
+    return digitos
+
+
+def preencher_telefone_local(apps, schema_editor):
+    Paciente = apps.get_model("pacientes", "Paciente")
+    ultimo = 0
+    while True:
+        lote = list(Paciente.objects.filter(pk__gt=ultimo).order_by("pk").only("pk", "telefone")[:LOTE])
+        if not lote:
+            break
+        for p in lote:
+            p.telefone_local = numero_local(re.sub(r"\D", "", p.telefone or ""))
+        Paciente.objects.bulk_update(lote, ["telefone_local"])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0004_paciente_digitos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='telefone_local',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(preencher_telefone_local, migrations.RunPython.noop),
+    ]
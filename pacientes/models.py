@@ -1,6 +1,22 @@
+import re
+
 from django.db import models
 from django.utils import timezone
 
+
+def so_digitos(valor):
+    return re.sub(r"\D", "", valor or "")
+
+
+def numero_local(digitos):
+    """Telefone sem o código do país (55) e sem o DDD: como costuma ser digitado."""
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    if len(digitos) in (10, 11):
+        digitos = digitos[2:]
+    return digitos
+
+
 class Paciente(models.Model):
     nome = models.CharField(max_length=250)
     cpf = models.CharField(unique=True)
@@ -9,6 +25,12 @@ class Paciente(models.Model):
     email = models.EmailField(blank=True)
     endereco = models.TextField(blank=True)
 
+    # Colunas de busca normalizadas (apenas dígitos), preenchidas no save()
+    cpf_digitos = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    telefone_digitos = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    # número sem DDD: busca pelo telefone digitado sem o código de área
+    telefone_local = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+
     # Controle de exclusão lógica
     is_active = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
@@ -24,6 +46,18 @@ class Paciente(models.Model):
     def __str__(self):
         return self.nome
 
+    def normalizar(self):
+        self.cpf_digitos = so_digitos(self.cpf)
+        self.telefone_digitos = so_digitos(self.telefone)
+        self.telefone_local = numero_local(self.telefone_digitos)
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"cpf", "telefone"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"cpf_digitos", "telefone_digitos", "telefone_local"}
+        super().save(*args, **kwargs)
+
     # Método para "excluir" logicamente
     def delete(self, using=None, keep_parents=False):
         self.is_active = False
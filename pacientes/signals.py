@@ -0,0 +1,19 @@
+# pacientes/signals.py
+"""Mantém o índice de busca (pacientes.busca) em sincronia com Paciente."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busca
+from .models import Paciente
+
+
+@receiver(post_save, sender=Paciente, dispatch_uid="pacientes_busca_indexar")
+def _indexar(sender, instance, raw=False, **kwargs):
+    # inclui o arquivamento (exclusão lógica salva is_active=False)
+    if not raw:
+        busca.indexar(instance)
+
+
+@receiver(post_delete, sender=Paciente, dispatch_uid="pacientes_busca_remover")
+def _remover(sender, instance, **kwargs):
+    busca.remover(instance.pk)
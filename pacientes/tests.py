@@ -0,0 +1,88 @@
+# pacientes/tests.py
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase
+
+from . import busca
+from .models import Paciente
+
+
+class PacienteAutocompleteTests(TestCase):
+    url = "/pacientes/autocomplete"
+
+    def setUp(self):
+        Paciente.objects.create(
+            nome="Ana Souza", cpf="111.222.333-44", data_nascimento=date(1990, 1, 1), telefone="(11) 97049-9843",
+        )
+        self.usuario = User.objects.create_user("recepcao", password="x")
+        self.client.force_login(self.usuario)
+
+    def test_sem_permissao_recebe_403(self):
+        resposta = self.client.get(self.url, {"q": "Ana"})
+        self.assertEqual(resposta.status_code, 403)
+
+    def test_com_permissao_lista_pacientes(self):
+        self.usuario.user_permissions.add(Permission.objects.get(codename="view_paciente"))
+        resposta = self.client.get(self.url, {"q": "Ana"})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            resposta.json()["resultados"], [{"id": Paciente.objects.get().pk, "nome": "Ana Souza", "cpf": "111.222.333-44"}]
+        )
+
+
+class BuscaTelefoneTests(TestCase):
+    def setUp(self):
+        self.paciente = Paciente.objects.create(
+            nome="Ana Souza", cpf="111.222.333-44", data_nascimento=date(1990, 1, 1), telefone="(11) 97049-9843",
+        )
+
+    def buscar(self, termo):
+        return list(Paciente.objects.filter(busca.filtro_documento(termo)))
+
+    def test_telefone_sem_ddd(self):
+        self.assertEqual(self.buscar("97049-9843"), [self.paciente])
+        self.assertEqual(self.buscar("97049"), [self.paciente])
+
+    def test_telefone_com_ddd_e_codigo_do_pais(self):
+        self.assertEqual(self.buscar("(11) 97049-9843"), [self.paciente])
+        self.paciente.telefone = "+55 11 97049-9843"
+        self.paciente.save(update_fields=["telefone"])
+        self.assertEqual(self.buscar("97049-9843"), [self.paciente])
+
+    def test_busca_do_admin_sem_ddd(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        resposta = self.client.get("/admin/pacientes/paciente/", {"q": "97049-9843"})
+        self.assertEqual(list(resposta.context["cl"].result_list), [self.paciente])
+
+
+class BuscaLimitadaTests(TestCase):
+    def setUp(self):
+        for n in range(3):
+            Paciente.objects.create(
+                nome=f"Carlos Silva {n}", cpf=f"000.000.000-0{n}", data_nascimento=date(1980, 1, 1),
+                telefone="(11) 3333-4444",
+            )
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+
+    def test_aviso_quando_o_limite_corta_resultados(self):
+        with mock.patch.object(busca, "LIMITE_RESULTADOS", 2):
+            resposta = self.client.get("/pacientes/", {"q": "silva"})
+        self.assertTrue(resposta.context["busca_limitada"])
+        self.assertEqual(len(resposta.context["pacientes"]), 2)
+        self.assertContains(resposta, "Refine a busca")
+
+    def test_sem_aviso_dentro_do_limite(self):
+        with mock.patch.object(busca, "LIMITE_RESULTADOS", 3):
+            resposta = self.client.get("/pacientes/", {"q": "silva"})
+        self.assertFalse(resposta.context["busca_limitada"])
+        self.assertNotContains(resposta, "Refine a busca")
+
+    def test_aviso_na_lista_de_arquivados(self):
+        for paciente in Paciente.objects.all():
+            paciente.is_active = False
+            paciente.save()
+        with mock.patch.object(busca, "LIMITE_RESULTADOS", 2):
+            resposta = self.client.get("/pacientes/arquivados/", {"q": "silva"})
+        self.assertTrue(resposta.context["busca_limitada"])
@@ -6,6 +6,7 @@ app_name = "pacientes"
 urlpatterns = [
     path("", views.PacienteListView.as_view(), name="list"),
     path("novo/", views.PacienteCreateView.as_view(), name="create"),
+    path("autocomplete", views.PacienteAutocompleteView.as_view(), name="autocomplete"),
     path("<int:pk>/", views.PacienteDetailView.as_view(), name="detail"),
     path("<int:pk>/editar/", views.PacienteUpdateView.as_view(), name="update"),
     path("<int:pk>/arquivar/", views.PacienteDisableView.as_view(), name="delete"),
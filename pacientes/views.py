@@ -1,29 +1,58 @@
 # pacientes/views.py
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Q
+from app.paginacao import KeysetPaginationMixin
+from . import busca
 from .models import Paciente
 from .forms import PacienteForm
 
 
-class PacienteListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class PacienteListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     model = Paciente
     template_name = "pacientes/paciente_list.html"
     context_object_name = "pacientes"
     paginate_by = 20
     permission_required = "pacientes.view_paciente"
+    keyset_ordering = ("nome", "id")
+
+    def usar_keyset(self, queryset):
+        # resultados da busca textual vêm ordenados por relevância (máx. 200)
+        return super().usar_keyset(queryset) and "relevancia" not in queryset.query.annotations
 
     def get_queryset(self):
         # Apenas pacientes ativos
         qs = Paciente.objects.filter(is_active=True)
         q = self.request.GET.get("q", "").strip()
+        self.busca_limitada = False
         if q:
-            qs = qs.filter(Q(nome__icontains=q) | Q(cpf__icontains=q) | Q(email__icontains=q))
-        return qs.order_by("nome")
+            # índice FTS: prefixo por termo, já ordenado por relevância
+            qs, ranqueado, self.busca_limitada = busca.buscar(qs, q, ativo=True)
+            if ranqueado:
+                return qs
+        return qs.order_by("nome", "id")
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["busca_limitada"] = self.busca_limitada
+        ctx["limite_busca"] = busca.LIMITE_RESULTADOS
+        return ctx
+
+
+class PacienteAutocompleteView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Até 20 pacientes ativos (id, nome, cpf) por prefixo do nome ou CPF/telefone."""
+
+    permission_required = "pacientes.view_paciente"
+
+    def get(self, request):
+        linhas = busca.autocompletar(request.GET.get("q", ""))
+        return JsonResponse({
+            "resultados": [{"id": pk, "nome": nome, "cpf": cpf} for pk, nome, cpf in linhas],
+        })
 
 
 class PacienteDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
@@ -89,10 +118,19 @@ class PacienteArchivedListView(LoginRequiredMixin, PermissionRequiredMixin, List
     def get_queryset(self):
         qs = Paciente.objects.filter(is_active=False)
         q = self.request.GET.get("q", "").strip()
+        self.busca_limitada = False
         if q:
-            qs = qs.filter(Q(nome__icontains=q) | Q(cpf__icontains=q) | Q(email__icontains=q))
+            qs, ranqueado, self.busca_limitada = busca.buscar(qs, q, ativo=False)
+            if ranqueado:
+                return qs
         return qs.order_by("nome")
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["busca_limitada"] = self.busca_limitada
+        ctx["limite_busca"] = busca.LIMITE_RESULTADOS
+        return ctx
+
 
 class PacienteReactivateView(LoginRequiredMixin, PermissionRequiredMixin, View):
     permission_required = "pacientes.change_paciente"
@@ -0,0 +1,63 @@
+# pacientes/widgets.py
+"""
+Campo de paciente com busca (autocomplete) no lugar do <select> com todos
+os pacientes.
+
+O widget renderiza um input oculto com o id e um campo de texto que consulta
+/pacientes/autocomplete?q= (pacientes.views.PacienteAutocompleteView); o
+script que liga os dois fica no base.html. Renderizar custa no máximo uma
+consulta (o nome do paciente já selecionado), qualquer que seja o tamanho
+da base; as opções do ModelChoiceField nunca são percorridas.
+"""
+from django import forms
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Paciente
+
+CLASSES_INPUT = (
+    "block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 "
+    "focus:ring-blue-500 sm:text-sm"
+)
+
+
+def rotulo(nome, cpf):
+    return f"{nome} ({cpf})" if cpf else nome
+
+
+class PacienteAutocomplete(forms.Widget):
+    placeholder = "Digite o nome ou CPF..."
+
+    def id_for_label(self, id_):
+        # o label aponta para o campo de texto, não para o oculto
+        return f"{id_}_busca" if id_ else id_
+
+    def _rotulo_de(self, valor):
+        if valor in (None, ""):
+            return ""
+        if isinstance(valor, Paciente):
+            return rotulo(valor.nome, valor.cpf)
+        try:
+            linha = Paciente.objects.filter(pk=int(valor)).values_list("nome", "cpf").first()
+        except (TypeError, ValueError):
+            return ""
+        return rotulo(*linha) if linha else ""
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        id_ = attrs.get("id", f"id_{name}")
+        valor = value.pk if isinstance(value, Paciente) else value
+        return format_html(
+            '<div class="relative" data-paciente-autocomplete data-url="{}">'
+            '<input type="hidden" name="{}" id="{}" value="{}">'
+            '<input type="text" id="{}" value="{}" placeholder="{}" autocomplete="off" class="{}"{}>'
+            '<ul class="absolute z-10 mt-1 w-full bg-white border border-gray-200 rounded-md shadow-lg hidden"></ul>'
+            "</div>",
+            reverse("pacientes:autocomplete"),
+            name, id_, "" if valor is None else valor,
+            self.id_for_label(id_), self._rotulo_de(value), self.placeholder, CLASSES_INPUT,
+            format_html(" required") if attrs.get("required") else "",
+        )
+
+    def value_from_datadict(self, data, files, name):
+        return data.get(name)
@@ -0,0 +1,24 @@
+# painel/admin.py
+from django.contrib import admin
+from .models import Atividade, DashboardSnapshot
+
+
+@admin.register(DashboardSnapshot)
+class DashboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("chave", "valor", "atualizado_em")
+    search_fields = ("chave",)
+    ordering = ("chave",)
+    readonly_fields = ("chave", "valor", "atualizado_em")
+    list_per_page = 50
+
+
+@admin.register(Atividade)
+class AtividadeAdmin(admin.ModelAdmin):
+    list_display = ("ocorrido_em", "tipo", "descricao", "paciente")
+    list_filter = ("tipo",)
+    search_fields = ("descricao",)
+    ordering = ("-ocorrido_em", "-id")
+    list_select_related = ("paciente",)
+    autocomplete_fields = ("paciente",)
+    readonly_fields = ("tipo", "descricao", "paciente", "objeto_id", "ocorrido_em")
+    list_per_page = 50
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PainelConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'painel'
+
+    def ready(self):
+        # registra os hooks que mantêm o snapshot do dashboard
+        from . import signals  # noqa: F401
@@ -0,0 +1,96 @@
+# painel/atividades.py
+"""
+Registro e leitura do log de atividades (painel.Atividade).
+
+Cada modelo de origem gera uma linha ao ser criado (ver painel.signals);
+o feed é uma varredura no índice (-ocorrido_em, -id), com filtros
+opcionais por paciente e tipo e paginação por cursor ("carregar mais").
+"""
+from app.paginacao import paginar_keyset
+
+from .models import Atividade
+
+
+# ---------
+# Descrição de cada origem: (tipo, descricao, paciente_id, ocorrido_em)
+# ---------
+def _evolucao(ev):
+    return (Atividade.Tipo.EVOLUCAO, f"Evolução clínica de {ev.consulta.paciente.nome}",
+            ev.consulta.paciente_id, ev.criado_em)
+
+
+def _anexo(an):
+    return (Atividade.Tipo.ANEXO, f"Anexo para {an.paciente.nome}", an.paciente_id, an.criado_em)
+
+
+def _receita(rc):
+    return (Atividade.Tipo.RECEITA, f"Receita emitida para {rc.consulta.paciente.nome}",
+            rc.consulta.paciente_id, rc.criado_em)
+
+
+def _procedimento(pe):
+    return (Atividade.Tipo.PROCEDIMENTO,
+            f"Procedimento executado ({pe.procedimento.nome}) - {pe.consulta.paciente.nome}",
+            pe.consulta.paciente_id, pe.realizado_em)
+
+
+def _fatura(ft):
+    return (Atividade.Tipo.FATURA, f"Fatura criada para {ft.paciente.nome} ({ft.get_status_display()})",
+            ft.paciente_id, ft.criado_em)
+
+
+def _pagamento(pg):
+    return (Atividade.Tipo.PAGAMENTO,
+            f"Pagamento {pg.get_metodo_pagamento_display()} de R$ {pg.valor:.2f} — {pg.fatura.paciente.nome}",
+            pg.fatura.paciente_id, pg.pago_em)
+
+
+def descritores():
+    """Mapa modelo -> (função de descrição, select_related para backfill)."""
+    from financeiro.models import Fatura, Pagamento
+    from prontuario.models import Anexo, EvolucaoClinica, Receita
+    from tratamentos.models import ProcedimentoExecutado
+
+    return {
+        EvolucaoClinica: (_evolucao, ("consulta__paciente",)),
+        Anexo: (_anexo, ("paciente",)),
+        Receita: (_receita, ("consulta__paciente",)),
+        ProcedimentoExecutado: (_procedimento, ("consulta__paciente", "procedimento")),
+        Fatura: (_fatura, ("paciente",)),
+        Pagamento: (_pagamento, ("fatura__paciente",)),
+    }
+
+
+def montar(instance, descrever):
+    tipo, descricao, paciente_id, ocorrido_em = descrever(instance)
+    return Atividade(
+        tipo=tipo,
+        descricao=descricao[:255],
+        paciente_id=paciente_id,
+        objeto_id=instance.pk,
+        ocorrido_em=ocorrido_em,
+    )
+
+
+def registrar(instance, descrever):
+    montar(instance, descrever).save()
+
+
+# ---------
+# Leitura
+# ---------
+FEED_ORDENACAO = ("-ocorrido_em", "-id")
+
+
+def feed(paciente_id=None, tipo=None, cursor=None, limite=8):
+    """
+    Retorna (atividades, proximo_cursor). `proximo_cursor` é None quando
+    não há mais linhas depois desta página.
+    """
+    qs = Atividade.objects.all()
+    if paciente_id:
+        qs = qs.filter(paciente_id=paciente_id)
+    if tipo:
+        qs = qs.filter(tipo=tipo)
+    pagina = paginar_keyset(qs, FEED_ORDENACAO, limite, cursor)
+    return pagina.object_list, pagina.next_cursor
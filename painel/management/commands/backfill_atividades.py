@@ -0,0 +1,30 @@
+# painel/management/commands/backfill_atividades.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from painel import atividades
+from painel.models import Atividade
+
+
+class Command(BaseCommand):
+    help = "Recria o log de atividades a partir das tabelas de origem, em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=2000, help="Linhas por lote (padrão: 2000).")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        chunk = options["chunk"]
+        Atividade.objects.all().delete()
+        total = 0
+        for model, (descrever, relacionados) in atividades.descritores().items():
+            lote = []
+            for obj in model.objects.select_related(*relacionados).order_by("pk").iterator(chunk_size=chunk):
+                lote.append(atividades.montar(obj, descrever))
+                if len(lote) >= chunk:
+                    Atividade.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            Atividade.objects.bulk_create(lote)
+            total += len(lote)
+        self.stdout.write(self.style.SUCCESS(f"{total} atividade(s) registradas."))
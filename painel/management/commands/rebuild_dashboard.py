@@ -0,0 +1,12 @@
+# painel/management/commands/rebuild_dashboard.py
+from django.core.management.base import BaseCommand
+
+from painel import snapshot
+
+
+class Command(BaseCommand):
+    help = "Reconstrói do zero os contadores do dashboard (DashboardSnapshot)."
+
+    def handle(self, *args, **options):
+        total = snapshot.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Snapshot reconstruído: {total} chave(s)."))
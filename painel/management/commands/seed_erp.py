@@ -0,0 +1,425 @@
+# painel/management/commands/seed_erp.py
+"""
+Gera dados sintéticos determinísticos para testes de escala.
+
+Os pacientes são processados em blocos: cada bloco cria seus pacientes e
+tudo que depende deles (consultas, lembretes, planos, procedimentos,
+odontograma, faturas, pagamentos, saídas de estoque) via bulk_create e
+descarta os objetos antes do próximo bloco, então a memória fica limitada
+ao tamanho do bloco independentemente do total gerado.
+"""
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from app.periodos import intervalo_datas
+from consultas.models import Consulta, Lembrete
+from estoque.models import ItemEstoque, MovimentoEstoque
+from financeiro.models import Fatura, Pagamento
+from pacientes.models import Paciente
+from painel import snapshot
+from prontuario.models import Odontograma
+from tratamentos import totais
+from tratamentos.models import (
+    CatalogoProcedimento,
+    PlanoTratamento,
+    ProcedimentoExecutado,
+    ProcedimentoPlanejado,
+)
+
+NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela",
+    "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago",
+    "Vitória", "William", "Beatriz", "Caio", "Lucas", "Mariana", "Pedro", "Juliana",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+    "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Araújo", "Barbosa",
+]
+CATALOGO = [
+    ("CONS", "Consulta de avaliação", 30, "150.00"),
+    ("PROF", "Profilaxia", 40, "180.00"),
+    ("RAD", "Radiografia periapical", 15, "60.00"),
+    ("RES1", "Restauração resina 1 face", 45, "220.00"),
+    ("RES2", "Restauração resina 2 faces", 60, "290.00"),
+    ("ENDO", "Tratamento de canal", 90, "900.00"),
+    ("EXO", "Extração simples", 45, "250.00"),
+    ("EXO3", "Extração de siso", 90, "600.00"),
+    ("CLAR", "Clareamento", 60, "800.00"),
+    ("COR", "Coroa de porcelana", 90, "1800.00"),
+    ("IMP", "Implante unitário", 120, "3500.00"),
+    ("RASP", "Raspagem periodontal", 60, "350.00"),
+    ("SEL", "Selante", 20, "90.00"),
+    ("FLU", "Aplicação de flúor", 15, "70.00"),
+]
+MATERIAIS = [
+    "Luva de procedimento", "Máscara cirúrgica", "Anestésico lidocaína", "Resina composta A2",
+    "Resina composta A3", "Fio de sutura", "Agulha gengival", "Sugador descartável",
+    "Algodão rolete", "Gaze estéril", "Ácido fosfórico", "Adesivo dental", "Lima endodôntica",
+    "Cone de guta-percha", "Hipoclorito de sódio", "Babador descartável",
+]
+SALAS = ["Sala 1", "Sala 2", "Sala 3", "Sala 4"]
+SLOTS_POR_DIA = 20  # 08:00 às 18:00 em slots de 30 min
+DENTES = [c for c, _ in Odontograma.Dente.choices]
+SUPERFICIES = [c for c, _ in Odontograma.Superficie.choices]
+CONDICOES = ["Hígido", "Cárie", "Restaurado", "Ausente", "Fratura", "Tratamento de canal", "Coroa"]
+BLOCO_PACIENTES = 500
+
+
+def _cpf(numero: int) -> str:
+    """CPF com dígitos verificadores válidos a partir de um sequencial."""
+    base = [int(d) for d in f"{numero % 10**9:09d}"]
+    for peso_inicial in (10, 11):
+        soma = sum(d * p for d, p in zip(base, range(peso_inicial, 1, -1)))
+        resto = (soma * 10) % 11
+        base.append(0 if resto == 10 else resto)
+    s = "".join(map(str, base))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+@contextmanager
+def _sem_auto_now_add(*models):
+    """Permite gravar datas históricas em campos auto_now_add durante o seed."""
+    campos = [f for m in models for f in m._meta.concrete_fields if getattr(f, "auto_now_add", False)]
+    for f in campos:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f in campos:
+            f.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Popula o banco com dados sintéticos realistas e determinísticos (para testes de escala)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--patients", type=int, default=1000, help="Quantidade de pacientes.")
+        parser.add_argument("--years", type=int, default=2, help="Anos de histórico (até hoje, + 1 mês de agenda futura).")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (mesma semente = mesmos dados).")
+        parser.add_argument("--batch", type=int, default=2000, help="batch_size dos bulk_create.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch = options["batch"]
+        self.hoje = timezone.localdate()
+        self.agora = timezone.now()
+        self.inicio_historico = self.hoje - timedelta(days=365 * options["years"])
+        self.fim_agenda = self.hoje + timedelta(days=30)
+        self.tz = timezone.get_current_timezone()
+        self.contagem = {}
+        # salas suficientes para a agenda caber sem sobreposição (~250 pacientes por sala)
+        self.salas = [f"Sala {n}" for n in range(1, max(len(SALAS), -(-options["patients"] // 250)) + 1)]
+        self.ocupado_salas = defaultdict(set)  # (sala, dia) -> slots de 30 min ocupados
+        self._ocupacao_existente()
+
+        modelos_com_data = (
+            Paciente, Consulta, PlanoTratamento, ProcedimentoPlanejado, ProcedimentoExecutado,
+            Odontograma, Fatura, Pagamento, MovimentoEstoque,
+        )
+        with _sem_auto_now_add(*modelos_com_data):
+            self.catalogo = self._catalogo()
+            self.itens = self._estoque()
+            primeiro_cpf = (Paciente.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+            primeiro_cpf += options["seed"] * 10_000_000
+            total = options["patients"]
+            for offset in range(0, total, BLOCO_PACIENTES):
+                tamanho = min(BLOCO_PACIENTES, total - offset)
+                with transaction.atomic():
+                    self._bloco(primeiro_cpf + offset, tamanho)
+                self.stdout.write(f"  {offset + tamanho}/{total} pacientes")
+            self._gravar_saldos()
+
+        # bulk_create não dispara signals: reconstrói os dados derivados
+        snapshot.reconstruir()
+        call_command("backfill_atividades", stdout=self.stdout)
+        call_command("rebuild_busca_pacientes", stdout=self.stdout)
+        call_command("backfill_consumo", stdout=self.stdout)
+        resumo = ", ".join(f"{m}: {n}" for m, n in self.contagem.items())
+        self.stdout.write(self.style.SUCCESS(f"Seed concluído. {resumo}"))
+
+    # ---------
+    # Helpers
+    # ---------
+    def _bulk(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch)
+        nome = model._meta.verbose_name_plural
+        self.contagem[nome] = self.contagem.get(nome, 0) + len(objs)
+        return objs
+
+    def _ocupacao_existente(self):
+        """Slots já usados por consultas ativas no período (reexecuções do seed)."""
+        inicio, fim = intervalo_datas(self.inicio_historico, self.fim_agenda)
+        existentes = (
+            Consulta.objects.filter(inicio__gte=inicio, inicio__lt=fim)
+            .exclude(status=Consulta.Status.CANCELADA)
+            .values_list("sala", "inicio", "fim")
+        )
+        for sala, ini, fi in existentes.iterator():
+            ini, fi = timezone.localtime(ini, self.tz), timezone.localtime(fi, self.tz)
+            base = ini.replace(hour=8, minute=0, second=0, microsecond=0)
+            primeiro = int((ini - base).total_seconds() // 1800)
+            ultimo = -int(-(fi - base).total_seconds() // 1800)
+            self.ocupado_salas[(sala, ini.date())].update(range(primeiro, ultimo))
+
+    def _horario_livre(self, desde: date, ocupado_paciente: set):
+        """
+        Sorteia (dia, inicio, duracao, sala) em slots de 30 min sem sobrepor
+        outra consulta da sala ou do paciente (os triggers de agenda recusariam).
+        """
+        rng = self.rng
+        for _ in range(20):
+            dia = self._dia_aleatorio(desde, self.fim_agenda)
+            duracao = rng.choice([30, 30, 60, 90])
+            slots = duracao // 30
+            primeiro = rng.randint(0, SLOTS_POR_DIA - slots)
+            faixa = set(range(primeiro, primeiro + slots))
+            sala = rng.choice(self.salas)
+            ocupado = self.ocupado_salas[(sala, dia)]
+            if faixa & ocupado or {(dia, s) for s in faixa} & ocupado_paciente:
+                continue
+            ocupado.update(faixa)
+            ocupado_paciente.update((dia, s) for s in faixa)
+            return dia, self._dt(dia, 30 * primeiro), duracao, sala
+        return None
+
+    def _dt(self, dia: date, minutos: int = 0) -> datetime:
+        return timezone.make_aware(datetime.combine(dia, time(8, 0)) + timedelta(minutes=minutos), self.tz)
+
+    def _dia_aleatorio(self, desde: date, ate: date) -> date:
+        return desde + timedelta(days=self.rng.randint(0, max((ate - desde).days, 0)))
+
+    # ---------
+    # Dados de referência
+    # ---------
+    def _catalogo(self):
+        procedimentos = []
+        for codigo, nome, duracao, preco in CATALOGO:
+            proc, _ = CatalogoProcedimento.objects.get_or_create(
+                codigo=codigo, defaults={"nome": nome, "duracao_min": duracao, "preco_base": Decimal(preco)}
+            )
+            procedimentos.append(proc)
+        return procedimentos
+
+    def _estoque(self):
+        """
+        Itens com um movimento de saldo inicial (ENTRADA no começo do
+        histórico). qtd_atual acompanha os movimentos gerados depois
+        (self.saldos) e é gravado no fim por _gravar_saldos.
+        """
+        rng = self.rng
+        itens = []
+        for descricao in MATERIAIS:
+            for _ in range(rng.randint(1, 4)):  # cada lote é um item
+                itens.append(ItemEstoque(
+                    descricao=descricao,
+                    marca=rng.choice(["DentalMax", "OdontoPro", "Biodinâmica", "3M"]),
+                    lote=f"L{rng.randint(10000, 99999)}",
+                    validade=self.hoje + timedelta(days=rng.randint(-30, 720)),
+                    qtd_minima=rng.choice([5, 10, 20, 50]),
+                    qtd_atual=0,
+                ))
+        self._bulk(ItemEstoque, itens)
+        abertura = self._dt(self.inicio_historico) - timedelta(days=1)
+        iniciais = [
+            MovimentoEstoque(
+                item=item, tipo_movimento=MovimentoEstoque.Tipo.ENTRADA,
+                quantidade=rng.randint(50, 400), motivo="Saldo inicial", criado_em=abertura,
+            )
+            for item in itens
+        ]
+        self._bulk(MovimentoEstoque, iniciais)
+        self.saldos = {m.item: m.quantidade for m in iniciais}
+        return itens
+
+    def _gravar_saldos(self):
+        """qtd_atual e abaixo_minimo dos itens do seed a partir dos movimentos gerados."""
+        for item, saldo in self.saldos.items():
+            item.qtd_atual = saldo
+            item.abaixo_minimo = saldo < item.qtd_minima
+        ItemEstoque.objects.bulk_update(list(self.saldos), ["qtd_atual", "abaixo_minimo"], batch_size=self.batch)
+
+    # ---------
+    # Bloco de pacientes e dependentes
+    # ---------
+    def _bloco(self, primeiro_cpf, tamanho):
+        rng = self.rng
+        pacientes = [
+            Paciente(
+                nome=f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+                cpf=_cpf(primeiro_cpf + i),
+                data_nascimento=date(rng.randint(1940, 2018), rng.randint(1, 12), rng.randint(1, 28)),
+                telefone=f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                email=f"paciente{primeiro_cpf + i}@exemplo.com.br" if rng.random() < 0.7 else "",
+                criado_em=self._dt(self._dia_aleatorio(self.inicio_historico, self.hoje)),
+            )
+            for i in range(tamanho)
+        ]
+        for p in pacientes:
+            p.normalizar()  # bulk_create não chama save()
+        self._bulk(Paciente, pacientes)
+
+        # uma pequena fração arquivada (exclusão lógica)
+        arquivados = [p for p in pacientes if rng.random() < 0.03]
+        for p in arquivados:
+            p.is_active = False
+            p.deleted_at = p.criado_em + timedelta(days=rng.randint(30, 365))
+        Paciente.objects.bulk_update(arquivados, ["is_active", "deleted_at"], batch_size=self.batch)
+
+        consultas = []
+        for p in pacientes:
+            desde = timezone.localtime(p.criado_em).date()
+            # ~3 consultas por ano de relacionamento
+            anos = max((self.fim_agenda - desde).days, 1) / 365
+            ocupado_paciente = set()
+            for _ in range(max(1, int(rng.gauss(3 * anos, 1)))):
+                horario = self._horario_livre(desde, ocupado_paciente)
+                if horario is None:
+                    continue
+                dia, inicio, duracao, sala = horario
+                if dia < self.hoje:
+                    status = rng.choices(
+                        [Consulta.Status.CONCLUIDA, Consulta.Status.FALTOU, Consulta.Status.CANCELADA],
+                        weights=[85, 8, 7],
+                    )[0]
+                else:
+                    status = rng.choice([Consulta.Status.AGENDADA, Consulta.Status.CONFIRMADA])
+                consultas.append(Consulta(
+                    paciente=p, status=status, inicio=inicio,
+                    fim=inicio + timedelta(minutes=duracao),
+                    sala=sala, criado_em=inicio - timedelta(days=rng.randint(1, 30)),
+                ))
+        self._bulk(Consulta, consultas)
+
+        self._bulk(Lembrete, [
+            Lembrete(
+                consulta=c,
+                canal=rng.choice(Lembrete.Canal.values),
+                agendado_em=c.inicio - timedelta(hours=24),
+                status=Lembrete.Status.ENVIADO if c.inicio < self.agora else Lembrete.Status.AGENDADO,
+                enviado_em=c.inicio - timedelta(hours=24) if c.inicio < self.agora else None,
+            )
+            for c in consultas if rng.random() < 0.8
+        ])
+
+        planos = self._bulk(PlanoTratamento, [
+            PlanoTratamento(
+                paciente=p,
+                status=rng.choice(PlanoTratamento.Status.values),
+                criado_em=p.criado_em + timedelta(days=rng.randint(0, 60)),
+            )
+            for p in pacientes if rng.random() < 0.6
+        ])
+        planejados = []
+        for plano in planos:
+            for _ in range(rng.randint(1, 5)):
+                proc = rng.choice(self.catalogo)
+                planejados.append(ProcedimentoPlanejado(
+                    plano=plano, procedimento=proc,
+                    dente_superficie=f"{rng.choice(DENTES)}-{rng.choice(SUPERFICIES)}",
+                    quantidade=rng.randint(1, 3), valor_unitario=proc.preco_base,
+                    status=rng.choice(ProcedimentoPlanejado.Status.values),
+                    criado_em=plano.criado_em,
+                ))
+        self._bulk(ProcedimentoPlanejado, planejados)
+        totais.recalcular([plano.pk for plano in planos])
+        planejados_por_paciente = {}
+        for pp in planejados:
+            planejados_por_paciente.setdefault(pp.plano.paciente_id, []).append(pp)
+
+        concluidas = [c for c in consultas if c.status == Consulta.Status.CONCLUIDA]
+        executados = []
+        for c in concluidas:
+            if rng.random() < 0.7:
+                candidatos = planejados_por_paciente.get(c.paciente_id)
+                planejado = rng.choice(candidatos) if candidatos and rng.random() < 0.5 else None
+                proc = planejado.procedimento if planejado else rng.choice(self.catalogo)
+                executados.append(ProcedimentoExecutado(
+                    consulta=c, planejado=planejado, procedimento=proc,
+                    dente=rng.choice(DENTES), superficie=rng.choice(SUPERFICIES),
+                    quantidade=1, valor_unitario=proc.preco_base, realizado_em=c.fim,
+                ))
+        self._bulk(ProcedimentoExecutado, executados)
+
+        odontograma = []
+        for p in pacientes:
+            for _ in range(rng.randint(2, 6)):
+                odontograma.append(Odontograma(
+                    paciente=p, dente=rng.choice(DENTES), superficie=rng.choice(SUPERFICIES + [""]),
+                    condicao=rng.choice(CONDICOES),
+                    criado_em=p.criado_em + timedelta(days=rng.randint(0, 30)),
+                ))
+        for e in executados:
+            if rng.random() < 0.3:
+                odontograma.append(Odontograma(
+                    paciente_id=e.consulta.paciente_id, dente=e.dente, superficie=e.superficie,
+                    condicao="Restaurado", procedimento_executado=e, criado_em=e.realizado_em,
+                ))
+        self._bulk(Odontograma, odontograma)
+
+        faturas = []
+        for e in executados:
+            faturas.append(Fatura(
+                paciente_id=e.consulta.paciente_id, origem="consulta",
+                valor=e.valor_unitario * e.quantidade, saldo=e.valor_unitario * e.quantidade,
+                criado_em=e.realizado_em,
+            ))
+        self._bulk(Fatura, faturas)
+
+        pagamentos = []
+        for f in faturas:
+            sorteio = rng.random()
+            if sorteio < 0.05:
+                f.status = Fatura.Status.CANCELADA
+                continue
+            parcelas = 0 if sorteio < 0.2 else rng.choice([1, 1, 1, 2, 3])
+            pago = Decimal("0")
+            integral = sorteio > 0.35
+            for n in range(1, parcelas + 1):
+                valor = (f.valor / parcelas).quantize(Decimal("0.01"))
+                if not integral and n == parcelas:
+                    valor = (valor / 2).quantize(Decimal("0.01"))
+                pago += valor
+                pagamentos.append(Pagamento(
+                    fatura=f, metodo_pagamento=rng.choice(Pagamento.Metodo.values), valor=valor,
+                    parcela=n, pago_em=f.criado_em + timedelta(days=30 * (n - 1)),
+                ))
+            f.total_pago, f.saldo = pago, f.valor - pago
+            if pago == 0:
+                f.status = Fatura.Status.ABERTA
+            elif pago >= f.valor:
+                f.status = Fatura.Status.PAGA
+            else:
+                f.status = Fatura.Status.PARCIAL
+        Fatura.objects.bulk_update(faturas, ["status", "total_pago", "saldo"], batch_size=self.batch)
+        self._bulk(Pagamento, pagamentos)
+
+        movimentos = []
+        for c in concluidas:
+            for item in rng.sample(self.itens, k=rng.randint(1, 3)):
+                # saída limitada ao saldo: qtd_atual não pode ficar negativo
+                quantidade = min(rng.randint(1, 4), self.saldos[item])
+                if not quantidade:
+                    continue
+                self.saldos[item] -= quantidade
+                movimentos.append(MovimentoEstoque(
+                    item=item, tipo_movimento=MovimentoEstoque.Tipo.SAIDA,
+                    quantidade=quantidade, motivo="Uso em atendimento", consulta=c,
+                    criado_em=c.fim,
+                ))
+            if rng.random() < 0.02:
+                item = rng.choice(self.itens)
+                quantidade = rng.choice([50, 100, 200])
+                self.saldos[item] += quantidade
+                movimentos.append(MovimentoEstoque(
+                    item=item, tipo_movimento=MovimentoEstoque.Tipo.ENTRADA,
+                    quantidade=quantidade, motivo="Reposição", criado_em=c.inicio,
+                ))
+        self._bulk(MovimentoEstoque, movimentos)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0002_paciente_deleted_at_paciente_is_active'),
+        ('painel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Atividade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('EV', 'Evolução clínica'), ('AN', 'Anexo'), ('RC', 'Receita'), ('PE', 'Procedimento executado'), ('FT', 'Fatura'), ('PG', 'Pagamento')], max_length=2)),
+                ('descricao', models.CharField(max_length=255)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('ocorrido_em', models.DateTimeField()),
+                ('paciente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='atividades', to='pacientes.paciente')),
+            ],
+            options={
+                'verbose_name': 'Atividade',
+                'verbose_name_plural': 'Atividades',
+                'ordering': ['-ocorrido_em', '-id'],
+                'indexes': [models.Index(fields=['-ocorrido_em', '-id'], name='atividade_feed_idx'), models.Index(fields=['paciente', '-ocorrido_em', '-id'], name='atividade_paciente_idx'), models.Index(fields=['tipo', '-ocorrido_em', '-id'], name='atividade_tipo_idx')],
+            },
+        ),
+    ]
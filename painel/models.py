@@ -0,0 +1,53 @@
+# painel/models.py
+from django.db import models
+
+
+class DashboardSnapshot(models.Model):
+    """Contadores do dashboard mantidos por deltas (ver painel.snapshot)."""
+
+    # chaves globais: "total_pacientes", "faturas_pendentes", "itens_alerta"
+    # chaves diárias: "consultas:AAAA-MM-DD" (data local do início)
+    chave = models.CharField(max_length=40, unique=True)
+    valor = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["chave"]
+        verbose_name = "Snapshot do Dashboard"
+        verbose_name_plural = "Snapshots do Dashboard"
+
+    def __str__(self):
+        return f"{self.chave} = {self.valor}"
+
+
+class Atividade(models.Model):
+    """Log append-only de eventos exibidos no feed "Atividade Recente"."""
+
+    class Tipo(models.TextChoices):
+        EVOLUCAO = "EV", "Evolução clínica"
+        ANEXO = "AN", "Anexo"
+        RECEITA = "RC", "Receita"
+        PROCEDIMENTO = "PE", "Procedimento executado"
+        FATURA = "FT", "Fatura"
+        PAGAMENTO = "PG", "Pagamento"
+
+    tipo = models.CharField(max_length=2, choices=Tipo.choices)
+    descricao = models.CharField(max_length=255)
+    paciente = models.ForeignKey(
+        "pacientes.Paciente", on_delete=models.SET_NULL, null=True, blank=True, related_name="atividades"
+    )
+    objeto_id = models.PositiveBigIntegerField()  # pk da linha de origem
+    ocorrido_em = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-ocorrido_em", "-id"]
+        verbose_name = "Atividade"
+        verbose_name_plural = "Atividades"
+        indexes = [
+            models.Index(fields=["-ocorrido_em", "-id"], name="atividade_feed_idx"),
+            models.Index(fields=["paciente", "-ocorrido_em", "-id"], name="atividade_paciente_idx"),
+            models.Index(fields=["tipo", "-ocorrido_em", "-id"], name="atividade_tipo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.descricao}"
@@ -0,0 +1,87 @@
+# painel/signals.py
+"""Hooks de save/delete que mantêm o DashboardSnapshot e o log de atividades."""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from consultas.models import Consulta
+from estoque.models import ItemEstoque
+from financeiro.models import Fatura
+from pacientes.models import Paciente
+
+from . import atividades, snapshot
+
+
+# Para cada modelo: campos lidos do estado anterior e função que extrai,
+# a partir desses campos, as chaves do snapshot em que a linha é contada.
+def _chaves_paciente(v):
+    return [snapshot.TOTAL_PACIENTES] if v["is_active"] else []
+
+
+def _chaves_consulta(v):
+    return [snapshot.chave_consultas(snapshot.dia_local(v["inicio"]))] if v["inicio"] else []
+
+
+def _chaves_fatura(v):
+    return [snapshot.FATURAS_PENDENTES] if v["status"] in snapshot.status_pendentes() else []
+
+
+def _chaves_item(v):
+    return [snapshot.ITENS_ALERTA] if v["abaixo_minimo"] else []
+
+
+RASTREADOS = {
+    Paciente: (("is_active",), _chaves_paciente),
+    Consulta: (("inicio",), _chaves_consulta),
+    Fatura: (("status",), _chaves_fatura),
+    ItemEstoque: (("abaixo_minimo",), _chaves_item),
+}
+
+
+def _valores(instance, campos):
+    return {c: getattr(instance, c) for c in campos}
+
+
+def _capturar_anterior(sender, instance, **kwargs):
+    campos, _ = RASTREADOS[sender]
+    instance._painel_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._painel_anterior = (
+            sender.objects.filter(pk=instance.pk).values(*campos).first()
+        )
+
+
+def _aplicar_diferenca(antes, depois):
+    for chave in set(antes) - set(depois):
+        snapshot.aplicar(chave, -1)
+    for chave in set(depois) - set(antes):
+        snapshot.aplicar(chave, +1)
+
+
+def _apos_salvar(sender, instance, **kwargs):
+    campos, chaves = RASTREADOS[sender]
+    anterior = getattr(instance, "_painel_anterior", None)
+    antes = chaves(anterior) if anterior else []
+    _aplicar_diferenca(antes, chaves(_valores(instance, campos)))
+
+
+def _apos_excluir(sender, instance, **kwargs):
+    campos, chaves = RASTREADOS[sender]
+    _aplicar_diferenca(chaves(_valores(instance, campos)), [])
+
+
+for _model in RASTREADOS:
+    pre_save.connect(_capturar_anterior, sender=_model, dispatch_uid=f"painel_pre_{_model.__name__}")
+    post_save.connect(_apos_salvar, sender=_model, dispatch_uid=f"painel_post_{_model.__name__}")
+    post_delete.connect(_apos_excluir, sender=_model, dispatch_uid=f"painel_del_{_model.__name__}")
+
+
+# ---------
+# Log de atividades: uma linha por criação nos modelos de origem
+# ---------
+def _registrar_atividade(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        descrever, _ = atividades.descritores()[sender]
+        atividades.registrar(instance, descrever)
+
+
+for _model in atividades.descritores():
+    post_save.connect(_registrar_atividade, sender=_model, dispatch_uid=f"painel_atividade_{_model.__name__}")
@@ -0,0 +1,141 @@
+# painel/snapshot.py
+"""
+Contadores do dashboard mantidos incrementalmente.
+
+Os hooks de save/delete (painel.signals) aplicam deltas com F() e a HomeView
+lê todos os KPIs com uma única consulta por chave primária (chave única).
+Se uma chave ainda não existir ela é contada na origem uma única vez.
+"""
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from app.periodos import intervalo_dia
+
+from .models import DashboardSnapshot
+
+TOTAL_PACIENTES = "total_pacientes"
+FATURAS_PENDENTES = "faturas_pendentes"
+ITENS_ALERTA = "itens_alerta"
+PREFIXO_CONSULTAS = "consultas:"
+
+
+def chave_consultas(dia):
+    return f"{PREFIXO_CONSULTAS}{dia.isoformat()}"
+
+
+def dia_local(dt):
+    """Data local (TIME_ZONE) de um datetime aware."""
+    return timezone.localtime(dt).date()
+
+
+# ---------
+# Contagem na origem (usada na criação preguiçosa e no rebuild)
+# ---------
+def status_pendentes():
+    from financeiro.models import Fatura
+    return [Fatura.Status.ABERTA, Fatura.Status.PARCIAL]
+
+
+def contar(chave):
+    from pacientes.models import Paciente
+    from consultas.models import Consulta
+    from financeiro.models import Fatura
+    from estoque.models import ItemEstoque
+
+    if chave == TOTAL_PACIENTES:
+        return Paciente.objects.filter(is_active=True).count()
+    if chave == FATURAS_PENDENTES:
+        return Fatura.objects.filter(status__in=status_pendentes()).count()
+    if chave == ITENS_ALERTA:
+        return ItemEstoque.objects.filter(abaixo_minimo=True).count()
+    if chave.startswith(PREFIXO_CONSULTAS):
+        dia = datetime.strptime(chave[len(PREFIXO_CONSULTAS):], "%Y-%m-%d").date()
+        inicio, fim = intervalo_dia(dia)
+        return Consulta.objects.filter(inicio__gte=inicio, inicio__lt=fim).count()
+    raise ValueError(f"Chave de snapshot desconhecida: {chave}")
+
+
+# ---------
+# Escrita por deltas
+# ---------
+def aplicar(chave, delta):
+    """Soma `delta` ao contador; cria a linha contando na origem se faltar."""
+    if not delta:
+        return
+    atualizados = DashboardSnapshot.objects.filter(chave=chave).update(
+        valor=F("valor") + delta, atualizado_em=timezone.now()
+    )
+    if atualizados:
+        return
+    # a contagem na origem já inclui a alteração que gerou o delta
+    try:
+        with transaction.atomic():
+            DashboardSnapshot.objects.create(chave=chave, valor=contar(chave))
+    except IntegrityError:
+        # outro processo criou a linha entre o UPDATE e o INSERT
+        DashboardSnapshot.objects.filter(chave=chave).update(
+            valor=F("valor") + delta, atualizado_em=timezone.now()
+        )
+
+
+def recontar(chave):
+    """Recalcula uma chave a partir da origem (após updates em massa)."""
+    DashboardSnapshot.objects.update_or_create(chave=chave, defaults={"valor": contar(chave)})
+
+
+# ---------
+# Leitura
+# ---------
+def ler(*chaves):
+    """Retorna {chave: valor} com uma única consulta; chaves ausentes são contadas."""
+    valores = dict(
+        DashboardSnapshot.objects.filter(chave__in=chaves).values_list("chave", "valor")
+    )
+    for chave in chaves:
+        if chave not in valores:
+            valores[chave] = contar(chave)
+            DashboardSnapshot.objects.get_or_create(chave=chave, defaults={"valor": valores[chave]})
+    return valores
+
+
+def kpis_home(hoje=None):
+    hoje = hoje or timezone.localdate()
+    chave_hoje = chave_consultas(hoje)
+    valores = ler(TOTAL_PACIENTES, chave_hoje, FATURAS_PENDENTES, ITENS_ALERTA)
+    return {
+        "total_pacientes": valores[TOTAL_PACIENTES],
+        "consultas_hoje": valores[chave_hoje],
+        "faturas_pendentes": valores[FATURAS_PENDENTES],
+        "itens_alerta": valores[ITENS_ALERTA],
+    }
+
+
+# ---------
+# Reconstrução completa
+# ---------
+@transaction.atomic
+def reconstruir():
+    """Apaga e recria todas as chaves a partir das tabelas de origem."""
+    from consultas.models import Consulta
+
+    linhas = [
+        DashboardSnapshot(chave=chave, valor=contar(chave))
+        for chave in (TOTAL_PACIENTES, FATURAS_PENDENTES, ITENS_ALERTA)
+    ]
+    por_dia = (
+        Consulta.objects.annotate(dia=TruncDate("inicio", tzinfo=timezone.get_current_timezone()))
+        .values("dia")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    linhas += [
+        DashboardSnapshot(chave=chave_consultas(row["dia"]), valor=row["total"])
+        for row in por_dia
+    ]
+    DashboardSnapshot.objects.all().delete()
+    DashboardSnapshot.objects.bulk_create(linhas, batch_size=500)
+    return len(linhas)
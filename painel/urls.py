@@ -0,0 +1,8 @@
+# painel/urls.py
+from django.urls import path
+from . import views
+app_name = "painel"
+
+urlpatterns = [
+    path("atividades/", views.AtividadeFeedView.as_view(), name="atividades"),
+]
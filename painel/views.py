@@ -0,0 +1,41 @@
+# painel/views.py
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.utils.timesince import timesince
+from django.views import View
+
+from . import atividades
+from .models import Atividade
+
+
+class AtividadeFeedView(LoginRequiredMixin, View):
+    """Página seguinte do feed de atividades ("carregar mais")."""
+
+    limite_maximo = 50
+
+    def get(self, request):
+        paciente_id = request.GET.get("paciente")
+        tipo = request.GET.get("tipo")
+        try:
+            limite = min(int(request.GET.get("limite", 8)), self.limite_maximo)
+        except (TypeError, ValueError):
+            limite = 8
+        linhas, proximo = atividades.feed(
+            paciente_id=int(paciente_id) if paciente_id and paciente_id.isdigit() else None,
+            tipo=tipo if tipo in Atividade.Tipo.values else None,
+            cursor=request.GET.get("cursor"),
+            limite=max(limite, 1),
+        )
+        return JsonResponse({
+            "atividades": [
+                {
+                    "tipo": a.tipo,
+                    "descricao": a.descricao,
+                    "paciente_id": a.paciente_id,
+                    "ocorrido_em": a.ocorrido_em.isoformat(),
+                    "ha": timesince(a.ocorrido_em),
+                }
+                for a in linhas
+            ],
+            "proximo": proximo,
+        })
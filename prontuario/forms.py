@@ -1,11 +1,14 @@
 # prontuario/forms.py
 from django import forms
+from pacientes.widgets import PacienteAutocomplete
+from tratamentos.forms import ProcedimentoCatalogoField
 from .models import Odontograma, EvolucaoClinica, Anexo, Receita, TermoConsentimento
 
 class OdontogramaForm(forms.ModelForm):
     class Meta:
         model = Odontograma
         fields = ["paciente", "dente", "superficie", "condicao", "procedimento_executado"]
+        widgets = {"paciente": PacienteAutocomplete()}
 
 class EvolucaoForm(forms.ModelForm):
     class Meta:
@@ -16,6 +19,7 @@ class AnexoForm(forms.ModelForm):
     class Meta:
         model = Anexo
         fields = ["paciente", "consulta", "caminho_arquivo", "tipo_arquivo"]
+        widgets = {"paciente": PacienteAutocomplete()}
 
 class ReceitaForm(forms.ModelForm):
     class Meta:
@@ -23,7 +27,12 @@ class ReceitaForm(forms.ModelForm):
         fields = ["consulta", "texto"]
 
 class TermoConsentimentoForm(forms.ModelForm):
+    procedimento = ProcedimentoCatalogoField()
+
     class Meta:
         model = TermoConsentimento
         fields = ["paciente", "procedimento", "texto", "assinado_em", "caminho_assinatura"]
-        widgets = {"assinado_em": forms.DateTimeInput(attrs={"type": "datetime-local"})}
+        widgets = {
+            "paciente": PacienteAutocomplete(),
+            "assinado_em": forms.DateTimeInput(attrs={"type": "datetime-local"}),
+        }
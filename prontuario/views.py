@@ -3,24 +3,27 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse, reverse_lazy
 from django.contrib import messages
+from app.paginacao import KeysetPaginationMixin
 from .models import Odontograma, EvolucaoClinica, Anexo, Receita, TermoConsentimento
 from .forms import OdontogramaForm, EvolucaoForm, AnexoForm, ReceitaForm, TermoConsentimentoForm
 from consultas.models import Consulta
+from tratamentos import catalogo
 from django import forms
 
-class OdontogramaListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class OdontogramaListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     model = Odontograma
     template_name = "prontuario/odontograma_list.html"
     context_object_name = "odontogramas"
     paginate_by = 30
     permission_required = "prontuario.view_odontograma"
+    keyset_ordering = ("paciente__nome", "dente", "superficie", "-criado_em", "-id")
 
     def get_queryset(self):
         qs = super().get_queryset().select_related("paciente")
         pid = self.request.GET.get("paciente")
         if pid:
             qs = qs.filter(paciente_id=pid)
-        return qs.order_by("paciente__nome", "dente", "superficie", "-criado_em")
+        return qs.order_by(*self.keyset_ordering)
 
 class OdontogramaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = Odontograma
@@ -138,8 +141,14 @@ class TermoConsentimentoListView(LoginRequiredMixin, PermissionRequiredMixin, Li
     permission_required = "prontuario.view_termoconsentimento"
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related("paciente", "procedimento")
+        # o procedimento vem do cache do catálogo (get_context_data)
+        qs = super().get_queryset().select_related("paciente")
         pid = self.request.GET.get("paciente")
         if pid:
             qs = qs.filter(paciente_id=pid)
         return qs.order_by("-assinado_em", "paciente__nome")
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        catalogo.anexar(ctx["termos"])
+        return ctx
@@ -1,5 +1,7 @@
 # tratamentos/admin.py
 from django.contrib import admin
+from app.formatos import brl
+from . import orcamentos, totais
 from .models import (
     PlanoTratamento,
     CatalogoProcedimento,
@@ -8,6 +10,50 @@ from .models import (
     Orcamento,
 )
 
+# =========================
+# Filtros
+# =========================
+class FaixaValorFilter(admin.SimpleListFilter):
+    """Filtro por faixas de um valor (campo ou anotação do get_queryset)."""
+    campo = None
+    # (parâmetro, rótulo, mínimo, máximo); limites em None ficam abertos
+    faixas = ()
+
+    def lookups(self, request, model_admin):
+        return [(codigo, rotulo) for codigo, rotulo, _, _ in self.faixas]
+
+    def queryset(self, request, queryset):
+        for codigo, _, minimo, maximo in self.faixas:
+            if self.value() == codigo:
+                if minimo is not None:
+                    queryset = queryset.filter(**{f"{self.campo}__gt": minimo})
+                if maximo is not None:
+                    queryset = queryset.filter(**{f"{self.campo}__lte": maximo})
+        return queryset
+
+
+class TotalPlanoFilter(FaixaValorFilter):
+    title = "total planejado"
+    parameter_name = "total"
+    campo = "total_planejado"
+    faixas = (
+        ("ate-1000", "Até R$ 1.000", None, 1000),
+        ("1000-5000", "R$ 1.000 a R$ 5.000", 1000, 5000),
+        ("acima-5000", "Acima de R$ 5.000", 5000, None),
+    )
+
+
+class ValorLinhaFilter(FaixaValorFilter):
+    title = "valor total"
+    parameter_name = "valor"
+    campo = "valor_total_db"
+    faixas = (
+        ("ate-200", "Até R$ 200", None, 200),
+        ("200-1000", "R$ 200 a R$ 1.000", 200, 1000),
+        ("acima-1000", "Acima de R$ 1.000", 1000, None),
+    )
+
+
 # =========================
 # Inlines
 # =========================
@@ -35,8 +81,8 @@ class OrcamentoInline(admin.TabularInline):
 # =========================
 @admin.register(PlanoTratamento)
 class PlanoTratamentoAdmin(admin.ModelAdmin):
-    list_display = ("id", "paciente", "status", "total_planejado", "criado_em")
-    list_filter = ("status", "criado_em")
+    list_display = ("id", "paciente", "status", "total_formatado", "criado_em")
+    list_filter = ("status", TotalPlanoFilter, "criado_em")
     search_fields = ("paciente__nome",)
     ordering = ("-criado_em",)
     date_hierarchy = "criado_em"
@@ -45,14 +91,18 @@ class PlanoTratamentoAdmin(admin.ModelAdmin):
     readonly_fields = ("criado_em",)
     inlines = [ProcedimentoPlanejadoInline, OrcamentoInline]
     list_per_page = 25
+    actions = ["gerar_orcamentos"]
 
-    @admin.display(description="Total planejado")
-    def total_planejado(self, obj: PlanoTratamento):
-        # soma quantidade * valor_unitario dos planejados
-        total = 0
-        for p in obj.procedimentos.all():
-            total += (p.quantidade or 0) * (p.valor_unitario or 0)
-        return f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    @admin.display(description="Total planejado", ordering="total_planejado")
+    def total_formatado(self, obj: PlanoTratamento):
+        # total_planejado é mantido pelas linhas (sem as canceladas): nenhuma
+        # consulta extra por linha da listagem
+        return brl(obj.total_planejado)
+
+    def gerar_orcamentos(self, request, queryset):
+        criados = orcamentos.gerar(queryset)
+        self.message_user(request, f"{len(criados)} orçamento(s) gerado(s).")
+    gerar_orcamentos.short_description = "Gerar orçamentos pela tabela do catálogo"
 
 
 # =========================
@@ -73,7 +123,7 @@ class CatalogoProcedimentoAdmin(admin.ModelAdmin):
 @admin.register(ProcedimentoPlanejado)
 class ProcedimentoPlanejadoAdmin(admin.ModelAdmin):
     list_display = ("id", "plano", "paciente", "procedimento", "dente_superficie", "quantidade", "valor_unitario", "valor_total", "status", "criado_em")
-    list_filter = ("status", "criado_em", "procedimento")
+    list_filter = ("status", ValorLinhaFilter, "criado_em", "procedimento")
     search_fields = ("plano__paciente__nome", "procedimento__nome", "dente_superficie")
     ordering = ("-id",)
     date_hierarchy = "criado_em"
@@ -82,20 +132,26 @@ class ProcedimentoPlanejadoAdmin(admin.ModelAdmin):
     readonly_fields = ("criado_em",)
     list_per_page = 25
 
+    def get_queryset(self, request):
+        # quantidade * valor_unitario calculado no banco (ordenável/filtrável)
+        return super().get_queryset(request).annotate(valor_total_db=totais.subtotal())
+
     @admin.display(description="Paciente", ordering="plano__paciente__nome")
     def paciente(self, obj: ProcedimentoPlanejado):
         return obj.plano.paciente
 
-    @admin.display(description="Valor total")
+    @admin.display(description="Valor total", ordering="valor_total_db")
     def valor_total(self, obj: ProcedimentoPlanejado):
-        total = (obj.quantidade or 0) * (obj.valor_unitario or 0)
-        return f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.valor_total_db)
 
     # Ações em massa para status
     actions = ["marcar_pendente", "marcar_aprovado", "marcar_executado", "marcar_cancelado"]
 
     def _set_status(self, request, queryset, status):
+        planos = set(queryset.values_list("plano_id", flat=True))
         updated = queryset.update(status=status)
+        # o update em massa não passa pelo save(): cancelar/reativar muda o total
+        totais.recalcular(planos)
         self.message_user(request, f"Status atualizado em {updated} procedimento(s).")
 
     def marcar_pendente(self, request, queryset):
@@ -121,7 +177,7 @@ class ProcedimentoPlanejadoAdmin(admin.ModelAdmin):
 @admin.register(ProcedimentoExecutado)
 class ProcedimentoExecutadoAdmin(admin.ModelAdmin):
     list_display = ("id", "consulta", "paciente", "procedimento", "dente", "superficie", "quantidade", "valor_unitario", "valor_total", "realizado_em")
-    list_filter = ("realizado_em", "procedimento")
+    list_filter = ("realizado_em", ValorLinhaFilter, "procedimento")
     search_fields = ("consulta__paciente__nome", "procedimento__nome", "dente")
     ordering = ("-realizado_em",)
     date_hierarchy = "realizado_em"
@@ -130,14 +186,16 @@ class ProcedimentoExecutadoAdmin(admin.ModelAdmin):
     readonly_fields = ("realizado_em",)
     list_per_page = 25
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(valor_total_db=totais.subtotal())
+
     @admin.display(description="Paciente", ordering="consulta__paciente__nome")
     def paciente(self, obj: ProcedimentoExecutado):
         return obj.consulta.paciente
 
-    @admin.display(description="Valor total")
+    @admin.display(description="Valor total", ordering="valor_total_db")
     def valor_total(self, obj: ProcedimentoExecutado):
-        total = (obj.quantidade or 0) * (obj.valor_unitario or 0)
-        return f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.valor_total_db)
 
 
 # =========================
@@ -158,10 +216,10 @@ class OrcamentoAdmin(admin.ModelAdmin):
     def paciente(self, obj: Orcamento):
         return obj.plano.paciente
 
-    @admin.display(description="Total")
+    @admin.display(description="Total", ordering="total")
     def total_formatado(self, obj: Orcamento):
-        return f"R$ {obj.total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.total)
 
-    @admin.display(description="Desconto")
+    @admin.display(description="Desconto", ordering="desconto")
     def desconto_formatado(self, obj: Orcamento):
-        return f"R$ {obj.desconto:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return brl(obj.desconto)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TratamentosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tratamentos'
+
+    def ready(self):
+        # total planejado do plano ao excluir linhas e versão do catálogo
+        from . import signals  # noqa: F401
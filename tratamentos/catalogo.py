@@ -0,0 +1,122 @@
+# tratamentos/catalogo.py
+"""
+Cache do catálogo de procedimentos na memória do processo.
+
+O catálogo é pequeno e quase só de leitura, então cada processo guarda a
+sua cópia (por id e por código) e só relê o banco quando a versão muda. A
+versão é um token no cache do Django, trocado (após o commit) a cada
+criação/alteração/exclusão no catálogo (tratamentos.signals); se ele sumir do
+cache (limpeza, expiração), um novo é gerado e todos recarregam.
+
+O token só é relido a cada CATALOGO_VERSAO_TTL segundos, então quase todas
+as leituras não tocam no cache. O processo que grava vê a troca na hora; os
+outros, em até CATALOGO_VERSAO_TTL segundos, desde que o CACHES do deploy
+seja compartilhado (Redis/Memcached) e não o LocMemCache por processo.
+
+As instâncias são compartilhadas entre requisições: servem para leitura
+(choices dos formulários, nome/código nas listagens) e não devem ser
+alteradas nem salvas; para editar, carregue do banco.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CatalogoProcedimento
+
+CHAVE_VERSAO = "tratamentos:catalogo:versao"
+
+_trava = threading.Lock()
+_estado = {"versao": None, "itens": (), "por_id": {}, "por_codigo": {}, "precos": {}}
+# (token, instante da leitura): memória da última leitura do token no cache
+_lida = (None, float("-inf"))
+
+
+def _novo_token():
+    return uuid.uuid4().hex
+
+
+def versao():
+    """Token da versão atual do catálogo (cria um se ainda não houver).
+
+    Lido do cache no máximo a cada CATALOGO_VERSAO_TTL segundos.
+    """
+    global _lida
+    token, lida_em = _lida
+    agora = time.monotonic()
+    if agora - lida_em >= settings.CATALOGO_VERSAO_TTL:
+        token = cache.get_or_set(CHAVE_VERSAO, _novo_token, timeout=None)
+        _lida = (token, agora)
+    return token
+
+
+def invalidar():
+    """Troca a versão depois do commit; todos os processos recarregam na próxima leitura."""
+    transaction.on_commit(_trocar_versao)
+
+
+def _trocar_versao():
+    global _lida
+    token = _novo_token()
+    cache.set(CHAVE_VERSAO, token, timeout=None)
+    # este processo não espera o TTL para ver a própria alteração
+    _lida = (token, time.monotonic())
+
+
+def _carregar(atual):
+    global _estado
+    with _trava:
+        if _estado["versao"] == atual:
+            return _estado
+        itens = tuple(CatalogoProcedimento.objects.order_by("nome", "id"))
+        # troca o estado inteiro: leitores em outras threads veem a versão
+        # antiga ou a nova, nunca uma mistura
+        _estado = {
+            "versao": atual,
+            "itens": itens,
+            "por_id": {p.pk: p for p in itens},
+            "por_codigo": {p.codigo: p for p in itens},
+            "precos": {p.pk: p.preco_base for p in itens},
+        }
+        return _estado
+
+
+def _atual():
+    atual, estado = versao(), _estado
+    if estado["versao"] != atual:
+        estado = _carregar(atual)
+    return estado
+
+
+def procedimentos():
+    """Todos os procedimentos, na ordem do catálogo (nome)."""
+    return _atual()["itens"]
+
+
+def por_id(pk):
+    return _atual()["por_id"].get(pk)
+
+
+def por_codigo(codigo):
+    return _atual()["por_codigo"].get(codigo)
+
+
+def tabela_precos():
+    """{id do procedimento: preco_base} da versão atual do catálogo."""
+    return _atual()["precos"]
+
+
+def anexar(objetos, campo="procedimento"):
+    """
+    Preenche `objeto.<campo>` a partir do cache, no lugar de um JOIN com o
+    catálogo (o objeto só precisa ter <campo>_id carregado).
+    """
+    indice = _atual()["por_id"]
+    for objeto in objetos:
+        procedimento = indice.get(getattr(objeto, f"{campo}_id"))
+        if procedimento is not None:
+            setattr(objeto, campo, procedimento)
+    return objetos
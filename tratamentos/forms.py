@@ -1,11 +1,57 @@
 # tratamentos/forms.py
 from django import forms
+from django.forms.models import ModelChoiceIterator
+from pacientes.widgets import PacienteAutocomplete
+from . import catalogo
 from .models import PlanoTratamento, CatalogoProcedimento, ProcedimentoPlanejado, ProcedimentoExecutado
 
+
+class _CatalogoIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for procedimento in catalogo.procedimentos():
+            yield self.choice(procedimento)
+
+    def __len__(self):
+        return len(catalogo.procedimentos()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(catalogo.procedimentos())
+
+
+class ProcedimentoCatalogoField(forms.ModelChoiceField):
+    """
+    Select de procedimentos servido pelo cache do catálogo (tratamentos.catalogo):
+    nem as opções nem a validação do valor enviado consultam o banco.
+    """
+    iterator = _CatalogoIterator
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", CatalogoProcedimento.objects.all())
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, CatalogoProcedimento):
+            value = value.pk
+        try:
+            procedimento = catalogo.por_id(int(value))
+        except (TypeError, ValueError):
+            procedimento = None
+        if procedimento is None:
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value},
+            )
+        return procedimento
+
+
 class PlanoTratamentoForm(forms.ModelForm):
     class Meta:
         model = PlanoTratamento
         fields = ["paciente", "status"]
+        widgets = {"paciente": PacienteAutocomplete()}
 
 class CatalogoProcedimentoForm(forms.ModelForm):
     class Meta:
@@ -13,11 +59,31 @@ class CatalogoProcedimentoForm(forms.ModelForm):
         fields = ["codigo", "nome", "duracao_min", "preco_base"]
 
 class ProcedimentoPlanejadoForm(forms.ModelForm):
+    procedimento = ProcedimentoCatalogoField()
+
     class Meta:
         model = ProcedimentoPlanejado
         fields = ["plano", "procedimento", "dente_superficie", "quantidade", "valor_unitario", "status"]
 
 class ProcedimentoExecutadoForm(forms.ModelForm):
+    procedimento = ProcedimentoCatalogoField()
+
     class Meta:
         model = ProcedimentoExecutado
         fields = ["consulta", "planejado", "procedimento", "dente", "superficie", "quantidade", "valor_unitario", "observacoes"]
+
+class GerarOrcamentosForm(forms.Form):
+    """Parâmetros da geração de orçamentos (POST). Sem planos nem status: planos em aberto."""
+    planos = forms.CharField(required=False, help_text="IDs separados por vírgula")
+    status = forms.MultipleChoiceField(choices=PlanoTratamento.Status.choices, required=False)
+    desconto_extra = forms.DecimalField(min_value=0, max_value=100, decimal_places=2, required=False)
+    validade_dias = forms.IntegerField(min_value=1, max_value=365, required=False)
+
+    def clean_planos(self):
+        valor = self.cleaned_data["planos"].strip()
+        if not valor:
+            return []
+        try:
+            return [int(parte) for parte in valor.split(",") if parte.strip()]
+        except ValueError:
+            raise forms.ValidationError("Informe os IDs dos planos separados por vírgula.")
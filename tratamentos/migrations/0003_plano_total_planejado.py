@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:28
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_total(apps, schema_editor):
+    # um único UPDATE com subconsulta correlacionada por plano
+    PlanoTratamento = apps.get_model("tratamentos", "PlanoTratamento")
+    ProcedimentoPlanejado = apps.get_model("tratamentos", "ProcedimentoPlanejado")
+    decimal = models.DecimalField(max_digits=12, decimal_places=2)
+    soma = (
+        ProcedimentoPlanejado.objects.filter(plano=OuterRef("pk"))
+        .exclude(status="CA")
+        .order_by()
+        .values("plano")
+        .annotate(total=Sum(ExpressionWrapper(F("quantidade") * F("valor_unitario"), output_field=decimal)))
+        .values("total")
+    )
+    PlanoTratamento.objects.update(total_planejado=Coalesce(Subquery(soma), Value(Decimal("0"), output_field=decimal)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tratamentos', '0002_alter_planotratamento_paciente_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planotratamento',
+            name='total_planejado',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12),
+        ),
+        migrations.RunPython(preencher_total, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,13 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Cast, Round
 from pacientes.models import Paciente
 from consultas.models import Consulta
 
+DECIMAL_TOTAL = models.DecimalField(max_digits=12, decimal_places=2)
+
 class PlanoTratamento(models.Model):
     class Status(models.TextChoices):
         RASCUNHO = "RA", "Rascunho"
@@ -18,6 +24,9 @@ class PlanoTratamento(models.Model):
         default=Status.RASCUNHO
     )
     criado_em = models.DateTimeField(auto_now_add=True)
+    # soma de quantidade * valor_unitario das linhas não canceladas, mantida
+    # pelas gravações de ProcedimentoPlanejado (ver aplicar_total)
+    total_planejado = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0"), editable=False)
 
     class Meta:
         ordering = ["-criado_em"]
@@ -26,6 +35,32 @@ class PlanoTratamento(models.Model):
 
     def __str__(self):
         return f"Plano de {self.paciente.nome} - {self.get_status_display()}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # relê o total travando a linha: uma linha do plano gravada depois
+            # que esta instância foi carregada já mudou o valor no banco
+            total = (
+                PlanoTratamento.objects.select_for_update().filter(pk=self.pk)
+                .values_list("total_planejado", flat=True).first()
+            )
+            if total is not None:
+                self.total_planejado = total
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def aplicar_total(plano_id, delta):
+        """
+        Soma `delta` ao total planejado com um UPDATE (F) na linha do plano.
+        Arredonda a centavos no SQL: no SQLite a soma é feita em REAL e
+        583.08 + 329.04 + 87.88 ficaria 1000.0000000000001.
+        """
+        if plano_id and delta:
+            PlanoTratamento.objects.filter(pk=plano_id).update(
+                total_planejado=Cast(Round(F("total_planejado") + delta, 2), DECIMAL_TOTAL)
+            )
     
 class CatalogoProcedimento(models.Model):
     codigo = models.CharField(max_length=30, unique=True)
@@ -65,6 +100,24 @@ class ProcedimentoPlanejado(models.Model):
     def __str__(self):
         return f"{self.procedimento.nome} ({self.dente_superficie or '-'})"
 
+    @property
+    def subtotal(self):
+        """Contribuição da linha para PlanoTratamento.total_planejado."""
+        if self.status == self.Status.CANCELADO:
+            return Decimal("0")
+        return (self.quantidade or 0) * (self.valor_unitario or Decimal("0"))
+
+    def save(self, *args, **kwargs):
+        # a linha e o total do plano na mesma transação
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = ProcedimentoPlanejado.objects.filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if anterior:
+                PlanoTratamento.aplicar_total(anterior.plano_id, -anterior.subtotal)
+            PlanoTratamento.aplicar_total(self.plano_id, self.subtotal)
+
 
 class ProcedimentoExecutado(models.Model):
     consulta = models.ForeignKey(Consulta, on_delete=models.CASCADE, related_name="procedimentos_executados")
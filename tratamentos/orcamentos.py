@@ -0,0 +1,102 @@
+# tratamentos/orcamentos.py
+"""
+Geração de orçamentos a partir das linhas dos planos.
+
+O preço de cada linha vem da tabela do catálogo (preco_base, via o cache
+por versão de tratamentos.catalogo), não do valor digitado na linha, então
+reorçar depois de um reajuste da tabela é só rodar de novo. Linhas
+canceladas ficam de fora. Descontos:
+
+- por faixa do valor bruto (settings.ORCAMENTO_FAIXAS_DESCONTO, a maior
+  faixa atingida vale);
+- um percentual extra informado na geração;
+- a soma é limitada a settings.ORCAMENTO_DESCONTO_MAXIMO.
+
+`total` é o valor a pagar (bruto - desconto) e `desconto` o valor abatido.
+
+`gerar` lê as linhas de todos os planos com uma consulta e grava tudo em uma
+transação: apaga os orçamentos ainda não aprovados dos planos que recebem
+orçamento novo e cria os novos com bulk_create. Plano sem linhas a orçar
+mantém os orçamentos que tiver.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalogo
+from .models import Orcamento, PlanoTratamento, ProcedimentoPlanejado
+
+CENTAVOS = Decimal("0.01")
+STATUS_ABERTOS = (PlanoTratamento.Status.RASCUNHO, PlanoTratamento.Status.AGUARDANDO)
+FAIXAS_PADRAO = ((5000, 5), (10000, 10))
+DESCONTO_MAXIMO_PADRAO = 20
+VALIDADE_PADRAO_DIAS = 30
+# ids por DELETE: abaixo do limite de parâmetros por consulta do SQLite
+LOTE_EXCLUSAO = 1000
+
+
+def percentual_desconto(bruto, extra=Decimal("0")):
+    """Percentual aplicado a um valor bruto: faixa atingida + extra, com teto."""
+    faixas = getattr(settings, "ORCAMENTO_FAIXAS_DESCONTO", FAIXAS_PADRAO)
+    por_faixa = max((Decimal(pct) for minimo, pct in faixas if bruto >= minimo), default=Decimal("0"))
+    teto = Decimal(getattr(settings, "ORCAMENTO_DESCONTO_MAXIMO", DESCONTO_MAXIMO_PADRAO))
+    return min(por_faixa + Decimal(extra), teto)
+
+
+def calcular(bruto, extra=Decimal("0")):
+    """(total, desconto) em reais, arredondados ao centavo."""
+    desconto = (bruto * percentual_desconto(bruto, extra) / 100).quantize(CENTAVOS, ROUND_HALF_UP)
+    return bruto - desconto, desconto
+
+
+def valores_brutos(planos):
+    """{plano_id: soma de quantidade * preço de tabela} das linhas não canceladas."""
+    precos = catalogo.tabela_precos()
+    linhas = (
+        ProcedimentoPlanejado.objects.filter(plano__in=planos)
+        .exclude(status=ProcedimentoPlanejado.Status.CANCELADO)
+        .order_by()
+        .values_list("plano_id", "procedimento_id", "quantidade")
+    )
+    brutos = defaultdict(Decimal)
+    for plano_id, procedimento_id, quantidade in linhas.iterator(chunk_size=5000):
+        if procedimento_id not in precos:
+            # procedimento criado depois da última leitura da tabela
+            precos = catalogo.tabela_precos()
+        brutos[plano_id] += precos[procedimento_id] * quantidade
+    return brutos
+
+
+def gerar(planos=None, desconto_extra=Decimal("0"), validade_dias=None, hoje=None):
+    """
+    Gera um orçamento por plano (queryset ou lista de ids; padrão: planos em
+    aberto) que tenha linhas não canceladas. Retorna os orçamentos criados.
+    """
+    hoje = hoje or timezone.localdate()
+    if planos is None:
+        planos = PlanoTratamento.objects.filter(status__in=STATUS_ABERTOS)
+    elif not hasattr(planos, "values"):
+        planos = PlanoTratamento.objects.filter(pk__in=planos)
+    alvo = planos.order_by().values("id")
+
+    if validade_dias is None:
+        validade_dias = getattr(settings, "ORCAMENTO_VALIDADE_DIAS", VALIDADE_PADRAO_DIAS)
+    validade = hoje + timedelta(days=validade_dias)
+    novos = []
+    for plano_id, bruto in valores_brutos(alvo).items():
+        total, desconto = calcular(bruto, desconto_extra)
+        novos.append(Orcamento(plano_id=plano_id, total=total, desconto=desconto, validade=validade))
+
+    with transaction.atomic():
+        # orçamentos aprovados ficam; os pendentes são substituídos, só nos
+        # planos que recebem orçamento novo
+        ids = [orcamento.plano_id for orcamento in novos]
+        for inicio in range(0, len(ids), LOTE_EXCLUSAO):
+            Orcamento.objects.filter(
+                plano_id__in=ids[inicio:inicio + LOTE_EXCLUSAO], aprovado_em__isnull=True
+            ).delete()
+        return Orcamento.objects.bulk_create(novos, batch_size=1000)
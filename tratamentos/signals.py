@@ -0,0 +1,22 @@
+# tratamentos/signals.py
+"""
+Tira a linha excluída do total planejado do plano e troca a versão do
+cache do catálogo (tratamentos.catalogo) quando o catálogo muda.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalogo
+from .models import CatalogoProcedimento, PlanoTratamento, ProcedimentoPlanejado
+
+
+@receiver(post_delete, sender=ProcedimentoPlanejado, dispatch_uid="tratamentos_total_planejado")
+def _remover_do_total(sender, instance, **kwargs):
+    # roda dentro da transação do delete (inclusive queryset.delete())
+    PlanoTratamento.aplicar_total(instance.plano_id, -instance.subtotal)
+
+
+@receiver(post_save, sender=CatalogoProcedimento, dispatch_uid="tratamentos_catalogo_salvo")
+@receiver(post_delete, sender=CatalogoProcedimento, dispatch_uid="tratamentos_catalogo_excluido")
+def _invalidar_catalogo(sender, **kwargs):
+    catalogo.invalidar()
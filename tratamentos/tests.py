@@ -0,0 +1,137 @@
+# tratamentos/tests.py
+from decimal import Decimal
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pacientes.models import Paciente
+
+from . import catalogo, orcamentos, totais
+from .forms import ProcedimentoPlanejadoForm
+from .models import CatalogoProcedimento, Orcamento, PlanoTratamento, ProcedimentoPlanejado
+
+
+class CatalogoVersaoTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.procedimento = CatalogoProcedimento.objects.create(
+                codigo="RES", nome="Restauração", preco_base=Decimal("150"),
+            )
+
+    def test_alteracao_troca_versao_e_recarrega(self):
+        versao = catalogo.versao()
+        self.assertEqual(catalogo.por_codigo("RES").nome, "Restauração")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.procedimento.nome = "Restauração em resina"
+            self.procedimento.save()
+        self.assertNotEqual(catalogo.versao(), versao)
+        self.assertEqual(catalogo.por_id(self.procedimento.pk).nome, "Restauração em resina")
+
+    def test_formulario_sem_consulta_ao_catalogo(self):
+        catalogo.procedimentos()
+        with self.assertNumQueries(0):
+            html = str(ProcedimentoPlanejadoForm()["procedimento"])
+        self.assertIn("RES - Restauração", html)
+
+    def test_versao_relida_so_depois_do_ttl(self):
+        catalogo.procedimentos()
+        _, agora = catalogo._lida
+        # troca feita por outro processo: só o cache muda
+        cache.set(catalogo.CHAVE_VERSAO, "de-outro-processo", timeout=None)
+        with mock.patch.object(catalogo.cache, "get_or_set", wraps=cache.get_or_set) as leitura:
+            with mock.patch("time.monotonic", return_value=agora + settings.CATALOGO_VERSAO_TTL - 1), \
+                    self.assertNumQueries(0):
+                catalogo.procedimentos()
+                self.assertNotEqual(catalogo.versao(), "de-outro-processo")
+            self.assertEqual(leitura.call_count, 0)
+            with mock.patch("time.monotonic", return_value=agora + settings.CATALOGO_VERSAO_TTL + 1):
+                self.assertEqual(catalogo.versao(), "de-outro-processo")
+            self.assertEqual(leitura.call_count, 1)
+
+
+@override_settings(ORCAMENTO_FAIXAS_DESCONTO=[(5000, 5), (10000, 10)], ORCAMENTO_DESCONTO_MAXIMO=20)
+class OrcamentoTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.implante = CatalogoProcedimento.objects.create(
+                codigo="IMP", nome="Implante", preco_base=Decimal("2500"),
+            )
+        paciente = Paciente.objects.create(
+            nome="Ana Souza", cpf="111.222.333-44", data_nascimento=date(1990, 1, 1), telefone="11912345678",
+        )
+        self.plano = PlanoTratamento.objects.create(paciente=paciente)
+        self.vazio = PlanoTratamento.objects.create(paciente=paciente)
+        # o preço do orçamento é o da tabela, não o digitado na linha
+        ProcedimentoPlanejado.objects.create(
+            plano=self.plano, procedimento=self.implante, quantidade=2, valor_unitario=Decimal("1"),
+        )
+
+    def test_faixas_de_desconto(self):
+        self.assertEqual(orcamentos.calcular(Decimal("4999.99")), (Decimal("4999.99"), Decimal("0.00")))
+        self.assertEqual(orcamentos.calcular(Decimal("5000")), (Decimal("4750.00"), Decimal("250.00")))
+        self.assertEqual(orcamentos.calcular(Decimal("10000")), (Decimal("9000.00"), Decimal("1000.00")))
+        self.assertEqual(orcamentos.calcular(Decimal("100"), Decimal("2.5")), (Decimal("97.50"), Decimal("2.50")))
+
+    def test_desconto_limitado_ao_teto(self):
+        self.assertEqual(orcamentos.percentual_desconto(Decimal("10000"), Decimal("15")), Decimal("20"))
+        self.assertEqual(orcamentos.calcular(Decimal("10000"), Decimal("15")), (Decimal("8000.00"), Decimal("2000.00")))
+
+    def test_gerar_de_novo_substitui_so_os_pendentes(self):
+        orcamentos.gerar([self.plano.pk])
+        aprovado = orcamentos.gerar([self.plano.pk])[0]
+        aprovado.aprovado_em = timezone.now()
+        aprovado.save()
+        orcamentos.gerar([self.plano.pk])
+        orcamentos.gerar([self.plano.pk])
+        pendentes = Orcamento.objects.filter(plano=self.plano, aprovado_em__isnull=True)
+        self.assertEqual([(o.total, o.desconto) for o in pendentes], [(Decimal("4750.00"), Decimal("250.00"))])
+        self.assertTrue(Orcamento.objects.filter(pk=aprovado.pk).exists())
+
+    def test_plano_sem_linhas_mantem_orcamento_pendente(self):
+        anterior = Orcamento.objects.create(plano=self.vazio, total=Decimal("100"), validade=date(2030, 1, 1))
+        criados = orcamentos.gerar([self.plano.pk, self.vazio.pk])
+        self.assertEqual([o.plano_id for o in criados], [self.plano.pk])
+        self.assertTrue(Orcamento.objects.filter(pk=anterior.pk).exists())
+
+    def test_view_plano_sem_linhas_responde_400_sem_apagar(self):
+        anterior = Orcamento.objects.create(plano=self.vazio, total=Decimal("100"), validade=date(2030, 1, 1))
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        resposta = self.client.post(reverse("tratamentos:plano_orcamento", args=[self.vazio.pk]))
+        self.assertEqual(resposta.status_code, 400)
+        self.assertTrue(Orcamento.objects.filter(pk=anterior.pk).exists())
+        resposta = self.client.post(reverse("tratamentos:plano_orcamento", args=[self.plano.pk]))
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(resposta.json()["total"], "4750.00")
+
+
+class TotalPlanejadoTests(TestCase):
+    def setUp(self):
+        procedimento = CatalogoProcedimento.objects.create(codigo="LIM", nome="Limpeza", preco_base=Decimal("100"))
+        paciente = Paciente.objects.create(
+            nome="Ana Souza", cpf="111.222.333-44", data_nascimento=date(1990, 1, 1), telefone="11912345678",
+        )
+        self.plano = PlanoTratamento.objects.create(paciente=paciente)
+        # somados em REAL dariam 1000.0000000000001
+        for valor in ("583.08", "329.04", "87.88"):
+            ProcedimentoPlanejado.objects.create(
+                plano=self.plano, procedimento=procedimento, valor_unitario=Decimal(valor),
+            )
+
+    def test_total_exato_no_banco(self):
+        self.assertTrue(PlanoTratamento.objects.filter(pk=self.plano.pk, total_planejado=1000).exists())
+        totais.recalcular()
+        self.assertTrue(PlanoTratamento.objects.filter(pk=self.plano.pk, total_planejado=1000).exists())
+
+    def test_filtro_do_admin_no_limite_da_faixa(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        url = reverse("admin:tratamentos_planotratamento_changelist")
+        resposta = self.client.get(url, {"total": "ate-1000"})
+        self.assertEqual(list(resposta.context["cl"].queryset), [self.plano])
+        resposta = self.client.get(url, {"total": "1000-5000"})
+        self.assertEqual(list(resposta.context["cl"].queryset), [])
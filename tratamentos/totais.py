@@ -0,0 +1,47 @@
+# tratamentos/totais.py
+"""
+Recalculo do total planejado dos planos a partir das linhas.
+
+Usado depois de operações em massa que não passam por
+ProcedimentoPlanejado.save() (queryset.update, bulk_create do seed_erp):
+um único UPDATE com subconsulta correlacionada por plano.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import DECIMAL_TOTAL, PlanoTratamento, ProcedimentoPlanejado
+
+
+def subtotal(prefixo=""):
+    """quantidade * valor_unitario de uma linha; `prefixo` para acessar a partir do plano."""
+    return ExpressionWrapper(
+        F(f"{prefixo}quantidade") * F(f"{prefixo}valor_unitario"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def expressao_total():
+    """
+    Subquery: soma das linhas não canceladas do plano externo (0 se não
+    houver), arredondada a centavos como em PlanoTratamento.aplicar_total.
+    """
+    soma = (
+        ProcedimentoPlanejado.objects.filter(plano=OuterRef("pk"))
+        .exclude(status=ProcedimentoPlanejado.Status.CANCELADO)
+        .order_by()
+        .values("plano")
+        .annotate(total=Sum(subtotal()))
+        .values("total")
+    )
+    zero = Value(Decimal("0"), output_field=DecimalField(max_digits=12, decimal_places=2))
+    return Cast(Round(Coalesce(Subquery(soma), zero), 2), DECIMAL_TOTAL)
+
+
+def recalcular(planos=None):
+    """Regrava total_planejado dos planos (ids ou queryset; todos se None)."""
+    qs = PlanoTratamento.objects.all()
+    if planos is not None:
+        qs = qs.filter(pk__in=planos)
+    return qs.update(total_planejado=expressao_total())
@@ -9,6 +9,8 @@ urlpatterns = [
     path("planos/<int:pk>/", views.PlanoDetailView.as_view(), name="plano_detail"),
     path("planos/<int:pk>/editar/", views.PlanoUpdateView.as_view(), name="plano_update"),
     path("planos/<int:pk>/excluir/", views.PlanoDeleteView.as_view(), name="plano_delete"),
+    path("planos/<int:pk>/orcamento/", views.GerarOrcamentosView.as_view(), name="plano_orcamento"),
+    path("orcamentos/gerar/", views.GerarOrcamentosView.as_view(), name="orcamentos_gerar"),
 
     path("catalogo/", views.ProcedimentoCatalogoListView.as_view(), name="catalogo_list"),
     path("catalogo/novo/", views.ProcedimentoCatalogoCreateView.as_view(), name="catalogo_create"),
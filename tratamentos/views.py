@@ -4,9 +4,15 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.forms import inlineformset_factory
+from django.db.models import Count, Prefetch, Q, Sum
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
 from .models import PlanoTratamento, CatalogoProcedimento, ProcedimentoPlanejado, ProcedimentoExecutado
-from .forms import PlanoTratamentoForm, CatalogoProcedimentoForm, ProcedimentoPlanejadoForm, ProcedimentoExecutadoForm
-from pacientes.models import Paciente
+from .forms import PlanoTratamentoForm, CatalogoProcedimentoForm, ProcedimentoPlanejadoForm, ProcedimentoExecutadoForm, GerarOrcamentosForm
+from pacientes.widgets import PacienteAutocomplete
+from . import catalogo, orcamentos
+from .totais import subtotal
 
 class PlanoListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = PlanoTratamento
@@ -31,7 +37,10 @@ class PlanoListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["pacientes"] = Paciente.objects.only("id", "nome").order_by("nome")
+        # busca por autocomplete: só o paciente já filtrado é lido
+        ctx["filtro_paciente"] = PacienteAutocomplete().render(
+            "paciente", self.request.GET.get("paciente"), attrs={"id": "paciente"},
+        )
         ctx["current_status"] = self.request.GET.get("status", "")
         ctx["current_paciente"] = self.request.GET.get("paciente", "")
         return ctx
@@ -43,6 +52,35 @@ class PlanoDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     context_object_name = "plano"
     permission_required = "tratamentos.view_planotratamento"
 
+    def get_queryset(self):
+        # contagens por status e valor total em um único GROUP BY; as linhas
+        # vêm em uma segunda consulta e o procedimento, do cache do catálogo
+        Status = ProcedimentoPlanejado.Status
+        por_status = {
+            f"qtd_{nome}": Count("procedimentos", filter=Q(procedimentos__status=codigo))
+            for nome, codigo in (
+                ("pendentes", Status.PENDENTE), ("aprovados", Status.APROVADO),
+                ("executados", Status.EXECUTADO), ("cancelados", Status.CANCELADO),
+            )
+        }
+        linhas = ProcedimentoPlanejado.objects.only(
+            "id", "plano_id", "procedimento_id", "dente_superficie", "quantidade", "valor_unitario", "status",
+        ).order_by("id")
+        return (
+            PlanoTratamento.objects.select_related("paciente")
+            .annotate(
+                qtd_procedimentos=Count("procedimentos"),
+                valor_total=Sum(subtotal("procedimentos__"), filter=~Q(procedimentos__status=Status.CANCELADO)),
+                **por_status,
+            )
+            .prefetch_related(Prefetch("procedimentos", queryset=linhas))
+        )
+
+    def get_object(self, queryset=None):
+        plano = super().get_object(queryset)
+        catalogo.anexar(plano.procedimentos.all())
+        return plano
+
 class PlanoCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = PlanoTratamento
     form_class = PlanoTratamentoForm
@@ -74,6 +112,9 @@ class ProcedimentoCatalogoListView(LoginRequiredMixin, PermissionRequiredMixin,
     context_object_name = "procedimentos"
     permission_required = "tratamentos.view_catalogoprocedimento"
 
+    def get_queryset(self):
+        return catalogo.procedimentos()
+
 class ProcedimentoCatalogoCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = CatalogoProcedimento
     form_class = CatalogoProcedimentoForm
@@ -142,3 +183,57 @@ class ProcedimentoExecutadoCreateView(LoginRequiredMixin, PermissionRequiredMixi
     def get_success_url(self):
         messages.success(self.request, "Procedimento executado registrado.")
         return reverse_lazy("consultas:detail", kwargs={"pk": self.object.consulta_id})
+
+
+class GerarOrcamentosView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Gera orçamentos pela tabela do catálogo. Com pk: só aquele plano e devolve
+    o orçamento; sem pk: os planos informados (ou por status, ou os em aberto)
+    e devolve o resumo. Orçamentos pendentes desses planos são substituídos.
+    """
+
+    permission_required = "tratamentos.add_orcamento"
+
+    def post(self, request, pk=None):
+        form = GerarOrcamentosForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({"erros": form.errors}, status=400)
+        dados = form.cleaned_data
+        if pk is not None:
+            planos = [get_object_or_404(PlanoTratamento, pk=pk).pk]
+            a_orcar = (
+                ProcedimentoPlanejado.objects.filter(plano_id=pk)
+                .exclude(status=ProcedimentoPlanejado.Status.CANCELADO)
+            )
+            if not a_orcar.exists():
+                # sem linhas, nada é gerado nem apagado
+                return JsonResponse({"erros": {"plano": ["O plano não tem procedimentos a orçar."]}}, status=400)
+        elif dados["planos"]:
+            planos = PlanoTratamento.objects.filter(pk__in=dados["planos"])
+        elif dados["status"]:
+            planos = PlanoTratamento.objects.filter(status__in=dados["status"])
+        else:
+            planos = None
+
+        criados = orcamentos.gerar(
+            planos,
+            desconto_extra=dados["desconto_extra"] or 0,
+            validade_dias=dados["validade_dias"],
+        )
+        if pk is not None:
+            if not criados:
+                # linhas canceladas entre a verificação e a geração
+                return JsonResponse({"erros": {"plano": ["O plano não tem procedimentos a orçar."]}}, status=400)
+            orcamento = criados[0]
+            return JsonResponse({
+                "id": orcamento.pk,
+                "plano": orcamento.plano_id,
+                "total": str(orcamento.total),
+                "desconto": str(orcamento.desconto),
+                "validade": orcamento.validade.isoformat(),
+            }, status=201)
+        return JsonResponse({
+            "criados": len(criados),
+            "total": str(sum((o.total for o in criados), 0)),
+            "desconto": str(sum((o.desconto for o in criados), 0)),
+        }, status=201)